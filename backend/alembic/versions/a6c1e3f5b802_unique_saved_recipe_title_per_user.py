@@ -0,0 +1,36 @@
+"""Unique saved recipe title per user
+
+Revision ID: a6c1e3f5b802
+Revises: f4b2d8c7a913
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6c1e3f5b802'
+down_revision: Union[str, Sequence[str], None] = 'f4b2d8c7a913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Concurrent saves may have produced duplicates; keep the most recently saved copy
+    op.execute(
+        """
+        DELETE FROM saved_recipes a
+        USING saved_recipes b
+        WHERE a.user_id = b.user_id
+          AND a.recipe_title = b.recipe_title
+          AND (coalesce(a.saved_at, '-infinity'), a.recipe_id) < (coalesce(b.saved_at, '-infinity'), b.recipe_id)
+        """
+    )
+    op.create_unique_constraint('uq_saved_recipes_user_title', 'saved_recipes', ['user_id', 'recipe_title'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_saved_recipes_user_title', 'saved_recipes', type_='unique')
@@ -0,0 +1,27 @@
+"""Add allergen mask to saved recipes
+
+Revision ID: b51e2d7a4c19
+Revises: 9f3b6c2e6c3a
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b51e2d7a4c19'
+down_revision: Union[str, Sequence[str], None] = '9f3b6c2e6c3a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing rows stay NULL and are checked on the fly until re-saved
+    op.add_column('saved_recipes', sa.Column('allergen_mask', sa.BigInteger(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('saved_recipes', 'allergen_mask')
@@ -0,0 +1,37 @@
+"""Add canonical ingredient array (GIN-indexed) to saved recipes
+
+Revision ID: b8d4f2a6c017
+Revises: a6c1e3f5b802
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8d4f2a6c017'
+down_revision: Union[str, Sequence[str], None] = 'a6c1e3f5b802'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Names come from the app's ingredient resolver, which this migration must not import:
+    # rows stay NULL here and the app backfills them at startup (_backfill_canonical_ingredients)
+    op.add_column('saved_recipes', sa.Column('canonical_ingredients', postgresql.ARRAY(sa.Text()), nullable=True))
+    op.create_index(
+        'ix_saved_recipes_canonical_ingredients',
+        'saved_recipes',
+        ['canonical_ingredients'],
+        unique=False,
+        postgresql_using='gin',
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_saved_recipes_canonical_ingredients', table_name='saved_recipes', postgresql_using='gin')
+    op.drop_column('saved_recipes', 'canonical_ingredients')
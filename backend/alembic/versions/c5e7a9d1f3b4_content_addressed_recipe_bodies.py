@@ -0,0 +1,91 @@
+"""Store saved recipe bodies once in a content-addressed recipe_bodies table
+
+Revision ID: c5e7a9d1f3b4
+Revises: b8d4f2a6c017
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5e7a9d1f3b4'
+down_revision: Union[str, Sequence[str], None] = 'b8d4f2a6c017'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_BATCH = 1000
+
+
+def upgrade() -> None:
+    from backend.utils.recipe_utils import recipe_hash
+
+    op.create_table(
+        'recipe_bodies',
+        sa.Column('body_hash', sa.String(length=64), nullable=False),
+        sa.Column('recipe_data', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('created_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('body_hash'),
+    )
+    op.add_column('saved_recipes', sa.Column('body_hash', sa.String(length=64), nullable=True))
+
+    # The hash is computed over canonical JSON, so the backfill runs in Python
+    conn = op.get_bind()
+    saved = sa.table(
+        'saved_recipes',
+        sa.column('recipe_id', sa.Integer()),
+        sa.column('recipe_data', postgresql.JSONB()),
+        sa.column('body_hash', sa.String()),
+    )
+    bodies = sa.table(
+        'recipe_bodies',
+        sa.column('body_hash', sa.String()),
+        sa.column('recipe_data', postgresql.JSONB()),
+    )
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.select(saved.c.recipe_id, saved.c.recipe_data)
+            .where(saved.c.recipe_id > last_id)
+            .order_by(saved.c.recipe_id)
+            .limit(_BATCH)
+        ).all()
+        if not rows:
+            break
+        hashed = [(recipe_id, recipe_hash(data or {}), data or {}) for recipe_id, data in rows]
+        unique = {h: data for _, h, data in hashed}
+        conn.execute(
+            postgresql.insert(bodies)
+            .values([{'body_hash': h, 'recipe_data': data} for h, data in unique.items()])
+            .on_conflict_do_nothing()
+        )
+        for recipe_id, h, _ in hashed:
+            conn.execute(saved.update().where(saved.c.recipe_id == recipe_id).values(body_hash=h))
+        last_id = rows[-1][0]
+
+    op.alter_column('saved_recipes', 'body_hash', nullable=False)
+    op.create_foreign_key(
+        'saved_recipes_body_hash_fkey', 'saved_recipes', 'recipe_bodies', ['body_hash'], ['body_hash']
+    )
+    op.create_index(op.f('ix_saved_recipes_body_hash'), 'saved_recipes', ['body_hash'], unique=False)
+    op.drop_column('saved_recipes', 'recipe_data')
+
+
+def downgrade() -> None:
+    op.add_column(
+        'saved_recipes',
+        sa.Column('recipe_data', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    )
+    op.execute(
+        "UPDATE saved_recipes AS s SET recipe_data = b.recipe_data "
+        "FROM recipe_bodies AS b WHERE b.body_hash = s.body_hash"
+    )
+    op.alter_column('saved_recipes', 'recipe_data', nullable=False)
+    op.drop_index(op.f('ix_saved_recipes_body_hash'), table_name='saved_recipes')
+    op.drop_constraint('saved_recipes_body_hash_fkey', 'saved_recipes', type_='foreignkey')
+    op.drop_column('saved_recipes', 'body_hash')
+    op.drop_table('recipe_bodies')
@@ -0,0 +1,28 @@
+"""Add materialized aggregate to grocery lists
+
+Revision ID: c7e4a19d2f05
+Revises: b51e2d7a4c19
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7e4a19d2f05'
+down_revision: Union[str, Sequence[str], None] = 'b51e2d7a4c19'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing lists stay NULL and are aggregated on their next read
+    op.add_column('grocery_lists', sa.Column('aggregate', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('grocery_lists', 'aggregate')
@@ -0,0 +1,27 @@
+"""Record which mask rules computed saved_recipes.allergen_mask
+
+Revision ID: d2f6b8a4c1e9
+Revises: c5e7a9d1f3b4
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2f6b8a4c1e9'
+down_revision: Union[str, Sequence[str], None] = 'c5e7a9d1f3b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing masks have no version: they are recomputed on their next read
+    op.add_column('saved_recipes', sa.Column('mask_version', sa.String(length=16), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('saved_recipes', 'mask_version')
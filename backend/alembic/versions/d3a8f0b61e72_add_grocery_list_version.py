@@ -0,0 +1,27 @@
+"""Add version counter to grocery lists
+
+Revision ID: d3a8f0b61e72
+Revises: c7e4a19d2f05
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3a8f0b61e72'
+down_revision: Union[str, Sequence[str], None] = 'c7e4a19d2f05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Bumped in the same UPDATE as each row-locked grocery mutation
+    op.add_column('grocery_lists', sa.Column('version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('grocery_lists', 'version')
@@ -0,0 +1,29 @@
+"""Add updated_at to user profiles and saved recipes
+
+Revision ID: e91c5b7a3d48
+Revises: d3a8f0b61e72
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e91c5b7a3d48'
+down_revision: Union[str, Sequence[str], None] = 'd3a8f0b61e72'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Used to answer If-None-Match without loading the rows' payloads
+    op.add_column('user_profiles', sa.Column('updated_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=True))
+    op.add_column('saved_recipes', sa.Column('updated_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('saved_recipes', 'updated_at')
+    op.drop_column('user_profiles', 'updated_at')
@@ -0,0 +1,40 @@
+"""Add saved recipe summary columns and keyset pagination index
+
+Revision ID: f4b2d8c7a913
+Revises: e91c5b7a3d48
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4b2d8c7a913'
+down_revision: Union[str, Sequence[str], None] = 'e91c5b7a3d48'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('saved_recipes', sa.Column('calories', sa.String(length=32), nullable=True))
+    op.add_column('saved_recipes', sa.Column('ingredient_count', sa.Integer(), nullable=True))
+    op.execute(
+        """
+        UPDATE saved_recipes SET
+            calories = left(recipe_data->'nutrition'->>'calories', 32),
+            ingredient_count = CASE
+                WHEN jsonb_typeof(recipe_data->'ingredients') = 'array' THEN jsonb_array_length(recipe_data->'ingredients')
+                ELSE 0
+            END
+        """
+    )
+    op.create_index('ix_saved_recipes_user_saved_at', 'saved_recipes', ['user_id', 'saved_at', 'recipe_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_saved_recipes_user_saved_at', table_name='saved_recipes')
+    op.drop_column('saved_recipes', 'ingredient_count')
+    op.drop_column('saved_recipes', 'calories')
@@ -1,15 +1,35 @@
 """FastAPI backend for the AI-assisted recipe assistant."""
 
-from typing import List, Optional, Dict, Any
-from fastapi import FastAPI, HTTPException, Request
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from collections import OrderedDict
+from typing import Callable, Iterable, List, Optional, Dict, Any, Tuple
+from fastapi import FastAPI, HTTPException, Request, Response, Query
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
-from sqlalchemy import select
+from sqlalchemy import ARRAY, Integer, Text, bindparam, delete, exists, func, literal, or_, select, tuple_, update
+from sqlalchemy.dialects.postgresql import JSONB, insert as pg_insert
 from sqlalchemy.exc import IntegrityError
 
 from .database import async_session
-from .models import User, UserProfile, SavedRecipe, GroceryList
-from .utils.auth_utils import hash_password, verify_password, make_token, verify_token
+from .models import User, UserProfile, SavedRecipe, RecipeBody, GroceryList
+from .utils.auth_utils import (
+    HashPoolSaturated,
+    hash_password_async,
+    make_token,
+    needs_rehash,
+    verify_password_async,
+    verify_token,
+)
 
 from .utils.logging_utils import get_logger
 from . import context_manager as ctx
@@ -17,9 +37,32 @@ from . import recipe_retrieval as rr
 from . import substitution_engine as se
 from .llm_interface import ask_llm, generate_recipe, has_llm, modify_recipe
 from .intent_parser import parse_intent
-from .utils.recipe_utils import normalize_recipe
-from .utils.nutrition import annotate_recipe_nutrition
-from .utils.grocery import aggregate_grocery, merge_recipe, remove_recipe, apply_override
+from .recipe_validator import allowed_names, validate_recipe, violated_terms
+from .utils.recipe_utils import normalize_recipe, recipe_hash
+from .utils.bundle import current_bundle
+from .utils.nutrition import (
+    annotate_recipe_nutrition,
+    canonical_ingredients,
+    compute_recipe_nutrition,
+    current_snapshot,
+    get_resolver,
+    reload_ingredient_db,
+    resolve_ingredient,
+    watch_ingredient_db,
+)
+from .utils.nutrition_batch import compute_batch_nutrition, get_macro_matrix
+from .utils.constraints import DIET_MASKS, compile_constraints, mask_version, recipe_mask
+from .utils.substitute_ranker import get_ranker
+from .utils.grocery import (
+    GroceryPatch,
+    aggregate_grocery,
+    apply_bulk,
+    apply_override,
+    ensure_aggregate,
+    grocery_view,
+    merge_recipe,
+    remove_recipe,
+)
 
 
 logger = get_logger(__name__)
@@ -35,6 +78,55 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Seconds between checks of data/ingredients.json for changes (0 disables the watcher)
+INGREDIENT_DB_POLL_SECONDS = float(os.getenv("INGREDIENT_DB_POLL_SECONDS", "10"))
+
+
+# Set once _warm_caches has finished; /ready reports 503 until then
+_WARMUP: Dict[str, Any] = {"ready": False, "seconds": None, "error": None}
+
+
+def _warm_caches() -> None:
+    """Build every lazily-initialized index so the first requests do not pay for it."""
+    started = time.perf_counter()
+    try:
+        current_snapshot()
+        get_resolver()
+        get_macro_matrix()
+        get_ranker()
+        corpus = rr.browse_recipes()
+        for diet in DIET_MASKS:
+            validate_recipe({"ingredients": [], "steps": []}, dietary=[diet])
+        se._index()
+        # parse quantities and price lines of the local corpus into the process-wide caches
+        for recipe in corpus:
+            compute_recipe_nutrition(recipe)
+    except Exception as exc:  # pragma: no cover - still serve, just cold
+        logger.warning("Cache warmup failed: %s", exc)
+        _WARMUP["error"] = str(exc)
+    _WARMUP["seconds"] = round(time.perf_counter() - started, 3)
+    _WARMUP["ready"] = True
+    logger.info("Caches warm after %.3fs", _WARMUP["seconds"])
+
+
+@app.on_event("startup")
+async def _start_ingredient_watcher():
+    await run_in_threadpool(current_snapshot)
+    if INGREDIENT_DB_POLL_SECONDS > 0:
+        watch_ingredient_db(INGREDIENT_DB_POLL_SECONDS)
+    threading.Thread(target=_warm_caches, name="cache-warmup", daemon=True).start()
+
+
+# Background tasks started at startup; held so they are not garbage-collected mid-run
+_BACKGROUND_TASKS: set = set()
+
+
+@app.on_event("startup")
+async def _start_saved_backfill():
+    task = asyncio.create_task(_run_saved_backfill())
+    _BACKGROUND_TASKS.add(task)
+    task.add_done_callback(_BACKGROUND_TASKS.discard)
+
 
 class Ingredient(BaseModel):
     name: str
@@ -57,6 +149,7 @@ class AskRequest(BaseModel):
 class AskResponse(BaseModel):
     reply: str
     recipe: Optional[Recipe] = None
+    source: Optional[str] = Field(None, description="Tier that produced the recipe: saved, corpus, cache or llm")
 
 
 class SubstituteRequest(BaseModel):
@@ -68,6 +161,18 @@ class SubstituteResponse(BaseModel):
     substitutes: List[str]
 
 
+class SubstituteBatchRequest(BaseModel):
+    ingredients: List[str]
+    dislikes: Optional[List[str]] = None
+    session_id: Optional[str] = Field(None, description="Also avoid this chat session's dislikes")
+    stream: bool = Field(False, description="Stream NDJSON: local answers first, LLM answers when they arrive")
+
+
+class SubstituteBatchResponse(BaseModel):
+    substitutes: Dict[str, List[str]]
+    pending: List[str] = []
+
+
 class NutritionPreviewRequest(BaseModel):
     recipe: Recipe
 
@@ -77,6 +182,18 @@ class NutritionPreviewResponse(BaseModel):
     unknown_items: Optional[List[str]] = None
 
 
+class NutritionBatchRequest(BaseModel):
+    recipes: List[Recipe]
+
+
+class NutritionBatchItem(NutritionPreviewResponse):
+    name: str
+
+
+class NutritionBatchResponse(BaseModel):
+    results: List[NutritionBatchItem]
+
+
 class GroceryRecipe(BaseModel):
     name: str
     ingredients: List[Ingredient]
@@ -127,6 +244,19 @@ class GroceryFullResponse(BaseModel):
     aggregated: GroceryResponse
 
 
+class IngredientReloadResponse(BaseModel):
+    reloaded: bool
+    version: int
+    names: int
+
+
+class ReadinessResponse(BaseModel):
+    ready: bool
+    warmup_seconds: Optional[float] = None
+    ingredient_db_version: int
+    bundle_version: Optional[str] = None
+
+
 class GroceryItemOverride(BaseModel):
     key: str
     quantity: Optional[str] = None
@@ -135,10 +265,60 @@ class GroceryItemOverride(BaseModel):
     remove: Optional[bool] = None
 
 
-def _respond(session_id: str, reply: str, recipe: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+class GroceryBulkRequest(BaseModel):
+    """Applied in one transaction: removals, then upserts, then item overrides."""
+    upserts: List[GroceryRecipePayload] = Field(default_factory=list)
+    removals: List[str] = Field(default_factory=list)
+    overrides: List[GroceryItemOverride] = Field(default_factory=list)
+
+
+def _respond(
+    session_id: str,
+    reply: str,
+    recipe: Optional[Dict[str, Any]] = None,
+    source: Optional[str] = None,
+) -> Dict[str, Any]:
     """Append assistant message to history and return API response payload."""
     ctx.append_assistant_message(session_id, reply)
-    return {"reply": reply, "recipe": recipe}
+    return {"reply": reply, "recipe": recipe, "source": source}
+
+
+# Extra LLM rounds allowed when the local validator still finds violations
+_MAX_REPAIR_ATTEMPTS = 1
+
+
+def _repair_violations(
+    recipe: Dict[str, Any],
+    dislikes: List[str],
+    dietary: List[str],
+    skill_level: Optional[str],
+    history: List[Dict[str, str]],
+) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """Validate an LLM-produced recipe locally and re-prompt only on real violations.
+
+    Repairs are re-prompted with the full constraint set and validated again. Returns
+    (recipe, violations): if no repair passes, the original recipe comes back with its
+    violations so the caller can say so instead of presenting it as compliant.
+    """
+    violations = validate_recipe(recipe, dislikes, dietary)
+    candidate = recipe
+    for _ in range(_MAX_REPAIR_ATTEMPTS):
+        if not violations:
+            break
+        logger.info("Recipe still violates %s; re-prompting", violated_terms(violations))
+        candidate = normalize_recipe(modify_recipe(candidate, dislikes, None, dietary, skill_level, history))
+        violations = validate_recipe(candidate, dislikes, dietary)
+    if not violations:
+        return candidate, []
+    logger.info("Repair failed; still violates %s", violated_terms(violations))
+    return recipe, validate_recipe(recipe, dislikes, dietary)
+
+
+def _violation_note(violations: List[Dict[str, Any]]) -> str:
+    """Reply suffix for a recipe that could not be made to satisfy every constraint."""
+    if not violations:
+        return ""
+    return f" Note: I couldn't fully avoid {', '.join(violated_terms(violations))} in this recipe."
 
 
 # ===== Auth models & routes =====
@@ -159,6 +339,48 @@ class AuthResponse(BaseModel):
     profile: AuthProfile
 
 
+# Per-user pages are revalidated on every poll; corpus recipes may be cached briefly by anyone
+PRIVATE_CACHE_CONTROL = "private, no-cache"
+PUBLIC_CACHE_CONTROL = f"public, max-age={int(os.getenv('RECIPE_CACHE_SECONDS', '300'))}"
+
+
+def _etag(*parts: Any) -> str:
+    digest = hashlib.sha1("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def _not_modified(request: Request, etag: str) -> bool:
+    """True when If-None-Match already names etag (weak comparison)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    bare = etag[2:] if etag.startswith("W/") else etag
+    return any((t.strip()[2:] if t.strip().startswith("W/") else t.strip()) == bare for t in header.split(","))
+
+
+def _cache_headers(response: Response, etag: str, cache_control: str = PRIVATE_CACHE_CONTROL) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
+
+
+def _not_modified_response(etag: str, cache_control: str = PRIVATE_CACHE_CONTROL) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+
+
+# Seconds a client is asked to wait when the password hashing pool is full
+HASH_RETRY_AFTER = os.getenv("HASH_RETRY_AFTER", "1")
+
+
+def _hash_busy() -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="Too many sign-ins in progress, try again shortly",
+        headers={"Retry-After": HASH_RETRY_AFTER},
+    )
+
+
 def _profile_from_user(u: User) -> Dict[str, Any]:
     name = (u.email.split("@")[0] if u.email and "@" in u.email else u.email) or "User"
     return {"id": str(u.user_id), "email": u.email, "name": name}
@@ -176,7 +398,11 @@ async def signup(req: AuthRequest):
         exists = await db.execute(select(User).where(User.email == email))
         if exists.scalar_one_or_none() is not None:
             raise HTTPException(status_code=409, detail="Email already registered")
-        u = User(email=email, password_hash=hash_password(req.password))
+        try:
+            password_hash = await hash_password_async(req.password)
+        except HashPoolSaturated:
+            raise _hash_busy()
+        u = User(email=email, password_hash=password_hash)
         db.add(u)
         # create a default profile
         await db.flush()
@@ -200,8 +426,19 @@ async def login(req: AuthRequest):
     async with async_session() as db:
         res = await db.execute(select(User).where(User.email == email))
         u = res.scalar_one_or_none()
-        if u is None or not verify_password(req.password, u.password_hash):
+        try:
+            ok = u is not None and await verify_password_async(req.password, u.password_hash)
+        except HashPoolSaturated:
+            raise _hash_busy()
+        if not ok:
             raise HTTPException(status_code=401, detail="Invalid credentials")
+        if needs_rehash(u.password_hash):
+            # Move the stored hash to the current work factor while we have the plaintext
+            try:
+                u.password_hash = await hash_password_async(req.password)
+                await db.commit()
+            except HashPoolSaturated:
+                pass  # best effort; retried on the next login
         token = make_token(u.user_id)
         return {"token": token, "profile": _profile_from_user(u)}
 
@@ -224,18 +461,68 @@ def _require_user_id(request: Request):
     return uid
 
 
+# Profiles are read on every authenticated chat turn but change rarely. Entries are trusted for
+# PROFILE_CACHE_SECONDS, then revalidated against user_profiles.updated_at (the version stamp every
+# worker sees), so an edit handled by another worker shows up within one TTL. Edits made through this
+# worker drop the entry immediately.
+PROFILE_CACHE_SECONDS = float(os.getenv("PROFILE_CACHE_SECONDS", "30"))
+PROFILE_CACHE_SIZE = int(os.getenv("PROFILE_CACHE_SIZE", "10000"))
+# user_id -> (checked at (monotonic), updated_at stamp, profile)
+_PROFILE_CACHE: "OrderedDict[str, Tuple[float, Any, Dict[str, Any]]]" = OrderedDict()
+
+
+def _cache_profile(user_id, stamp, profile: Dict[str, Any]) -> None:
+    key = str(user_id)
+    _PROFILE_CACHE[key] = (time.monotonic(), stamp, profile)
+    _PROFILE_CACHE.move_to_end(key)
+    while len(_PROFILE_CACHE) > PROFILE_CACHE_SIZE:
+        _PROFILE_CACHE.popitem(last=False)
+
+
+async def _fetch_profile(db, user_id) -> Optional[Tuple[Any, Dict[str, Any]]]:
+    """User and preferences in one joined query as (updated_at, profile); None for an unknown user."""
+    res = await db.execute(
+        select(
+            User.user_id,
+            User.email,
+            UserProfile.allergies,
+            UserProfile.dietary_restrictions,
+            UserProfile.disliked_ingredients,
+            UserProfile.skill_level,
+            UserProfile.updated_at,
+        )
+        .outerjoin(UserProfile, UserProfile.user_id == User.user_id)
+        .where(User.user_id == user_id)
+    )
+    row = res.one_or_none()
+    if row is None:
+        return None
+    prof = _profile_from_user(row)
+    prof.update({
+        "allergies": row.allergies or [],
+        "dietary_restrictions": row.dietary_restrictions or [],
+        "disliked_ingredients": row.disliked_ingredients or [],
+        "skill_level": row.skill_level,
+    })
+    _cache_profile(user_id, row.updated_at, prof)
+    return row.updated_at, prof
+
+
 async def _load_profile(user_id) -> Dict[str, Any]:
+    entry = _PROFILE_CACHE.get(str(user_id))
+    if entry is not None and time.monotonic() - entry[0] < PROFILE_CACHE_SECONDS:
+        return entry[2]
     async with async_session() as db:
-        p_res = await db.execute(select(UserProfile).where(UserProfile.user_id == user_id))
-        p = p_res.scalar_one_or_none()
-        if not p:
-            return {"allergies": [], "dietary_restrictions": [], "disliked_ingredients": [], "skill_level": None}
-        return {
-            "allergies": p.allergies or [],
-            "dietary_restrictions": p.dietary_restrictions or [],
-            "disliked_ingredients": p.disliked_ingredients or [],
-            "skill_level": p.skill_level,
-        }
+        if entry is not None:
+            res = await db.execute(select(UserProfile.updated_at).where(UserProfile.user_id == user_id))
+            stamp = res.scalar_one_or_none()
+            if stamp is not None and stamp == entry[1]:
+                _cache_profile(user_id, stamp, entry[2])
+                return entry[2]
+        fetched = await _fetch_profile(db, user_id)
+    if fetched is None:
+        return {"allergies": [], "dietary_restrictions": [], "disliked_ingredients": [], "skill_level": None}
+    return fetched[1]
 
 
 class FullProfile(AuthProfile):
@@ -246,23 +533,19 @@ class FullProfile(AuthProfile):
 
 
 @app.get("/me/profile", response_model=FullProfile)
-async def get_my_profile(request: Request):
+async def get_my_profile(request: Request, response: Response):
     user_id = _require_user_id(request)
+    # Always read through to the database (one joined query), which also refreshes the cache
     async with async_session() as db:
-        u_res = await db.execute(select(User).where(User.user_id == user_id))
-        u = u_res.scalar_one_or_none()
-        if not u:
-            raise HTTPException(status_code=404, detail="User not found")
-        p_res = await db.execute(select(UserProfile).where(UserProfile.user_id == user_id))
-        p = p_res.scalar_one_or_none()
-        prof = _profile_from_user(u)
-        prof.update({
-            "allergies": p.allergies if p else [],
-            "dietary_restrictions": p.dietary_restrictions if p else [],
-            "disliked_ingredients": p.disliked_ingredients if p else [],
-            "skill_level": p.skill_level if p else None,
-        })
-        return prof
+        fetched = await _fetch_profile(db, user_id)
+    if fetched is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    stamp, prof = fetched
+    etag = _etag("profile", user_id, prof["email"], stamp)
+    if _not_modified(request, etag):
+        return _not_modified_response(etag)
+    _cache_headers(response, etag)
+    return prof
 
 
 @app.post("/me/profile")
@@ -280,7 +563,8 @@ async def upsert_my_profile(payload: ProfilePayload, request: Request):
         prof.disliked_ingredients = [d.strip() for d in (payload.disliked_ingredients or []) if d and d.strip()]
         prof.skill_level = (payload.skill_level.strip() if payload.skill_level else None)
         await db.commit()
-        return {"ok": True}
+    _PROFILE_CACHE.pop(str(user_id), None)
+    return {"ok": True}
 
 
 # ===== Saved recipes (per user) =====
@@ -293,38 +577,311 @@ class SavedRecipePayload(BaseModel):
     serving_size: Optional[str] = None
 
 
+class SavedRecipeSummary(BaseModel):
+    id: int
+    name: str
+    savedAt: Optional[str] = None
+    calories: Optional[str] = None
+    ingredient_count: Optional[int] = None
+
+
+class SavedRecipePage(BaseModel):
+    items: List[SavedRecipeSummary]
+    next_cursor: Optional[str] = None
+
+
+SAVED_PAGE_MAX = 200
+
+
+def _encode_cursor(saved_at, recipe_id: int) -> str:
+    raw = f"{saved_at.isoformat() if saved_at else ''}|{recipe_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        saved_at, recipe_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(saved_at), int(recipe_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _saved_page_query(user_id, columns, cursor: Optional[str], limit: Optional[int], *conditions):
+    """Newest-first saved recipes after cursor; keyset on (saved_at, recipe_id), one extra row to detect more."""
+    query = select(*columns, SavedRecipe.saved_at, SavedRecipe.recipe_id).where(SavedRecipe.user_id == user_id, *conditions)
+    if cursor:
+        saved_at, recipe_id = _decode_cursor(cursor)
+        after = tuple_(literal(saved_at, SavedRecipe.saved_at.type), literal(recipe_id, Integer))
+        query = query.where(tuple_(SavedRecipe.saved_at, SavedRecipe.recipe_id) < after)
+    query = query.order_by(SavedRecipe.saved_at.desc(), SavedRecipe.recipe_id.desc())
+    return query.limit(limit + 1) if limit else query
+
+
+def _page(rows: List[Any], limit: Optional[int]) -> Tuple[List[Any], Optional[str]]:
+    if not limit or len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, _encode_cursor(rows[-1].saved_at, rows[-1].recipe_id)
+
+
+# Recipe bodies are immutable per hash, so cached copies never go stale and are shared across users
+RECIPE_BODY_CACHE_SIZE = int(os.getenv("RECIPE_BODY_CACHE_SIZE", "4096"))
+_BODY_CACHE: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+
+async def _load_bodies(db, hashes: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """Recipe bodies by hash, from the process cache or one query for the misses."""
+    found: Dict[str, Dict[str, Any]] = {}
+    missing = set()
+    for h in hashes:
+        body = _BODY_CACHE.get(h)
+        if body is None:
+            missing.add(h)
+        else:
+            _BODY_CACHE.move_to_end(h)
+            found[h] = body
+    if missing:
+        res = await db.execute(
+            select(RecipeBody.body_hash, RecipeBody.recipe_data).where(RecipeBody.body_hash.in_(missing))
+        )
+        for h, body in res.all():
+            found[h] = _BODY_CACHE[h] = body
+        while len(_BODY_CACHE) > RECIPE_BODY_CACHE_SIZE:
+            _BODY_CACHE.popitem(last=False)
+    return found
+
+
+async def _gc_recipe_bodies(db, hashes: Iterable[Optional[str]]) -> None:
+    """Delete bodies no saved recipe references any more (within the caller's transaction)."""
+    hashes = {h for h in hashes if h}
+    if not hashes:
+        return
+    try:
+        async with db.begin_nested():
+            await db.execute(
+                delete(RecipeBody).where(
+                    RecipeBody.body_hash.in_(hashes),
+                    ~exists().where(SavedRecipe.body_hash == RecipeBody.body_hash),
+                )
+            )
+    except IntegrityError:
+        # a concurrent save started referencing one of them; it stays
+        pass
+
+
+async def _saved_etag(db, user_id, *extra: Any) -> str:
+    stamp = await db.execute(
+        select(func.count(), func.max(SavedRecipe.updated_at)).where(SavedRecipe.user_id == user_id)
+    )
+    count, last_update = stamp.one()
+    return _etag("saved", user_id, count, last_update, *extra)
+
+
 @app.get("/me/saved")
-async def list_my_saved(request: Request):
+async def list_my_saved(
+    request: Request,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=SAVED_PAGE_MAX),
+    cursor: Optional[str] = None,
+):
+    """Full saved recipes, newest first. With limit, pages through them; the next cursor is in X-Next-Cursor."""
     user_id = _require_user_id(request)
     async with async_session() as db:
-        res = await db.execute(select(SavedRecipe).where(SavedRecipe.user_id == user_id).order_by(SavedRecipe.saved_at.desc()))
-        rows = res.scalars().all()
-        out = []
-        for r in rows:
-            data = r.recipe_data or {}
-            data["savedAt"] = (r.saved_at.isoformat() if r.saved_at else None)
-            out.append(data)
-        return out
+        etag = await _saved_etag(db, user_id, limit, cursor)
+        if _not_modified(request, etag):
+            return _not_modified_response(etag)
+        _cache_headers(response, etag)
+        res = await db.execute(_saved_page_query(user_id, [SavedRecipe.body_hash], cursor, limit))
+        rows, next_cursor = _page(res.all(), limit)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        bodies = await _load_bodies(db, {r.body_hash for r in rows})
+        return [
+            dict(bodies.get(r.body_hash) or {}, savedAt=(r.saved_at.isoformat() if r.saved_at else None))
+            for r in rows
+        ]
+
+
+async def _saved_summary_page(db, user_id, cursor: Optional[str], limit: int, *conditions) -> Dict[str, Any]:
+    columns = [SavedRecipe.recipe_title, SavedRecipe.calories, SavedRecipe.ingredient_count]
+    res = await db.execute(_saved_page_query(user_id, columns, cursor, limit, *conditions))
+    rows, next_cursor = _page(res.all(), limit)
+    return {
+        "items": [
+            {
+                "id": r.recipe_id,
+                "name": r.recipe_title,
+                "savedAt": r.saved_at.isoformat() if r.saved_at else None,
+                "calories": r.calories,
+                "ingredient_count": r.ingredient_count,
+            }
+            for r in rows
+        ],
+        "next_cursor": next_cursor,
+    }
 
 
-@app.post("/me/saved")
-async def save_my_recipe(payload: SavedRecipePayload, request: Request):
+@app.get("/me/saved/summaries", response_model=SavedRecipePage)
+async def list_my_saved_summaries(
+    request: Request,
+    response: Response,
+    limit: int = Query(50, ge=1, le=SAVED_PAGE_MAX),
+    cursor: Optional[str] = None,
+):
+    """One page of saved-recipe summaries (no recipe bodies); fetch a body with GET /me/saved/{id}."""
+    user_id = _require_user_id(request)
+    async with async_session() as db:
+        etag = await _saved_etag(db, user_id, "summaries", limit, cursor)
+        if _not_modified(request, etag):
+            return _not_modified_response(etag)
+        _cache_headers(response, etag)
+        return await _saved_summary_page(db, user_id, cursor, limit)
+
+
+@app.get("/me/saved/search", response_model=SavedRecipePage)
+async def search_my_saved(
+    request: Request,
+    response: Response,
+    ingredient: List[str] = Query(..., min_length=1),
+    limit: int = Query(50, ge=1, le=SAVED_PAGE_MAX),
+    cursor: Optional[str] = None,
+):
+    """Saved recipes using every given ingredient (matched by canonical name, so aliases/plurals work)."""
+    user_id = _require_user_id(request)
+    wanted = sorted({resolve_ingredient(i)[0] for i in ingredient if i and i.strip()})
+    if not wanted:
+        raise HTTPException(status_code=400, detail="ingredient is required")
+    async with async_session() as db:
+        etag = await _saved_etag(db, user_id, "search", wanted, limit, cursor)
+        if _not_modified(request, etag):
+            return _not_modified_response(etag)
+        _cache_headers(response, etag)
+        # array containment (@>) is answered from the GIN index on canonical_ingredients
+        return await _saved_summary_page(
+            db, user_id, cursor, limit, SavedRecipe.canonical_ingredients.op("@>")(literal(wanted, ARRAY(Text)))
+        )
+
+
+@app.get("/me/saved/{recipe_id}")
+async def get_my_saved(recipe_id: int, request: Request, response: Response):
     user_id = _require_user_id(request)
     async with async_session() as db:
-        # Upsert by (user_id, recipe_title)
         res = await db.execute(
-            select(SavedRecipe).where(
-                SavedRecipe.user_id == user_id,
-                SavedRecipe.recipe_title == payload.name,
+            select(SavedRecipe.body_hash, SavedRecipe.saved_at).where(
+                SavedRecipe.user_id == user_id, SavedRecipe.recipe_id == recipe_id
             )
         )
-        existing = res.scalar_one_or_none()
-        if existing:
-            existing.recipe_data = payload.model_dump()
-        else:
-            db.add(SavedRecipe(user_id=user_id, recipe_title=payload.name, recipe_data=payload.model_dump()))
-        await db.commit()
-        return {"ok": True}
+        row = res.one_or_none()
+        if row is None:
+            raise HTTPException(status_code=404, detail="Not found")
+        # the body hash is the version: a re-save with new content changes it
+        etag = _etag("saved-recipe", recipe_id, row.body_hash)
+        if _not_modified(request, etag):
+            return _not_modified_response(etag)
+        _cache_headers(response, etag)
+        bodies = await _load_bodies(db, [row.body_hash])
+        body = bodies.get(row.body_hash) or {}
+        return dict(body, id=recipe_id, savedAt=(row.saved_at.isoformat() if row.saved_at else None))
+
+
+def _saved_summary_columns(data: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "calories": (data.get("nutrition") or {}).get("calories"),
+        "ingredient_count": len(data.get("ingredients") or []),
+        "canonical_ingredients": canonical_ingredients(data),
+    }
+
+
+_BACKFILL_BATCH = 500
+
+
+async def _backfill_canonical_ingredients() -> int:
+    """Fill canonical_ingredients of rows saved before the column existed; returns the rows filled.
+
+    The names depend on the ingredient resolver, so this runs in the app rather than
+    in the migration. Each batch is claimed with FOR UPDATE SKIP LOCKED (workers
+    starting together split the work) and written back with one executemany.
+    """
+    filled = 0
+    while True:
+        async with async_session() as db, db.begin():
+            rows = (
+                await db.execute(
+                    select(SavedRecipe.recipe_id, SavedRecipe.body_hash)
+                    .where(SavedRecipe.canonical_ingredients.is_(None))
+                    .order_by(SavedRecipe.recipe_id)
+                    .limit(_BACKFILL_BATCH)
+                    .with_for_update(skip_locked=True)
+                )
+            ).all()
+            if not rows:
+                return filled
+            bodies = await _load_bodies(db, {row.body_hash for row in rows})
+            params = await run_in_threadpool(
+                lambda: [
+                    {"rid": row.recipe_id, "names": canonical_ingredients(bodies.get(row.body_hash) or {})}
+                    for row in rows
+                ]
+            )
+            conn = await db.connection()
+            await conn.execute(
+                update(SavedRecipe)
+                .where(SavedRecipe.recipe_id == bindparam("rid"))
+                .values(canonical_ingredients=bindparam("names")),
+                params,
+            )
+        filled += len(rows)
+
+
+async def _run_saved_backfill() -> None:
+    try:
+        filled = await _backfill_canonical_ingredients()
+    except Exception as exc:  # pragma: no cover - retried on the next startup
+        logger.warning("Saved recipe backfill failed: %s", exc)
+        return
+    if filled:
+        logger.info("Backfilled canonical ingredients of %d saved recipes", filled)
+
+
+@app.post("/me/saved")
+async def save_my_recipe(payload: SavedRecipePayload, request: Request):
+    user_id = _require_user_id(request)
+    data = payload.model_dump()
+    body_hash = recipe_hash(data)
+    values = dict(
+        _saved_summary_columns(data), body_hash=body_hash, allergen_mask=recipe_mask(data), mask_version=mask_version()
+    )
+    # One statement: store the body if this content is new, then upsert by (user_id, recipe_title).
+    # RETURNING's subquery reads the pre-statement snapshot, i.e. the body this row pointed at before.
+    body = pg_insert(RecipeBody).values(body_hash=body_hash, recipe_data=data).on_conflict_do_nothing().cte("body")
+    previous = (
+        select(SavedRecipe.body_hash)
+        .where(SavedRecipe.user_id == user_id, SavedRecipe.recipe_title == payload.name)
+        .scalar_subquery()
+    )
+    stmt = pg_insert(SavedRecipe).values(user_id=user_id, recipe_title=payload.name, **values)
+    stmt = (
+        stmt.on_conflict_do_update(
+            index_elements=[SavedRecipe.user_id, SavedRecipe.recipe_title],
+            set_=dict({k: stmt.excluded[k] for k in values}, updated_at=func.now()),
+        )
+        .add_cte(body)
+        .returning(previous)
+    )
+    for attempt in range(2):
+        try:
+            async with async_session() as db:
+                old_hash = (await db.execute(stmt)).scalar_one()
+                if old_hash != body_hash:
+                    await _gc_recipe_bodies(db, [old_hash])
+                await db.commit()
+            break
+        except IntegrityError:
+            # the existing body was garbage-collected between our insert and the reference; retry once
+            if attempt:
+                raise
+    return {"ok": True}
 
 
 @app.delete("/me/saved")
@@ -332,19 +889,68 @@ async def delete_my_saved(name: str, request: Request):
     user_id = _require_user_id(request)
     async with async_session() as db:
         res = await db.execute(
-            select(SavedRecipe).where(
-                SavedRecipe.user_id == user_id,
-                SavedRecipe.recipe_title == name,
-            )
+            delete(SavedRecipe)
+            .where(SavedRecipe.user_id == user_id, SavedRecipe.recipe_title == name)
+            .returning(SavedRecipe.body_hash)
         )
-        existing = res.scalar_one_or_none()
-        if not existing:
+        removed = res.scalars().all()
+        if not removed:
             raise HTTPException(status_code=404, detail="Not found")
-        await db.delete(existing)
+        await _gc_recipe_bodies(db, removed)
         await db.commit()
         return {"ok": True}
 
 
+async def _load_saved_candidates(user_id, name: str, mask: int = 0) -> List[Tuple[Dict[str, Any], Optional[int]]]:
+    """Return (recipe, allergen_mask) for the user's saved recipes titled name (case-insensitive).
+
+    Rows whose mask is current (computed under this mask_version) and intersects
+    `mask` are filtered out in SQL. Stale or missing masks are recomputed from the
+    body, written back, and returned for the caller to check.
+    """
+    version = mask_version()
+    async with async_session() as db:
+        res = await db.execute(
+            select(SavedRecipe.recipe_id, SavedRecipe.body_hash, SavedRecipe.allergen_mask, SavedRecipe.mask_version)
+            .where(
+                SavedRecipe.user_id == user_id,
+                func.lower(SavedRecipe.recipe_title) == name.strip().lower(),
+                or_(
+                    SavedRecipe.allergen_mask.is_(None),
+                    SavedRecipe.mask_version.is_distinct_from(version),
+                    SavedRecipe.allergen_mask.op("&")(mask) == 0,
+                ),
+            )
+            .order_by(SavedRecipe.saved_at.desc())
+        )
+        rows = res.all()
+        bodies = await _load_bodies(db, {row.body_hash for row in rows})
+        candidates: List[Tuple[Dict[str, Any], Optional[int]]] = []
+        refreshed: List[Dict[str, Any]] = []
+        for row in rows:
+            body = bodies.get(row.body_hash)
+            if not body:
+                continue
+            recipe = normalize_recipe(body)
+            recipe_bits = row.allergen_mask
+            if recipe_bits is None or row.mask_version != version:
+                recipe_bits = recipe_mask(recipe)
+                refreshed.append({"rid": row.recipe_id, "mask": recipe_bits})
+            candidates.append((recipe, recipe_bits))
+        if refreshed:
+            # one executemany on the connection (the ORM session would try to sync loaded objects);
+            # updated_at is kept so the refresh does not change the recipe's ETag
+            conn = await db.connection()
+            await conn.execute(
+                update(SavedRecipe)
+                .where(SavedRecipe.recipe_id == bindparam("rid"))
+                .values(allergen_mask=bindparam("mask"), mask_version=version, updated_at=SavedRecipe.updated_at),
+                refreshed,
+            )
+            await db.commit()
+        return candidates
+
+
 # Load a saved recipe into a chat session so user can continue chatting
 class LoadChatRequest(BaseModel):
     session_id: str
@@ -374,20 +980,72 @@ async def chat_load(req: LoadChatRequest, request: Request):
     return {"ok": True, "recipe": data}
 
 
+@app.get("/recipes", response_model=List[Recipe])
+async def browse_recipes(
+    request: Request,
+    response: Response,
+    diet: Optional[List[str]] = Query(None),
+    avoid: Optional[List[str]] = Query(None),
+):
+    """List local recipes compatible with dietary restrictions (diet) and allergies/dislikes (avoid)."""
+    # masks depend on the ingredient DB as well as the corpus
+    etag = _etag("recipes", rr.corpus_version(), current_snapshot().mtime, sorted(diet or []), sorted(avoid or []))
+    if _not_modified(request, etag):
+        return _not_modified_response(etag, PUBLIC_CACHE_CONTROL)
+    _cache_headers(response, etag, PUBLIC_CACHE_CONTROL)
+    return rr.browse_recipes(avoid or [], diet or [])
+
+
 @app.get("/recipes/{name}", response_model=Recipe)
-async def get_recipe(name: str):
+async def get_recipe(name: str, request: Request, response: Response):
     """Fetch a recipe by name from local data."""
+    etag = _etag("recipe", rr.corpus_version(), name.strip().lower())
+    if _not_modified(request, etag):
+        return _not_modified_response(etag, PUBLIC_CACHE_CONTROL)
     recipe = rr.get_recipe_by_name(name)
     if not recipe:
         raise HTTPException(status_code=404, detail="Recipe not found")
+    _cache_headers(response, etag, PUBLIC_CACHE_CONTROL)
     return recipe
 
 
 @app.post("/substitute", response_model=SubstituteResponse)
 async def substitute(req: SubstituteRequest):
     """Suggest substitutes for a given ingredient."""
-    subs = se.suggest_substitutes(req.ingredient)
-    return {"substitutes": subs}
+    dislikes = req.dislikes or []
+    subs = se.suggest_substitutes_many([req.ingredient], compile_constraints(dislikes).mask)
+    return {"substitutes": allowed_names(next(iter(subs.values()), []), dislikes)}
+
+
+@app.post("/substitute/batch", response_model=SubstituteBatchResponse)
+async def substitute_batch(req: SubstituteBatchRequest):
+    """Suggest substitutes for many ingredients in one request.
+
+    Known ingredients are answered locally; all unknown ones share a single LLM call.
+    With stream=true the response is NDJSON: a first line with local answers and the
+    pending ingredients, then a line with the LLM answers.
+    """
+    dislikes = list(req.dislikes or [])
+    if req.session_id:
+        dislikes += sorted(ctx.get_dislikes(req.session_id))
+    keys = {ing: " ".join(ing.lower().split()) for ing in req.ingredients if ing and ing.strip()}
+    local, misses = se.lookup_substitutes_many(keys.values(), compile_constraints(dislikes).mask)
+
+    def by_input(found: Dict[str, List[str]]) -> Dict[str, List[str]]:
+        return {ing: allowed_names(found[key], dislikes) for ing, key in keys.items() if key in found}
+
+    pending = [ing for ing, key in keys.items() if key in misses]
+    if not req.stream:
+        local.update(await run_in_threadpool(se.fill_substitutes, misses))
+        return {"substitutes": by_input(local), "pending": []}
+
+    async def lines():
+        yield json.dumps({"substitutes": by_input(local), "pending": pending}) + "\n"
+        if misses:
+            remote = await run_in_threadpool(se.fill_substitutes, misses)
+            yield json.dumps({"substitutes": by_input(remote), "pending": []}) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
 
 
 @app.post("/nutrition/preview", response_model=NutritionPreviewResponse)
@@ -399,6 +1057,51 @@ async def nutrition_preview(req: NutritionPreviewRequest):
     }
 
 
+@app.post("/nutrition/batch", response_model=NutritionBatchResponse)
+async def nutrition_batch(req: NutritionBatchRequest):
+    recipes = [r.model_dump() for r in req.recipes]
+    computed = await run_in_threadpool(compute_batch_nutrition, recipes)
+    return {
+        "results": [
+            {"name": r.get("name") or "", "nutrition": nutrition, "unknown_items": unknown or None}
+            for r, (nutrition, unknown) in zip(recipes, computed)
+        ]
+    }
+
+
+def _require_admin(request: Request) -> None:
+    expected = os.getenv("ADMIN_TOKEN")
+    if not expected:
+        raise HTTPException(status_code=404, detail="Not found")
+    token = request.headers.get("x-admin-token") or ""
+    if not hmac.compare_digest(token.encode(), expected.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+@app.post("/admin/ingredients/reload", response_model=IngredientReloadResponse)
+async def reload_ingredients(request: Request):
+    """Rebuild the ingredient DB snapshot from its source (data/ingredients.json by default) and swap it in."""
+    _require_admin(request)
+    reloaded = await run_in_threadpool(reload_ingredient_db, True)
+    snap = current_snapshot()
+    return {"reloaded": reloaded, "version": snap.version, "names": len(snap.entries)}
+
+
+@app.get("/ready", response_model=ReadinessResponse)
+async def ready():
+    """Readiness probe: 503 until the data is loaded and the caches are warm."""
+    bundle = current_bundle()
+    body = {
+        "ready": _WARMUP["ready"],
+        "warmup_seconds": _WARMUP["seconds"],
+        "ingredient_db_version": current_snapshot().version,
+        "bundle_version": bundle.version if bundle is not None else None,
+    }
+    if not _WARMUP["ready"]:
+        raise HTTPException(status_code=503, detail=body)
+    return body
+
+
 @app.post("/grocery", response_model=GroceryResponse)
 async def grocery(req: GroceryRequest):
     data = aggregate_grocery([r.model_dump() for r in req.recipes], pantry=req.pantry)
@@ -409,79 +1112,191 @@ def _default_grocery_data() -> Dict[str, Any]:
     return {"recipes": [], "overrides": {}}
 
 
-async def _load_grocery_data(user_id):
-    async with async_session() as db:
-        res = await db.execute(select(GroceryList).where(GroceryList.user_id == user_id))
-        row = res.scalar_one_or_none()
-        if not row or not row.list_data:
-            return _default_grocery_data()
-        return row.list_data
+def _grocery_data(list_data: Any, aggregate: Any) -> Dict[str, Any]:
+    data = dict(list_data) if list_data else _default_grocery_data()
+    if aggregate is not None:
+        data["aggregate"] = aggregate
+    return data
 
 
-async def _save_grocery_data(user_id, data: Dict[str, Any]):
-    async with async_session() as db:
-        res = await db.execute(select(GroceryList).where(GroceryList.user_id == user_id))
-        row = res.scalar_one_or_none()
-        if row:
-            row.list_data = data
-        else:
-            db.add(GroceryList(user_id=user_id, list_data=data))
-        await db.commit()
+def _json_path(*parts: Any):
+    return literal([str(p) for p in parts], ARRAY(Text))
+
+
+def _jsonb_set(target, path, value):
+    return func.jsonb_set(target, path, literal(value, JSONB), True, type_=JSONB)
+
+
+def _jsonb_delete(target, path):
+    return target.op("#-", return_type=JSONB)(path)
+
+
+def _grocery_patch_values(patch: GroceryPatch, stored: Any, updated: Dict[str, Any]) -> Dict[str, Any]:
+    """UPDATE values applying patch to the stored documents with jsonb_set-style edits."""
+    values: Dict[str, Any] = {"version": GroceryList.version + 1, "updated_at": func.now()}
+    if not (isinstance(stored, dict) and "recipes" in stored and "overrides" in stored):
+        # legacy/empty document: nothing to patch against
+        values["list_data"] = {k: v for k, v in updated.items() if k != "aggregate"}
+    elif patch.recipe_ops or patch.overrides:
+        doc = GroceryList.list_data
+        for op, arg in patch.recipe_ops:
+            if op == "remove":
+                doc = _jsonb_delete(doc, _json_path("recipes", arg))
+            elif op == "append":
+                doc = func.jsonb_insert(doc, _json_path("recipes", -1), literal(arg, JSONB), True, type_=JSONB)
+            else:
+                doc = _jsonb_set(doc, _json_path("recipes"), arg)
+        for key, override in patch.overrides.items():
+            path = _json_path("overrides", key)
+            doc = _jsonb_set(doc, path, override) if override is not None else _jsonb_delete(doc, path)
+        values["list_data"] = doc
+    if patch.rebuilt:
+        values["aggregate"] = updated.get("aggregate")
+    elif patch.items:
+        agg = GroceryList.aggregate
+        for key, item in patch.items.items():
+            path = _json_path("items", key)
+            agg = _jsonb_set(agg, path, item) if item is not None else _jsonb_delete(agg, path)
+        values["aggregate"] = agg
+    return values
+
+
+async def _mutate_grocery(
+    user_id,
+    mutate: Callable[[Dict[str, Any], GroceryPatch], Dict[str, Any]],
+) -> Tuple[Dict[str, Any], int]:
+    """Run one grocery mutation in a single transaction with the user's row locked.
+
+    Concurrent edits from other tabs/devices serialize on the row lock instead of
+    overwriting each other, and only the changed recipes/overrides/aggregate keys
+    are written back. Returns (updated data, new list version).
+    """
+    async with async_session() as db, db.begin():
+        query = (
+            select(GroceryList.list_data, GroceryList.aggregate, GroceryList.version)
+            .where(GroceryList.user_id == user_id)
+            .with_for_update()
+        )
+        row = (await db.execute(query)).one_or_none()
+        if row is None:
+            await db.execute(
+                pg_insert(GroceryList)
+                .values(user_id=user_id, list_data=_default_grocery_data())
+                .on_conflict_do_nothing(index_elements=[GroceryList.user_id])
+            )
+            row = (await db.execute(query)).one()
+        patch = GroceryPatch()
+        updated = mutate(_grocery_data(row.list_data, row.aggregate), patch)
+        version = row.version
+        if patch:
+            res = await db.execute(
+                update(GroceryList)
+                .where(GroceryList.user_id == user_id)
+                .values(**_grocery_patch_values(patch, row.list_data, updated))
+                .returning(GroceryList.version)
+            )
+            version = res.scalar_one()
+    return updated, version
 
 
-@app.get("/me/grocery", response_model=GroceryFullResponse)
-async def get_my_grocery(request: Request):
-    user_id = _require_user_id(request)
-    data = await _load_grocery_data(user_id)
-    aggregated = aggregate_grocery(data.get("recipes", []), overrides=data.get("overrides", {}))
+def _grocery_etag(user_id, version: Optional[int]) -> str:
+    # the aggregate is re-rendered against the current ingredient DB, so it is part of the version
+    return _etag("grocery", user_id, version, current_snapshot().mtime)
+
+
+def _grocery_response(data: Dict[str, Any]) -> Dict[str, Any]:
+    aggregated = grocery_view(data)
     aggregated["recipes"] = [r.get("name") for r in data.get("recipes", [])]
     return {"recipes": data.get("recipes", []), "aggregated": aggregated}
 
 
+@app.get("/me/grocery", response_model=GroceryFullResponse)
+async def get_my_grocery(request: Request, response: Response):
+    user_id = _require_user_id(request)
+    async with async_session() as db:
+        # the version alone answers a matching If-None-Match; the JSONB is only read on a miss
+        res = await db.execute(select(GroceryList.version).where(GroceryList.user_id == user_id))
+        version = res.scalar_one_or_none()
+        etag = _grocery_etag(user_id, version)
+        if _not_modified(request, etag):
+            return _not_modified_response(etag)
+        data = _default_grocery_data()
+        if version is not None:
+            res = await db.execute(
+                select(GroceryList.list_data, GroceryList.aggregate, GroceryList.version)
+                .where(GroceryList.user_id == user_id)
+            )
+            row = res.one_or_none()
+            if row is not None:
+                data = _grocery_data(row.list_data, row.aggregate)
+                version = row.version
+                etag = _grocery_etag(user_id, version)
+        # lists saved before the aggregate was materialized (or against another ingredient DB) are rebuilt once;
+        # the write only lands if no mutation committed since the read, otherwise the next GET rebuilds again
+        if data.get("recipes") and ensure_aggregate(data):
+            res = await db.execute(
+                update(GroceryList)
+                .where(GroceryList.user_id == user_id, GroceryList.version == version)
+                .values(aggregate=data["aggregate"], version=GroceryList.version + 1, updated_at=func.now())
+                .returning(GroceryList.version)
+            )
+            backfilled = res.scalar_one_or_none()
+            await db.commit()
+            if backfilled is not None:
+                etag = _grocery_etag(user_id, backfilled)
+    _cache_headers(response, etag)
+    return _grocery_response(data)
+
+
 @app.post("/me/grocery/recipe", response_model=GroceryFullResponse)
-async def upsert_grocery_recipe(req: GroceryRecipePayload, request: Request):
+async def upsert_grocery_recipe(req: GroceryRecipePayload, request: Request, response: Response):
     user_id = _require_user_id(request)
-    current = await _load_grocery_data(user_id)
-    updated = merge_recipe(current, req.model_dump())
-    await _save_grocery_data(user_id, updated)
-    aggregated = aggregate_grocery(updated.get("recipes", []), overrides=updated.get("overrides", {}))
-    aggregated["recipes"] = [r.get("name") for r in updated.get("recipes", [])]
-    return {"recipes": updated.get("recipes", []), "aggregated": aggregated}
+    recipe = req.model_dump()
+    updated, version = await _mutate_grocery(user_id, lambda data, patch: merge_recipe(data, recipe, patch))
+    _cache_headers(response, _grocery_etag(user_id, version))
+    return _grocery_response(updated)
 
 
 @app.delete("/me/grocery/recipe")
-async def delete_grocery_recipe(name: str, request: Request):
+async def delete_grocery_recipe(name: str, request: Request, response: Response):
     user_id = _require_user_id(request)
-    current = await _load_grocery_data(user_id)
-    updated = remove_recipe(current, name)
-    await _save_grocery_data(user_id, updated)
-    aggregated = aggregate_grocery(updated.get("recipes", []), overrides=updated.get("overrides", {}))
-    aggregated["recipes"] = [r.get("name") for r in updated.get("recipes", [])]
-    return {"recipes": updated.get("recipes", []), "aggregated": aggregated}
+    updated, version = await _mutate_grocery(user_id, lambda data, patch: remove_recipe(data, name, patch))
+    _cache_headers(response, _grocery_etag(user_id, version))
+    return _grocery_response(updated)
 
 
 @app.patch("/me/grocery/item", response_model=GroceryFullResponse)
-async def override_grocery_item(payload: GroceryItemOverride, request: Request):
+async def override_grocery_item(payload: GroceryItemOverride, request: Request, response: Response):
     user_id = _require_user_id(request)
-    current = await _load_grocery_data(user_id)
     from .utils.grocery import _maybe_strip  # reuse normalization helper
     key = _maybe_strip(payload.key).lower()
-    updated = apply_override(current, key, payload.model_dump(exclude_none=True))
-    await _save_grocery_data(user_id, updated)
-    aggregated = aggregate_grocery(updated.get("recipes", []), overrides=updated.get("overrides", {}))
-    aggregated["recipes"] = [r.get("name") for r in updated.get("recipes", [])]
-    return {"recipes": updated.get("recipes", []), "aggregated": aggregated}
+    override = payload.model_dump(exclude_none=True)
+    updated, version = await _mutate_grocery(user_id, lambda data, patch: apply_override(data, key, override, patch))
+    _cache_headers(response, _grocery_etag(user_id, version))
+    return _grocery_response(updated)
+
+
+@app.post("/me/grocery/bulk", response_model=GroceryFullResponse)
+async def bulk_grocery(req: GroceryBulkRequest, request: Request, response: Response):
+    """Apply many recipe upserts/removals and item overrides with one transaction and one response."""
+    user_id = _require_user_id(request)
+    from .utils.grocery import _maybe_strip  # reuse normalization helper
+    upserts = [r.model_dump() for r in req.upserts]
+    overrides = [(_maybe_strip(o.key).lower(), o.model_dump(exclude_none=True)) for o in req.overrides]
+    updated, version = await _mutate_grocery(
+        user_id,
+        lambda data, patch: apply_bulk(data, upserts, req.removals, overrides, patch),
+    )
+    _cache_headers(response, _grocery_etag(user_id, version))
+    return _grocery_response(updated)
 
 
 @app.delete("/me/grocery")
 async def delete_my_grocery(request: Request):
     user_id = _require_user_id(request)
     async with async_session() as db:
-        res = await db.execute(select(GroceryList).where(GroceryList.user_id == user_id))
-        row = res.scalar_one_or_none()
-        if row:
-            await db.delete(row)
-            await db.commit()
+        await db.execute(delete(GroceryList).where(GroceryList.user_id == user_id))
+        await db.commit()
     return {"ok": True}
 
 
@@ -506,6 +1321,7 @@ async def ask(req: AskRequest, request: Request):
     # Enrich session with user's saved preferences, if authenticated
     dietary: list[str] = []
     skill_level: Optional[str] = None
+    uid = None
     auth = request.headers.get("authorization") or request.headers.get("Authorization")
     if auth and auth.lower().startswith("bearer "):
         uid = verify_token(auth.split(" ", 1)[1])
@@ -539,16 +1355,24 @@ async def ask(req: AskRequest, request: Request):
             src = r.get("src")
             if src:
                 dislikes.add(src)
-        updated = normalize_recipe(
-            modify_recipe(
-                current,
-                list(dislikes),
-                [(r["src"], r["dst"]) for r in replacements if r.get("src") and r.get("dst")],
-                dietary,
-                skill_level,
-                history,
+        pairs = [(r["src"], r["dst"]) for r in replacements if r.get("src") and r.get("dst")]
+        # Plain swaps are rewritten locally; structural ones (egg in baking) go to the LLM
+        updated = se.local_replace(current, pairs) if pairs else None
+        if updated is not None and validate_recipe(updated, list(dislikes), dietary):
+            updated = None
+        violations: List[Dict[str, Any]] = []
+        if updated is None:
+            updated = normalize_recipe(
+                modify_recipe(
+                    current,
+                    list(dislikes),
+                    pairs,
+                    dietary,
+                    skill_level,
+                    history,
+                )
             )
-        )
+            updated, violations = _repair_violations(updated, list(dislikes), dietary, skill_level, history)
         updated = annotate_recipe_nutrition(updated)
         ctx.set_current_recipe(session_id, updated)
         if replacements:
@@ -556,7 +1380,7 @@ async def ask(req: AskRequest, request: Request):
             reply = f"Updated the recipe: replaced '{first['src']}' with '{first['dst']}'."
         else:
             reply = "Updated the recipe with requested substitutions."
-        return _respond(session_id, reply, updated)
+        return _respond(session_id, reply + _violation_note(violations), updated)
 
     if intent == "add_dislike":
         dislikes_in = parsed.get("dislikes", [])
@@ -565,30 +1389,50 @@ async def ask(req: AskRequest, request: Request):
                 ctx.add_dislike(session_id, d)
             current = ctx.get_current_recipe(session_id)
             if current:
+                dislikes = list(ctx.get_dislikes(session_id))
+                # Skip the LLM entirely when the current recipe already satisfies the constraints
+                if not validate_recipe(current, dislikes, dietary):
+                    reply = f"Noted. This recipe doesn't use {', '.join(dislikes_in)}, so no changes were needed."
+                    return _respond(session_id, reply, None)
                 regenerated = normalize_recipe(
-                    modify_recipe(current, list(ctx.get_dislikes(session_id)), None, dietary, skill_level, history)
+                    modify_recipe(current, dislikes, None, dietary, skill_level, history)
                 )
+                regenerated, violations = _repair_violations(regenerated, dislikes, dietary, skill_level, history)
                 regenerated = annotate_recipe_nutrition(regenerated)
                 ctx.set_current_recipe(session_id, regenerated)
-                reply = "Regenerated the recipe based on your dislikes."
+                reply = "Regenerated the recipe based on your dislikes." + _violation_note(violations)
                 return _respond(session_id, reply, regenerated)
         return _respond(session_id, "Got it. I'll keep that in mind for substitutions.", None)
 
     if intent == "get_recipe" and parsed.get("recipe_name"):
         rn = parsed.get("recipe_name")
-        generated = normalize_recipe(
-            generate_recipe(
-                rn,
-                list(ctx.get_dislikes(session_id)),
-                dietary,
-                skill_level,
-                history,
+        dislikes = list(ctx.get_dislikes(session_id))
+        # Retrieval first: saved recipes, local corpus, generation cache; LLM last
+        mask = compile_constraints(dislikes, dietary).mask
+        saved = await _load_saved_candidates(uid, rn, mask) if uid else []
+        found, source = rr.resolve_local_recipe(rn, dislikes, dietary, skill_level, saved=saved)
+        violations: List[Dict[str, Any]] = []
+        if found is not None:
+            generated = normalize_recipe(found)
+        else:
+            generated = normalize_recipe(
+                generate_recipe(
+                    rn,
+                    dislikes,
+                    dietary,
+                    skill_level,
+                    history,
+                )
             )
-        )
+            generated, violations = _repair_violations(generated, dislikes, dietary, skill_level, history)
+            source = rr.SOURCE_LLM
+            rr.cache_generation(rn, skill_level, generated)
         generated = annotate_recipe_nutrition(generated)
         ctx.set_current_recipe(session_id, generated)
         reply = f"Here's a recipe for {generated.get('name', rn)}."
-        return _respond(session_id, reply, generated)
+        if source == rr.SOURCE_SAVED:
+            reply = f"Here's your saved recipe for {generated.get('name', rn)}."
+        return _respond(session_id, reply + _violation_note(violations), generated, source)
 
     # Smalltalk/unknown → generic LLM reply
     resp = ask_llm(message)
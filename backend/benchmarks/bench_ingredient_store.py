@@ -0,0 +1,90 @@
+"""Benchmark the array-backed ingredient store on a large nutrient database.
+
+Builds a synthetic 300k-ingredient database (one alias each) and compares
+the dict-of-dicts layout with IngredientStore: memory held, time to load
+(JSON parse vs. memory-mapping a prebuilt file) and per-lookup cost.
+
+Run from the repo root:
+    python -m backend.benchmarks.bench_ingredient_store
+"""
+
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Dict
+
+from backend.utils.ingredient_store import IngredientStore, write_store
+
+AISLES = ("Produce", "Dairy", "Meat", "Baking", "Pantry", "Spices", "Frozen", "Bakery")
+TAGS = ("dairy", "egg", "gluten", "nuts", "soy", "meat")
+
+
+def synthetic_raw(n: int, seed: int = 11) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    raw: Dict[str, Any] = {}
+    for i in range(n):
+        raw[f"ingredient {i}"] = {
+            "per_100g": {k: round(rng.uniform(0, 100), 1) for k in ("calories", "protein", "carbs", "fat", "fiber")},
+            "density_g_per_cup": rng.choice([None, 120, 200, 240]),
+            "aisle": rng.choice(AISLES),
+            "aliases": [f"alias {i}"],
+            "tags": rng.sample(TAGS, rng.choice([0, 0, 1, 2])),
+        }
+    return raw
+
+
+def legacy_entries(raw: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    db: Dict[str, Dict[str, Any]] = {}
+    for name, meta in raw.items():
+        meta = dict(meta, _canonical=name)
+        db[name] = meta
+        for alias in meta["aliases"]:
+            db[alias] = meta
+    return db
+
+
+def measure(fn):
+    """Return (result, load ms, MiB held, MiB peak); timed separately since tracing slows allocation."""
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    result = fn()
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed * 1000, held / 2**20, peak / 2**20
+
+
+def main() -> None:
+    n = 300_000
+    raw = synthetic_raw(n)
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = Path(tmp) / "ingredients.json"
+        bin_path = Path(tmp) / "ingredients.bin"
+        json_path.write_text(json.dumps(raw))
+        write_store(raw, bin_path)
+        del raw
+        print(f"{n} ingredients: json {os.path.getsize(json_path) / 2**20:.1f} MiB, "
+              f"store file {os.path.getsize(bin_path) / 2**20:.1f} MiB")
+
+        legacy, ms, held, peak = measure(lambda: legacy_entries(json.loads(json_path.read_text())))
+        print(f"dict of dicts:      load {ms:7.0f} ms | held {held:6.1f} MiB | peak {peak:6.1f} MiB")
+        built, ms, held, peak = measure(lambda: IngredientStore.from_raw(json.loads(json_path.read_text())))
+        print(f"store from JSON:    load {ms:7.0f} ms | held {held:6.1f} MiB | peak {peak:6.1f} MiB")
+        mapped, ms, held, peak = measure(lambda: IngredientStore.open(bin_path))
+        print(f"store, mmap'd file: load {ms:7.2f} ms | held {held:6.1f} MiB (file pages shared between workers)")
+
+        keys = [f"alias {random.randrange(n)}" for _ in range(20_000)]
+        for label, entries in (("dict of dicts", legacy), ("store", mapped.entries)):
+            start = time.perf_counter()
+            for k in keys:
+                entries.get(k).get("per_100g")
+            print(f"lookup+per_100g {label}: {(time.perf_counter() - start) / len(keys) * 1e6:.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Benchmark password verification under a login burst.
+
+Runs a burst of concurrent logins (PBKDF2 verification, as in POST
+/auth/login) on one event loop in two modes: inline on the loop, as the
+handlers used to, and on the bounded hashing pool from utils/auth_utils.py.
+A probe coroutine stands in for the worker's other endpoints (e.g. /ask)
+and records how late it gets scheduled; logins rejected with 503 because
+the pool is full are counted.
+
+Run from the repo root:
+    python -m backend.benchmarks.bench_password_hashing [logins] [concurrency]
+"""
+
+import asyncio
+import statistics
+import sys
+import time
+from typing import Dict, List
+
+from backend.utils import auth_utils
+from backend.utils.auth_utils import HashPoolSaturated, hash_password, verify_password, verify_password_async
+
+_PROBE_INTERVAL = 0.005
+
+
+async def _probe(stop: asyncio.Event, lags: List[float]) -> None:
+    """Another endpoint's request: wakes every few ms; lateness is added latency."""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        due = loop.time() + _PROBE_INTERVAL
+        await asyncio.sleep(_PROBE_INTERVAL)
+        lags.append((loop.time() - due) * 1000)
+
+
+async def _burst(stored: str, logins: int, concurrency: int, pooled: bool) -> Dict[str, float]:
+    gate = asyncio.Semaphore(concurrency)
+    rejected = 0
+
+    async def login() -> None:
+        nonlocal rejected
+        async with gate:
+            if pooled:
+                try:
+                    assert await verify_password_async("correct horse", stored)
+                except HashPoolSaturated:
+                    rejected += 1
+            else:
+                assert verify_password("correct horse", stored)
+                await asyncio.sleep(0)
+
+    lags: List[float] = []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(_probe(stop, lags))
+    await asyncio.sleep(_PROBE_INTERVAL * 2)
+    start = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await probe
+    lags.sort()
+    return {
+        "per_s": (logins - rejected) / elapsed,
+        "rejected": rejected,
+        "p50": statistics.median(lags),
+        "p99": lags[int(len(lags) * 0.99) - 1] if len(lags) > 1 else lags[-1],
+        "max": lags[-1],
+    }
+
+
+def main(logins: int, concurrency: int) -> None:
+    stored = hash_password("correct horse")
+    print(
+        f"{logins} logins, {concurrency} concurrent, {auth_utils.PASSWORD_HASH_ITERATIONS} iterations, "
+        f"pool {auth_utils.PASSWORD_HASH_WORKERS} workers + {auth_utils.PASSWORD_HASH_QUEUE} queued"
+    )
+    for label, pooled in (("inline on loop", False), ("hashing pool", True)):
+        r = asyncio.run(_burst(stored, logins, concurrency, pooled))
+        print(
+            f"{label:>15}: {r['per_s']:7.1f} logins/s ({r['rejected']} rejected) | "
+            f"other-endpoint delay p50 {r['p50']:6.2f} ms  p99 {r['p99']:7.2f} ms  max {r['max']:7.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    main(*(args + [200, 64][len(args):]))
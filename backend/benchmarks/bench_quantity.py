@@ -0,0 +1,111 @@
+"""Benchmark quantity parsing.
+
+Compares the memoized single-pass parser (utils/quantity.py) with the previous
+regex-and-if-chain parser on a corpus of LLM-produced quantity strings
+(quantity_corpus.txt), repeated the way quantities recur across recipes and
+grocery lists. Also reports how many strings each parser can turn into grams.
+
+Run from the repo root:
+    python -m backend.benchmarks.bench_quantity
+"""
+
+import random
+import re
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from backend.utils.quantity import _UNIT_MAP, parse_quantity, parse_quantity_to_grams, quantity_to_grams
+
+_META = {"density_g_per_cup": 120, "count_g": 50}
+
+
+def load_corpus() -> List[str]:
+    path = Path(__file__).resolve().parent / "quantity_corpus.txt"
+    lines = path.read_text(encoding="utf-8").splitlines()
+    return [ln for ln in lines if ln.strip() and not ln.startswith("#")]
+
+
+def _legacy_number(token: str) -> Optional[float]:
+    token = token.strip()
+    if not token:
+        return None
+    if " " in token:
+        total = 0.0
+        for p in token.split():
+            try:
+                total += float(p)
+                continue
+            except ValueError:
+                pass
+            if "/" in p:
+                try:
+                    num, den = p.split("/", 1)
+                    total += float(num) / float(den)
+                except Exception:
+                    return None
+        return total if total > 0 else None
+    if "/" in token:
+        try:
+            num, den = token.split("/", 1)
+            return float(num) / float(den)
+        except Exception:
+            return None
+    try:
+        return float(token)
+    except ValueError:
+        return None
+
+
+def legacy_to_grams(quantity: str, meta: Optional[Dict[str, Any]]) -> Optional[float]:
+    """The parser this module replaced, kept here for comparison."""
+    if not quantity:
+        return None
+    qty = quantity.lower().strip()
+    match = re.match(r"([0-9./\s]+)\s*([a-zA-Z]+)?", qty)
+    amount = _legacy_number(match.group(1)) if match else None
+    unit_token = (match.group(2).lower() if match and match.group(2) else "").strip()
+    unit = _UNIT_MAP.get(unit_token, unit_token or "")
+    if amount is None:
+        return None
+    if unit in ("g", ""):
+        if unit == "" and meta and meta.get("count_g"):
+            return amount * float(meta["count_g"])
+        return amount
+    factors = {"mg": 0.001, "kg": 1000.0, "oz": 28.3495, "lb": 453.592}
+    if unit in factors:
+        return amount * factors[unit]
+    if unit in ("clove", "slice", "piece", "can") or "whole" in qty:
+        return amount * float(meta["count_g"]) if meta and meta.get("count_g") else None
+    density = float(meta["density_g_per_cup"]) if meta and meta.get("density_g_per_cup") else 240.0
+    cups = {"cup": 1.0, "tbsp": 1 / 16, "tsp": 1 / 48, "ml": 1 / 240, "l": 1 / 0.24}.get(unit)
+    return amount * cups * density if cups is not None else None
+
+
+def _per_call_us(fn, items: List[str]) -> float:
+    start = time.perf_counter()
+    for q in items:
+        fn(q)
+    return (time.perf_counter() - start) / len(items) * 1e6
+
+
+def main() -> None:
+    corpus = load_corpus()
+    rng = random.Random(7)
+    workload = [rng.choice(corpus) for _ in range(50_000)]
+
+    legacy_known = sum(legacy_to_grams(q, _META) is not None for q in corpus)
+    new_known = sum(parse_quantity_to_grams(q, "", _META) is not None for q in corpus)
+    print(f"corpus: {len(corpus)} strings | grams resolved: legacy {legacy_known}, new {new_known}")
+
+    legacy = _per_call_us(lambda q: legacy_to_grams(q, _META), workload)
+    parse_quantity.cache_clear()
+    cold = _per_call_us(lambda q: quantity_to_grams(parse_quantity.__wrapped__(q), _META), workload)
+    parse_quantity.cache_clear()
+    warm = _per_call_us(lambda q: parse_quantity_to_grams(q, "", _META), workload)
+    print(f"{len(workload)} lookups: legacy {legacy:.2f} us | single-pass {cold:.2f} us | "
+          f"single-pass+LRU {warm:.2f} us")
+
+
+if __name__ == "__main__":
+    main()
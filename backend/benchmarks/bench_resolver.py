@@ -0,0 +1,79 @@
+"""Benchmark ingredient name resolution.
+
+Compares the indexed resolver (hash + token trie + LRU) with the previous
+linear contains-scan on synthetic databases of 40 and 300k ingredients.
+
+Run from the repo root:
+    python -m backend.benchmarks.bench_resolver
+"""
+
+import random
+import time
+from typing import Any, Dict, List
+
+from backend.utils.nutrition import IngredientResolver
+
+WORDS = ("red green yellow sweet smoked dried fresh wild baby ground whole sliced roasted "
+         "tomato onion pepper bean lentil rice oat flour sugar milk cream cheese butter apple "
+         "berry chicken beef pork fish shrimp garlic ginger basil thyme lemon lime corn pea").split()
+
+
+def synthetic_db(n: int, seed: int = 3) -> Dict[str, Dict[str, Any]]:
+    rng = random.Random(seed)
+    db: Dict[str, Dict[str, Any]] = {}
+    i = 0
+    while len(db) < n:
+        name = " ".join(rng.sample(WORDS, rng.choice([1, 2, 3]))) + ("" if len(db) < 200 else f" {i}")
+        i += 1
+        if name not in db:
+            db[name] = {"_canonical": name, "per_100g": {}}
+    return db
+
+
+def queries(db: Dict[str, Dict[str, Any]], count: int, seed: int = 5) -> List[str]:
+    rng = random.Random(seed)
+    names = list(db)
+    out = []
+    for _ in range(count):
+        base = rng.choice(names)
+        out.append(rng.choice([base, f"2 cups {base}s, chopped", f"fresh {base}", "unknown thing"]))
+    return out
+
+
+def legacy_resolve(db: Dict[str, Dict[str, Any]], name: str):
+    key = name.strip().lower()
+    meta = db.get(key)
+    if meta:
+        return meta["_canonical"], meta
+    for k, m in db.items():
+        if k in key:
+            return m["_canonical"], m
+    return key, None
+
+
+def _per_call_us(fn, items: List[str]) -> float:
+    start = time.perf_counter()
+    for q in items:
+        fn(q)
+    return (time.perf_counter() - start) / len(items) * 1e6
+
+
+def main() -> None:
+    for n in (40, 300_000):
+        db = synthetic_db(n)
+        start = time.perf_counter()
+        resolver = IngredientResolver(db)
+        build_ms = (time.perf_counter() - start) * 1000
+        qs = queries(db, 2000)
+        legacy_qs = qs if n <= 1000 else qs[:50]
+        legacy = _per_call_us(lambda q: legacy_resolve(db, q), legacy_qs)
+        cold = _per_call_us(resolver._resolve, qs)
+        for q in qs:
+            resolver.resolve(q)
+        warm = _per_call_us(resolver.resolve, qs)
+        print(f"{n} ingredients: build {build_ms:.0f} ms | legacy scan {legacy:.1f} us | "
+              f"indexed {cold:.1f} us | indexed+LRU {warm:.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""Benchmark ingredient search over saved recipes.
+
+Inserts 100k synthetic saved recipes for a throwaway user into the database
+from DATABASE_URL (migrations applied), then compares the GIN-indexed
+canonical_ingredients search behind GET /me/saved/search with the previous
+option of loading every saved recipe and filtering on the client. The user
+and their recipes are deleted afterwards.
+
+Run from the repo root:
+    python -m backend.benchmarks.bench_saved_search [count]
+"""
+
+import asyncio
+import random
+import sys
+import time
+import uuid
+from typing import Any, Dict, List
+
+from sqlalchemy import ARRAY, Text, delete, exists, insert, literal, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from backend.database import async_session
+from backend.models import RecipeBody, SavedRecipe, User
+from backend.utils.nutrition import canonical_ingredients, load_ingredient_db
+from backend.utils.recipe_utils import recipe_hash
+
+_CHUNK = 5000
+_QUERIES = ("garlic", "egg", "mozzarella cheese", "saffron")
+
+
+def synthetic_recipes(count: int, seed: int = 11) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    names = sorted(load_ingredient_db()) + ["saffron"]
+    out = []
+    for i in range(count):
+        # "saffron" is rare, the DB names common
+        picks = rng.sample(names[:-1], rng.randint(4, 12)) + (["saffron"] if i % 500 == 0 else [])
+        out.append({
+            "name": f"Recipe {i}",
+            "ingredients": [{"name": n, "quantity": "1 cup"} for n in picks],
+            "steps": ["Mix everything.", "Cook until done."] * 3,
+            "nutrition": {"calories": f"{rng.randint(150, 900)} kcal"},
+        })
+    return out
+
+
+async def _populate(user_id, recipes: List[Dict[str, Any]]) -> None:
+    async with async_session() as db:
+        await db.execute(insert(User).values(user_id=user_id, email=f"bench-{user_id}@example.com", password_hash="x"))
+        for start in range(0, len(recipes), _CHUNK):
+            chunk = recipes[start:start + _CHUNK]
+            hashes = [recipe_hash(r) for r in chunk]
+            await db.execute(
+                pg_insert(RecipeBody).on_conflict_do_nothing(),
+                [{"body_hash": h, "recipe_data": r} for h, r in zip(hashes, chunk)],
+            )
+            rows = [
+                {
+                    "user_id": user_id,
+                    "recipe_title": r["name"],
+                    "body_hash": h,
+                    "calories": r["nutrition"]["calories"],
+                    "ingredient_count": len(r["ingredients"]),
+                    "canonical_ingredients": canonical_ingredients(r),
+                }
+                for h, r in zip(hashes, chunk)
+            ]
+            await db.execute(insert(SavedRecipe), rows)
+        await db.commit()
+        await db.execute(text("ANALYZE saved_recipes"))
+
+
+async def _cleanup(user_id) -> None:
+    async with async_session() as db:
+        res = await db.execute(
+            delete(SavedRecipe).where(SavedRecipe.user_id == user_id).returning(SavedRecipe.body_hash)
+        )
+        hashes = set(res.scalars().all())
+        for start in range(0, len(hashes), _CHUNK):
+            chunk = list(hashes)[start:start + _CHUNK]
+            await db.execute(
+                delete(RecipeBody).where(
+                    RecipeBody.body_hash.in_(chunk),
+                    ~exists().where(SavedRecipe.body_hash == RecipeBody.body_hash),
+                )
+            )
+        await db.execute(delete(User).where(User.user_id == user_id))
+        await db.commit()
+
+
+async def _client_filter(user_id, ingredient: str) -> int:
+    """Old path: GET /me/saved returns everything, the client filters."""
+    async with async_session() as db:
+        res = await db.execute(
+            select(RecipeBody.recipe_data)
+            .join(SavedRecipe, SavedRecipe.body_hash == RecipeBody.body_hash)
+            .where(SavedRecipe.user_id == user_id)
+        )
+        wanted = ingredient.lower()
+        return sum(
+            1 for (data,) in res.all()
+            if any(wanted in str(i.get("name", "")).lower() for i in data.get("ingredients") or [])
+        )
+
+
+def _search_query(user_id, ingredient: str, limit: int = 50):
+    return (
+        select(SavedRecipe.recipe_title, SavedRecipe.calories, SavedRecipe.ingredient_count, SavedRecipe.saved_at)
+        .where(
+            SavedRecipe.user_id == user_id,
+            SavedRecipe.canonical_ingredients.op("@>")(literal([ingredient], ARRAY(Text))),
+        )
+        .order_by(SavedRecipe.saved_at.desc(), SavedRecipe.recipe_id.desc())
+        .limit(limit)
+    )
+
+
+async def _indexed(user_id, ingredient: str) -> int:
+    async with async_session() as db:
+        res = await db.execute(_search_query(user_id, ingredient))
+        return len(res.all())
+
+
+async def _timed(fn, *args, repeat: int = 5):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = await fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+async def main(count: int) -> None:
+    user_id = uuid.uuid4()
+    recipes = synthetic_recipes(count)
+    try:
+        start = time.perf_counter()
+        await _populate(user_id, recipes)
+        print(f"inserted {count} saved recipes in {time.perf_counter() - start:.1f}s")
+        for ingredient in _QUERIES:
+            full_ms, full_hits = await _timed(_client_filter, user_id, ingredient, repeat=2)
+            gin_ms, page = await _timed(_indexed, user_id, ingredient)
+            print(
+                f"{ingredient:>18}: load-all + filter {full_ms:8.1f} ms ({full_hits} hits) | "
+                f"GIN search {gin_ms:6.2f} ms (first page: {page})"
+            )
+        async with async_session() as db:
+            compiled = _search_query(user_id, "saffron").compile(
+                dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+            )
+            plan = await db.execute(text(f"EXPLAIN {compiled}"))
+            print("\nplan for a rare ingredient:")
+            for (line,) in plan.all():
+                print("  " + line)
+    finally:
+        await _cleanup(user_id)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000))
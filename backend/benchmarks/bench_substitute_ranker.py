@@ -0,0 +1,58 @@
+"""Benchmark similarity-ranked substitute lookups.
+
+Times closest-substitute queries against the local ingredient DB and a
+synthetic database of 300k rows (roughly a full USDA import).
+
+Run from the repo root:
+    python -m backend.benchmarks.bench_substitute_ranker
+"""
+
+import random
+import time
+
+from backend.utils.substitute_ranker import MACRO_KEYS, closest_substitutes, get_ranker, ranker_from_records
+from backend.utils.constraints import ALLERGEN_CLASSES, CLASS_BITS
+
+AISLES = ["Dairy", "Produce", "Meat", "Baking", "Grains", "Oils", "Pasta", "Seafood", "Snacks", "Frozen"]
+
+
+def synthetic_records(n: int, seed: int = 7):
+    rng = random.Random(seed)
+    for i in range(n):
+        yield {
+            "name": f"ingredient {i}",
+            "per_100g": {k: rng.uniform(0, 100 if k != "calories" else 900) for k in MACRO_KEYS},
+            "density_g_per_cup": rng.choice([None, rng.uniform(30, 260)]),
+            "aisle": rng.choice(AISLES),
+            "tags": rng.sample(ALLERGEN_CLASSES, rng.choice([0, 0, 1, 2])),
+        }
+
+
+def _time(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000.0
+
+
+def main() -> None:
+    get_ranker()
+    local_ms = _time(lambda: closest_substitutes("milk", 5, avoid_mask=CLASS_BITS["dairy"]), 1000)
+    print(f"local DB ({len(get_ranker().names)} rows): {local_ms:.3f} ms/query")
+
+    for n in (40_000, 300_000):
+        start = time.perf_counter()
+        ranker = ranker_from_records(synthetic_records(n))
+        build_s = time.perf_counter() - start
+        rng = random.Random(1)
+        names = [f"ingredient {rng.randrange(n)}" for _ in range(200)]
+        cold = _time(lambda: ranker.closest(names.pop(), 5, min_similarity=-1.0), 100)
+        warm = _time(lambda: ranker.closest("ingredient 1", 5, min_similarity=-1.0), 200)
+        excl = _time(lambda: ranker.closest("ingredient 2", 5, avoid_mask=CLASS_BITS["dairy"] | CLASS_BITS["meat"],
+                                            min_similarity=-1.0), 100)
+        print(f"{n} rows: build {build_s:.2f} s | cold row {cold:.2f} ms | cached row {warm:.3f} ms | "
+              f"with allergen exclusion {excl:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
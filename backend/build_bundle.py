@@ -0,0 +1,97 @@
+"""Compile the local data files into one precompiled bundle (see utils/bundle.py).
+
+Usage: python -m backend.build_bundle [--out data/bundle.bin]
+
+Reads data/ingredients.json, data/recipes.json and the learned substitution
+store, then writes the ingredient DB in its columnar layout, the recipe corpus
+with allergen/diet masks computed against that DB, and the learned table. The
+bundle version is a hash of the section contents, so identical inputs give an
+identical file.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .recipe_retrieval import _load_all
+from .substitution_engine import _read_learned, _store_path as _learned_path
+from .utils.bundle import ALIGN, FORMAT_VERSION, HEADER, MAGIC, default_bundle_path, open_bundle
+from .utils.constraints import recipe_mask
+from .utils.ingredient_store import IngredientStore, build_store_bytes
+from .utils.nutrition import _ingredients_path, _read_ingredients
+
+
+def _json_bytes(data: Any) -> bytes:
+    return json.dumps(data, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+
+def _align(n: int) -> int:
+    return -(-n // ALIGN) * ALIGN
+
+
+def build_bundle_bytes() -> bytes:
+    store_bytes = build_store_bytes(_read_ingredients(_ingredients_path()))
+    entries = IngredientStore(store_bytes).entries
+    recipes = [[r, recipe_mask(r, entries)] for r in _load_all().get("recipes", [])]
+    learned_path = _learned_path()
+    learned = _read_learned(learned_path) if learned_path.exists() else {}
+    sections = {
+        "ingredients": store_bytes,
+        "recipes": _json_bytes(recipes),
+        "substitutions": _json_bytes(learned),
+    }
+    digest = hashlib.sha256()
+    for name, data in sections.items():
+        digest.update(name.encode("utf-8") + len(data).to_bytes(8, "little") + data)
+    version = digest.hexdigest()[:16]
+
+    # offsets depend on the manifest length, which depends on the offsets: iterate to a fixed point
+    manifest_bytes = b""
+    while True:
+        offset = _align(HEADER.size + len(manifest_bytes))
+        layout: Dict[str, List[int]] = {}
+        for name, data in sections.items():
+            layout[name] = [offset, len(data)]
+            offset = _align(offset + len(data))
+        encoded = _json_bytes({"version": version, "sections": layout})
+        if encoded == manifest_bytes:
+            break
+        manifest_bytes = encoded
+
+    out = bytearray(HEADER.pack(MAGIC, FORMAT_VERSION, len(manifest_bytes)) + manifest_bytes)
+    for name, data in sections.items():
+        out += b"\0" * (layout[name][0] - len(out))
+        out += data
+    return bytes(out)
+
+
+def write_bundle(path: Path) -> None:
+    """Write the bundle atomically so running workers never map a half-written file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=str(path.parent), prefix=".bundle-", suffix=".bin")
+    with os.fdopen(fd, "wb") as f:
+        f.write(build_bundle_bytes())
+    os.replace(tmp, path)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Compile the data files into a precompiled bundle")
+    parser.add_argument("--out", type=Path, default=default_bundle_path())
+    args = parser.parse_args(argv)
+    write_bundle(args.out)
+    bundle = open_bundle(args.out)
+    print(
+        f"wrote {args.out} (version {bundle.version}): {len(bundle.ingredients)} ingredients, "
+        f"{len(bundle.recipes)} recipes, {len(bundle.learned_substitutions)} learned substitutions"
+    )
+    print(f"set DATA_BUNDLE_PATH={args.out} to serve it")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
 # iui/backend/models.py
 
-from sqlalchemy import Column, Integer, String, ForeignKey, TIMESTAMP, JSON, ARRAY, Text
+from sqlalchemy import Column, Integer, BigInteger, String, ForeignKey, TIMESTAMP, JSON, ARRAY, Text, Index, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
@@ -31,6 +31,7 @@ class UserProfile(Base):
     dietary_restrictions = Column(ARRAY(Text), default=[])
     disliked_ingredients = Column(ARRAY(Text), default=[])
     skill_level = Column(String(50))
+    updated_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), onupdate=func.now())
     
     user = relationship("User", back_populates="profile")
 
@@ -41,11 +42,40 @@ class SavedRecipe(Base):
     recipe_id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.user_id"), nullable=False, index=True)
     recipe_title = Column(String(255), nullable=False)
-    recipe_data = Column(JSONB, nullable=False)
+    # Body lives in recipe_bodies, stored once per distinct content (see RecipeBody)
+    body_hash = Column(String(64), ForeignKey("recipe_bodies.body_hash"), nullable=False, index=True)
+    # OR of the ingredients' allergen/diet class bits (see utils/constraints.py); NULL = not computed yet
+    allergen_mask = Column(BigInteger, nullable=True)
+    # constraints.mask_version() the mask was computed under; a different one means it is stale
+    mask_version = Column(String(16), nullable=True)
+    # Summary projection for list pages, so they never read the body
+    calories = Column(String(32), nullable=True)
+    ingredient_count = Column(Integer, nullable=True)
+    # resolve_ingredient() names of the ingredients, GIN-indexed for ingredient search
+    canonical_ingredients = Column(ARRAY(Text), nullable=True)
     saved_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
+    updated_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), onupdate=func.now())
     
     user = relationship("User", back_populates="recipes")
 
+    # keyset pagination of a user's recipes, newest first (scanned backwards)
+    __table_args__ = (
+        Index("ix_saved_recipes_user_saved_at", "user_id", "saved_at", "recipe_id"),
+        # one recipe per title per user; saves upsert on it
+        UniqueConstraint("user_id", "recipe_title", name="uq_saved_recipes_user_title"),
+        Index("ix_saved_recipes_canonical_ingredients", "canonical_ingredients", postgresql_using="gin"),
+    )
+
+
+# Table 4: recipe_bodies (content-addressed; shared by every saved copy of the same recipe)
+class RecipeBody(Base):
+    __tablename__ = "recipe_bodies"
+
+    # SHA-256 of the canonical JSON (utils/recipe_utils.recipe_hash)
+    body_hash = Column(String(64), primary_key=True)
+    recipe_data = Column(JSONB, nullable=False)
+    created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
+
 
 class GroceryList(Base):
     __tablename__ = "grocery_lists"
@@ -53,6 +83,10 @@ class GroceryList(Base):
     list_id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.user_id"), nullable=False, unique=True)
     list_data = Column(JSONB, nullable=False)
+    # Materialized aggregate of list_data, maintained incrementally (see utils/grocery.py)
+    aggregate = Column(JSONB, nullable=True)
+    # Bumped by every grocery mutation
+    version = Column(Integer, nullable=False, server_default="0")
     updated_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
 
     user = relationship("User", back_populates="grocery_list")
@@ -2,17 +2,44 @@
 
 For development/offline mode, load from data/recipes.json.
 You can extend this to call Spoonacular/Edamam later.
+
+When a precompiled data bundle is in use (see utils/bundle.py) the corpus and
+its masks come from the bundle instead of recipes.json.
+
+Also holds the local tiers used to answer recipe requests before falling back
+to the LLM: the user's saved recipes, the local corpus and a small in-process
+cache of previous generations.
 """
 
 import json
+from collections import OrderedDict
+from copy import deepcopy
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List, Tuple, Iterable
 
 from .utils.logging_utils import get_logger
+from .utils.constraints import Constraints, allows, compile_constraints, recipe_mask
+from .utils.bundle import current_bundle
+from .utils.nutrition import current_snapshot, ingredient_db_version
 
 
 logger = get_logger(__name__)
 
+# Tier labels reported back to clients
+SOURCE_SAVED = "saved"
+SOURCE_CORPUS = "corpus"
+SOURCE_CACHE = "cache"
+SOURCE_LLM = "llm"
+
+_GENERATION_CACHE_SIZE = 256
+_GENERATIONS_PER_KEY = 4
+# (name, skill_level) -> [(recipe, mask, ingredient DB version)], newest first
+_GENERATION_CACHE: "OrderedDict[Tuple[str, str], List[Tuple[Dict[str, Any], int, int]]]" = OrderedDict()
+
+# Corpus recipes paired with their precomputed allergen/diet masks, rebuilt when the
+# source (recipes.json or the data bundle) or the ingredient DB (which defines the masks) changes
+_CORPUS_INDEX: Dict[str, Any] = {"key": None, "entries": []}
+
 
 def _data_path() -> Path:
     return Path(__file__).resolve().parent.parent / "data" / "recipes.json"
@@ -29,14 +56,130 @@ def _load_all() -> Dict[str, Any]:
         return {"recipes": []}
 
 
+def _corpus_index() -> List[Tuple[Dict[str, Any], int]]:
+    """Return [(recipe, mask)] for the local corpus, recomputing masks only when a source changes."""
+    db_version = ingredient_db_version()
+    bundle = current_bundle()
+    if bundle is not None:
+        key = ("bundle", bundle.version, db_version)
+        if _CORPUS_INDEX["key"] != key:
+            # masks compiled into the bundle hold as long as its ingredient section is in use
+            same_db = bundle.ingredients is current_snapshot().store
+            _CORPUS_INDEX["entries"] = [(r, m if same_db else recipe_mask(r)) for r, m in bundle.recipes]
+            _CORPUS_INDEX["key"] = key
+        return _CORPUS_INDEX["entries"]
+    try:
+        mtime = _data_path().stat().st_mtime
+    except FileNotFoundError:
+        mtime = None
+    key = ("file", mtime, db_version)
+    if _CORPUS_INDEX["key"] != key or mtime is None:
+        _CORPUS_INDEX["entries"] = [(r, recipe_mask(r)) for r in _load_all().get("recipes", [])]
+        _CORPUS_INDEX["key"] = key
+    return _CORPUS_INDEX["entries"]
+
+
+def _normalize_title(name: str) -> str:
+    return " ".join(name.lower().split())
+
+
+def _find_entries(name: str, partial: bool = True) -> List[Tuple[Dict[str, Any], int]]:
+    """Corpus entries titled name (case/whitespace-insensitive), then contains matches if partial."""
+    name_l = _normalize_title(name)
+    if not name_l:
+        return []
+    exact, contains = [], []
+    for entry in _corpus_index():
+        r_name = _normalize_title(entry[0].get("name", ""))
+        if r_name == name_l:
+            exact.append(entry)
+        elif partial and name_l in r_name:
+            contains.append(entry)
+    return exact + contains
+
+
+def find_recipes(name: str) -> List[Dict[str, Any]]:
+    """Return corpus recipes matching name: exact matches first, then contains matches."""
+    return [r for r, _ in _find_entries(name)]
+
+
+def browse_recipes(dislikes: Iterable[str] = (), dietary: Iterable[str] = ()) -> List[Dict[str, Any]]:
+    """Return corpus recipes compatible with the given dislikes/allergies and dietary restrictions."""
+    constraints = compile_constraints(dislikes, dietary)
+    return [deepcopy(r) for r, mask in _corpus_index() if allows(constraints, r, mask)]
+
+
+def corpus_version() -> str:
+    """Identifier of the corpus contents (bundle version or recipes.json mtime), stable across workers."""
+    _corpus_index()
+    return str(_CORPUS_INDEX["key"][1])
+
+
 def get_recipe_by_name(name: str) -> Optional[Dict[str, Any]]:
-    name_l = name.lower().strip()
-    data = _load_all()
-    for r in data.get("recipes", []):
-        if r.get("name", "").lower() == name_l:
-            return r
-        # simple contains match
-        if name_l in r.get("name", "").lower():
-            return r
-    return None
+    matches = find_recipes(name)
+    return matches[0] if matches else None
+
+
+# ---------- Generation cache ---------- #
+
+def _generation_key(name: str, skill_level: Optional[str]) -> Tuple[str, str]:
+    return (_normalize_title(name), (skill_level or "").strip().lower())
+
+
+def cache_generation(name: str, skill_level: Optional[str], recipe: Dict[str, Any]) -> None:
+    """Remember an LLM-generated recipe so later requests can reuse it."""
+    if not recipe or not recipe.get("ingredients"):
+        return
+    key = _generation_key(name, skill_level)
+    entries = _GENERATION_CACHE.pop(key, [])
+    entries.insert(0, (deepcopy(recipe), recipe_mask(recipe), ingredient_db_version()))
+    _GENERATION_CACHE[key] = entries[:_GENERATIONS_PER_KEY]
+    while len(_GENERATION_CACHE) > _GENERATION_CACHE_SIZE:
+        _GENERATION_CACHE.popitem(last=False)
+
+
+def cached_generations(name: str, skill_level: Optional[str]) -> List[Tuple[Dict[str, Any], int]]:
+    """Return [(recipe, mask)] previously generated for this name and skill level."""
+    key = _generation_key(name, skill_level)
+    entries = _GENERATION_CACHE.get(key)
+    if entries is None:
+        return []
+    _GENERATION_CACHE.move_to_end(key)
+    # masks are recomputed lazily when the ingredient DB was reloaded since caching
+    version = ingredient_db_version()
+    if any(v != version for _, _, v in entries):
+        entries = [(r, m if v == version else recipe_mask(r), version) for r, m, v in entries]
+        _GENERATION_CACHE[key] = entries
+    return [(r, m) for r, m, _ in entries]
+
+
+# ---------- Tiered resolution ---------- #
+
+def resolve_local_recipe(
+    name: str,
+    dislikes: Iterable[str] = (),
+    dietary: Iterable[str] = (),
+    skill_level: Optional[str] = None,
+    saved: Optional[List[Tuple[Dict[str, Any], Optional[int]]]] = None,
+) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """Find a recipe without calling the LLM.
 
+    Tiers are tried in order: the user's saved recipes, the local corpus, then the
+    generation cache. Candidates violating dislikes or dietary restrictions are skipped
+    using their precomputed allergen/diet masks. `saved` holds (recipe, mask) pairs; a
+    None mask is computed on the fly. Corpus recipes must match the title exactly
+    (ignoring case and spacing): a hit skips generation, so "cake" must not answer
+    with "pancakes".
+    Returns (recipe, source) or (None, None) when the LLM is needed.
+    """
+    constraints: Constraints = compile_constraints(dislikes, dietary)
+    tiers = (
+        (SOURCE_SAVED, saved or []),
+        (SOURCE_CORPUS, _find_entries(name, partial=False)),
+        (SOURCE_CACHE, cached_generations(name, skill_level)),
+    )
+    for source, candidates in tiers:
+        for candidate, mask in candidates:
+            if allows(constraints, candidate, mask):
+                return deepcopy(candidate), source
+    return None, None
@@ -0,0 +1,230 @@
+"""Local constraint validator for recipes.
+
+Checks a recipe's ingredients and steps against dislikes, allergies and dietary
+restrictions without calling the LLM, scanning each text once with a phrase
+automaton compiled per constraint set. Matching is alias-aware: a dislike is
+expanded to every name the ingredient DB knows for it (canonical name, aliases,
+plurals), and known substitutes from SUBSTITUTIONS (e.g. "oat milk" for
+"milk") are exempt so a correctly modified recipe is not flagged again.
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, Any, List, Iterable, Set, Tuple
+
+from .substitution_engine import SUBSTITUTIONS
+from .utils.nutrition import ingredient_db_version, load_ingredient_db, names_by_canonical, resolve_ingredient
+from .utils.matcher import PhraseMatcher, plural_forms, select_longest
+from .utils.constraints import (
+    DIET_MASKS,
+    CLASS_KEYWORDS,
+    TERM_MASKS,
+    ingredient_mask,
+    mask_to_classes,
+    normalize_diet,
+    strip_lookalikes,
+)
+
+
+def _singular(word: str) -> str:
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    if word.endswith("oes") or word.endswith("ches") or word.endswith("shes"):
+        return word[:-2]
+    if word.endswith("s") and not word.endswith("ss") and len(word) > 3:
+        return word[:-1]
+    return word
+
+
+def _exemptions_for(forms: Set[str], allowed: Iterable[str] = ()) -> Set[str]:
+    """Names whose head noun is a form but that denote something else.
+
+    "oat milk" (a milk substitute) is exempt from "milk"; "almond milk" is not
+    exempt from "almond" because there the form is only a modifier.
+    """
+    exempt: Set[str] = set(allowed)
+
+    def headed_by_form(name: str) -> bool:
+        return name not in forms and any(name.endswith(" " + f) for f in forms)
+
+    for form in forms:
+        for sub in SUBSTITUTIONS.get(form, []) + SUBSTITUTIONS.get(_singular(form), []):
+            if headed_by_form(sub):
+                exempt.add(sub)
+    for canonical, names in names_by_canonical().items():
+        if names & forms:
+            continue
+        exempt.update(n for n in names if headed_by_form(n))
+    return exempt
+
+
+def _term_forms(term: str) -> Tuple[Set[str], Set[str]]:
+    """Return (forms, exemptions) for a constraint term."""
+    db = load_ingredient_db()
+    class_mask = TERM_MASKS.get(term)
+    if class_mask is not None:
+        return _class_forms(class_mask)
+    forms = {term, _singular(term)}
+    meta = db.get(term) or db.get(_singular(term))
+    if meta is not None:
+        forms |= names_by_canonical().get(meta.get("_canonical", term), set())
+    return forms, _exemptions_for(forms)
+
+
+def _class_forms(mask: int) -> Tuple[Set[str], Set[str]]:
+    forms: Set[str] = set()
+    allowed: Set[str] = set()
+    for cls in mask_to_classes(mask):
+        forms |= set(CLASS_KEYWORDS.get(cls, []))
+    for canonical, names in names_by_canonical().items():
+        if ingredient_mask(canonical) & mask:
+            forms |= names
+        else:
+            allowed |= names
+    return forms, _exemptions_for(forms, allowed)
+
+
+def _forms_for_key(key: str) -> Tuple[Set[str], Set[str]]:
+    if key.startswith("diet:"):
+        return _class_forms(DIET_MASKS.get(key[5:], 0))
+    return _term_forms(key)
+
+
+@lru_cache(maxsize=256)
+def _compile(keys: Tuple[str, ...], version: int) -> PhraseMatcher:
+    """Compile one automaton for a constraint set (per ingredient DB version).
+
+    Each phrase maps to {key: is_violation}; exemptions ("oat milk" for "milk")
+    win over shorter violating forms through leftmost-longest selection.
+    """
+    phrases: Dict[str, Dict[str, bool]] = {}
+    for key in keys:
+        forms, exempt = _forms_for_key(key)
+        for e in exempt:
+            for p in plural_forms(e):
+                phrases.setdefault(p, {}).setdefault(key, False)
+        for f in forms:
+            for p in plural_forms(f):
+                phrases.setdefault(p, {})[key] = True
+    return PhraseMatcher(phrases)
+
+
+def _violations(matcher: PhraseMatcher, text: str) -> Dict[str, Set[str]]:
+    """Return constraint key -> violating phrases found in text, using one automaton pass."""
+    text = strip_lookalikes(text)
+    by_key: Dict[str, List[Tuple[int, int, bool]]] = {}
+    for start, end, payload in matcher.find_all(text):
+        for key, is_violation in payload.items():
+            by_key.setdefault(key, []).append((start, end, is_violation))
+    hits: Dict[str, Set[str]] = {}
+    for key, found in by_key.items():
+        phrases = {text[start:end] for start, end, flag in select_longest(found) if flag}
+        if phrases:
+            hits[key] = phrases
+    return hits
+
+
+def _violated_keys(matcher: PhraseMatcher, text: str) -> Set[str]:
+    return set(_violations(matcher, text))
+
+
+def _class_mask(key: str) -> int:
+    if key.startswith("diet:"):
+        return DIET_MASKS.get(key[5:], 0)
+    return TERM_MASKS.get(key, 0)
+
+
+def _cleared_by_db(name: str, key: str) -> bool:
+    """True when name resolves to an ingredient DB entry outside the key's classes ("rice noodles" for gluten)."""
+    mask = _class_mask(key)
+    if not mask:
+        return False
+    canonical, meta = resolve_ingredient(name)
+    return meta is not None and not ingredient_mask(canonical) & mask
+
+
+def _mentions(text: str, phrase: str) -> bool:
+    return re.search(r"\b" + re.escape(_singular(phrase)) + r"(?:e?s)?\b", text) is not None
+
+
+def validate_recipe(
+    recipe: Dict[str, Any],
+    dislikes: Iterable[str] = (),
+    dietary: Iterable[str] = (),
+) -> List[Dict[str, Any]]:
+    """Return the constraints a recipe violates; an empty list means the recipe is fine.
+
+    Each violation: {"constraint": str, "kind": "dislike" | "diet",
+    "ingredients": [ingredient names], "steps": [step indices]}.
+    """
+    ingredients = []
+    for ing in (recipe or {}).get("ingredients") or []:
+        if isinstance(ing, dict):
+            ingredients.append(str(ing.get("name") or ing.get("ingredient") or ""))
+        else:
+            ingredients.append(str(ing))
+    steps = [str(s) for s in (recipe or {}).get("steps") or []]
+
+    checks: List[Tuple[str, str, str]] = []
+    for d in dislikes or []:
+        term = " ".join((d or "").lower().split())
+        if term:
+            checks.append((term, "dislike", term))
+    for label in dietary or []:
+        diet = normalize_diet(label)
+        if DIET_MASKS.get(diet):
+            checks.append((diet, "diet", f"diet:{diet}"))
+
+    if not checks:
+        return []
+    matcher = _compile(tuple(sorted({key for _, _, key in checks})), ingredient_db_version())
+    ing_hits = [
+        {key for key in _violations(matcher, n) if not _cleared_by_db(n, key)} for n in ingredients
+    ]
+    # a bare class keyword in a step ("drain the noodles") refers back to the ingredient list:
+    # it only counts when some violating ingredient, or none at all, mentions it
+    lowered = [n.lower() for n in ingredients]
+    step_hits = []
+    for s in steps:
+        hits = set()
+        for key, phrases in _violations(matcher, s).items():
+            for phrase in phrases:
+                mentioned = [i for i, n in enumerate(lowered) if _mentions(n, phrase)]
+                if not _class_mask(key) or not mentioned or any(key in ing_hits[i] for i in mentioned):
+                    hits.add(key)
+                    break
+        step_hits.append(hits)
+
+    violations: List[Dict[str, Any]] = []
+    seen: Set[str] = set()
+    for label, kind, key in checks:
+        if key in seen:
+            continue
+        seen.add(key)
+        hit_ings = [n for n, hits in zip(ingredients, ing_hits) if key in hits]
+        hit_steps = [i for i, hits in enumerate(step_hits) if key in hits]
+        if hit_ings or hit_steps:
+            violations.append({"constraint": label, "kind": kind, "ingredients": hit_ings, "steps": hit_steps})
+    return violations
+
+
+def violated_terms(violations: List[Dict[str, Any]]) -> List[str]:
+    return [v["constraint"] for v in violations]
+
+
+def allowed_names(
+    names: Iterable[str],
+    dislikes: Iterable[str] = (),
+    dietary: Iterable[str] = (),
+) -> List[str]:
+    """Filter ingredient names (e.g. suggested substitutes) down to those violating no constraint."""
+    names = list(names)
+    if not names:
+        return names
+    checks = [" ".join((d or "").lower().split()) for d in dislikes or []]
+    checks += [f"diet:{normalize_diet(d)}" for d in dietary or [] if DIET_MASKS.get(normalize_diet(d))]
+    checks = [c for c in checks if c]
+    if not checks:
+        return names
+    matcher = _compile(tuple(sorted(set(checks))), ingredient_db_version())
+    return [n for n in names if not _violated_keys(matcher, n)]
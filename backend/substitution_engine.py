@@ -1,14 +1,37 @@
 """Ingredient substitution engine.
 
 Provides common swaps and helpers to apply substitutions to a recipe.
-Falls back to LLM (mocked) if a substitution is unknown.
+
+Substitutes come from a persistent store seeded with SUBSTITUTIONS and queried
+through an in-memory index. Unknown ingredients are resolved with one batched
+JSON-mode LLM call per request, and the answers are written back to the store,
+so repeat lookups stay local.
 """
 
-from typing import Dict, List, Set, Any
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Set, Any, Tuple, Iterable, Optional
 from copy import deepcopy
-from .llm_interface import ask_llm
+from functools import lru_cache
+
+try:  # POSIX only; elsewhere writers are serialized per process only
+    import fcntl  # type: ignore
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore
+from .llm_interface import chat_json
+from .utils.logging_utils import get_logger
+from .utils.bundle import current_bundle
+from .utils.matcher import PhraseMatcher, plural_forms
+from .utils.nutrition import names_by_canonical, resolve_ingredient, split_quantity
+from .utils.substitute_ranker import closest_substitutes
 
 
+logger = get_logger(__name__)
+
 SUBSTITUTIONS: Dict[str, List[str]] = {
     "mushroom": ["zucchini", "eggplant", "bell pepper"],
     "milk": ["oat milk", "almond milk", "soy milk"],
@@ -21,49 +44,351 @@ SUBSTITUTIONS: Dict[str, List[str]] = {
     "cream": ["coconut cream", "cashew cream"],
 }
 
+_MAX_SUBSTITUTES = 5
 
-def suggest_substitutes(ingredient: str) -> List[str]:
-    key = ingredient.lower().strip()
+# In-memory index over SUBSTITUTIONS + learned entries; `learned` mirrors the store file
+_STORE: Dict[str, Any] = {"mtime": None, "index": None, "learned": {}, "matcher": None}
+_STORE_LOCK = threading.Lock()
+
+
+def _store_path() -> Path:
+    env = os.getenv("SUBSTITUTIONS_STORE")
+    if env:
+        return Path(env)
+    return Path(__file__).resolve().parent.parent / "data" / "substitutions_learned.json"
+
+
+def _normalize_key(ingredient: str) -> str:
+    return " ".join((ingredient or "").lower().split())
+
+
+def _read_learned(path: Path) -> Dict[str, List[str]]:
+    try:
+        raw = json.loads(path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        # fresh deployment: start from the table compiled into the data bundle, if any
+        bundle = current_bundle()
+        return dict(bundle.learned_substitutions) if bundle is not None else {}
+    except Exception as exc:  # pragma: no cover - runtime safety
+        logger.warning("Failed to read substitution store %s: %s", path, exc)
+        return {}
+    entries = raw.get("substitutions") if isinstance(raw, dict) else None
+    if not isinstance(entries, dict):
+        return {}
+    return {_normalize_key(k): [str(x) for x in v] for k, v in entries.items() if isinstance(v, list) and v}
+
+
+def _index() -> Tuple[Dict[str, List[str]], PhraseMatcher]:
+    """Return (index, matcher), reloading when another worker has written the store."""
+    path = _store_path()
+    try:
+        mtime = path.stat().st_mtime
+    except FileNotFoundError:
+        mtime = None
+    with _STORE_LOCK:
+        if _STORE["index"] is None or _STORE["mtime"] != mtime:
+            learned = _read_learned(path)
+            index = dict(learned)
+            index.update(SUBSTITUTIONS)  # curated entries win over learned ones
+            phrases: Dict[str, str] = {}
+            for key in index:
+                for form in plural_forms(key):
+                    phrases.setdefault(form, key)
+            _STORE.update(mtime=mtime, index=index, learned=learned, matcher=PhraseMatcher(phrases))
+        return _STORE["index"], _STORE["matcher"]
+
+
+@contextmanager
+def _store_file_lock(path: Path) -> Iterator[None]:
+    """Exclusive cross-process lock for the store's read-merge-replace.
+
+    Held on a sidecar file: the store itself is swapped by os.replace, so a lock
+    on its inode would not be seen by the next writer.
+    """
+    if fcntl is None:
+        yield
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path.with_name(path.name + ".lock"), "a") as lock:
+        fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+
+def _write_back(found: Dict[str, List[str]]) -> None:
+    """Merge newly learned substitutes into the store file (atomic replace)."""
+    path = _store_path()
+    with _STORE_LOCK:
+        try:
+            # other workers write the same file: re-read under the lock so their entries survive
+            with _store_file_lock(path):
+                learned = _read_learned(path)
+                learned.update(found)
+                fd, tmp = tempfile.mkstemp(dir=str(path.parent), prefix=".substitutions-", suffix=".json")
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump({"version": 1, "substitutions": learned}, f, ensure_ascii=False, indent=2, sort_keys=True)
+                os.replace(tmp, path)
+        except OSError as exc:  # pragma: no cover - read-only deployments
+            logger.warning("Could not persist substitution store %s: %s", path, exc)
+        # force a reload on next lookup so the index and matcher include the new keys
+        _STORE["index"] = None
+
+
+def lookup_substitutes(ingredient: str) -> Optional[List[str]]:
+    """Return known substitutes from the local store, or None if unknown."""
+    key = _normalize_key(ingredient)
+    if not key:
+        return None
+    index, matcher = _index()
     # direct match
-    if key in SUBSTITUTIONS:
-        return SUBSTITUTIONS[key]
-    # contains match (e.g., "button mushrooms")
-    for k, subs in SUBSTITUTIONS.items():
-        if k in key:
-            return subs
-    # fallback to mocked LLM
-    resp = ask_llm(f"Suggest simple home-friendly substitutes for {ingredient}.")
-    return [resp.get("text", "Try a similar vegetable or plant-based alternative.")]
+    if key in index:
+        return list(index[key])
+    # contains match (e.g., "button mushrooms"); prefer the longest, then the last (head noun)
+    matches = matcher.find_all(key)
+    if matches:
+        best = max(matches, key=lambda m: (m[1] - m[0], m[0]))
+        return list(index[best[2]])
+    return None
+
+
+def _clean_substitutes(values: Any, ingredient: str) -> List[str]:
+    out: List[str] = []
+    if isinstance(values, str):
+        values = [values]
+    if not isinstance(values, list):
+        return out
+    for v in values:
+        name = " ".join(str(v).split()).strip(" .")
+        if name and name.lower() != ingredient and name.lower() not in (o.lower() for o in out):
+            out.append(name)
+    return out[:_MAX_SUBSTITUTES]
+
+
+def _ask_llm_batch(ingredients: List[str]) -> Dict[str, List[str]]:
+    """Resolve all unknown ingredients with a single JSON-mode LLM call."""
+    system = (
+        "You suggest simple, home-friendly ingredient substitutes. Return ONLY JSON of the form "
+        "{\"substitutes\": {\"<ingredient>\": [\"substitute\", ...]}} with up to "
+        f"{_MAX_SUBSTITUTES} short ingredient names per input and no explanations."
+    )
+    user = "Ingredients: " + json.dumps(ingredients, ensure_ascii=False)
+    out = chat_json([{"role": "system", "content": system}, {"role": "user", "content": user}], max_tokens=60 + 40 * len(ingredients))
+    table = out.get("substitutes") if isinstance(out, dict) else None
+    if not isinstance(table, dict):
+        table = out if isinstance(out, dict) else {}
+    normalized = {_normalize_key(k): v for k, v in table.items()}
+    found: Dict[str, List[str]] = {}
+    for ing in ingredients:
+        subs = _clean_substitutes(normalized.get(ing), ing)
+        if subs:
+            found[ing] = subs
+    return found
+
+
+def lookup_substitutes_many(ingredients: Iterable[str], avoid_mask: int = 0) -> Tuple[Dict[str, List[str]], List[str]]:
+    """Resolve what can be answered locally; return (results, misses) keyed by normalized ingredient.
+
+    Known ingredients are answered from the local store, then from the
+    similarity ranker over the ingredient DB (skipping avoid_mask classes).
+    """
+    results: Dict[str, List[str]] = {}
+    misses: List[str] = []
+    for ingredient in ingredients:
+        key = _normalize_key(ingredient)
+        if not key or key in results or key in misses:
+            continue
+        subs = lookup_substitutes(key)
+        if subs is None:
+            # nutritionally closest known ingredients, ahead of the LLM
+            subs = closest_substitutes(key, _MAX_SUBSTITUTES, avoid_mask=avoid_mask) or None
+        if subs is None:
+            misses.append(key)
+        else:
+            results[key] = subs
+    return results, misses
+
+
+def fill_substitutes(misses: List[str]) -> Dict[str, List[str]]:
+    """Answer all misses with one LLM call and persist the answers for later requests."""
+    if not misses:
+        return {}
+    found = _ask_llm_batch(misses)
+    if found:
+        _write_back(found)
+    return {key: found.get(key, []) for key in misses}
+
+
+def suggest_substitutes_many(ingredients: Iterable[str], avoid_mask: int = 0) -> Dict[str, List[str]]:
+    """Return {normalized ingredient: substitutes} for many ingredients at once.
+
+    Local answers first (store, then ranker); all remaining misses share one LLM call.
+    """
+    results, misses = lookup_substitutes_many(ingredients, avoid_mask)
+    results.update(fill_substitutes(misses))
+    return results
+
+
+def suggest_substitutes(ingredient: str) -> List[str]:
+    key = _normalize_key(ingredient)
+    return suggest_substitutes_many([key]).get(key, [])
+
+
+@lru_cache(maxsize=256)
+def _dislike_matcher(dislikes: Tuple[str, ...]) -> PhraseMatcher:
+    """Compile one automaton for a dislike set; payload is the dislike a phrase came from."""
+    phrases: Dict[str, str] = {}
+    for d in dislikes:
+        for form in plural_forms(d):
+            phrases.setdefault(form, d)
+    return PhraseMatcher(phrases)
 
 
 def apply_substitutions(recipe: Dict[str, Any], dislikes: Set[str]) -> Dict[str, Any]:
-    """Return a new recipe with disliked ingredients substituted where possible."""
+    """Return a new recipe with disliked ingredients substituted where possible.
+
+    The recipe is scanned once for the whole dislike set first, so substitutes
+    are only resolved for dislikes that actually appear; ingredients and steps
+    are then rewritten in a single pass each with a matcher compiled per set.
+    """
     new_recipe = deepcopy(recipe)
-    dislike_list = sorted({d.lower() for d in dislikes})
+    dislike_list = sorted({d.lower().strip() for d in dislikes if d and d.strip()})
     if not dislike_list:
         return new_recipe
 
+    texts = [ing.get("name") or "" for ing in new_recipe.get("ingredients", [])]
+    texts += [str(step) for step in new_recipe.get("steps", [])]
+    present = {d for _, _, d in _dislike_matcher(tuple(dislike_list)).find_all("\n".join(texts))}
+    if not present:
+        return new_recipe
+
+    chosen: Dict[str, str] = {}
+    for d, subs in suggest_substitutes_many(sorted(present)).items():
+        if subs:
+            # choose the first suggested substitute
+            chosen[d] = subs[0]
+    if not chosen:
+        return new_recipe
+    matcher = _dislike_matcher(tuple(sorted(chosen)))
+
+    def rewrite(text: str) -> str:
+        return matcher.replace(text, lambda start, end, d: chosen[d])
+
     # Replace ingredients
     for ing in new_recipe.get("ingredients", []):
-        name = ing.get("name", "").lower()
-        for d in dislike_list:
-            if d and d in name:
-                subs = suggest_substitutes(d)
-                if subs:
-                    # choose the first suggested substitute
-                    ing["name"] = ing["name"].replace(d, subs[0])
+        if ing.get("name"):
+            ing["name"] = rewrite(ing["name"])
 
     # Best-effort update in steps
-    updated_steps = []
-    for step in new_recipe.get("steps", []):
-        s_lower = step.lower()
-        for d in dislike_list:
-            if d in s_lower:
-                subs = suggest_substitutes(d)
-                if subs:
-                    step = step.replace(d, subs[0])
-        updated_steps.append(step)
-    new_recipe["steps"] = updated_steps
+    new_recipe["steps"] = [rewrite(step) for step in new_recipe.get("steps", [])]
 
     return new_recipe
 
+
+# ---------- Deterministic local replace ---------- #
+
+# Step vocabulary that marks a recipe as baked, where some ingredients carry structure
+_CONTEXT_WORDS: Dict[str, Tuple[str, ...]] = {
+    "baking": ("bake", "baked", "baking", "oven", "batter", "dough", "knead", "griddle", "muffin", "cake"),
+}
+_MASS_UNITS = {"g", "mg", "kg", "oz", "lb"}
+
+
+def _recipe_contexts(recipe: Dict[str, Any]) -> Set[str]:
+    text = " ".join(str(s) for s in recipe.get("steps") or []).lower()
+    return {ctx for ctx, words in _CONTEXT_WORDS.items() if PhraseMatcher({w: True for w in words}).search(text)}
+
+
+def is_structural_swap(recipe: Dict[str, Any], src: str, dst: str) -> bool:
+    """True when swapping src changes how the dish holds together (e.g. egg -> flax egg in baking)."""
+    _, meta = resolve_ingredient(src)
+    roles = set((meta or {}).get("structural_in") or [])
+    return bool(roles & _recipe_contexts(recipe))
+
+
+def _format_amount(value: float) -> str:
+    if value >= 10:
+        return str(int(round(value)))
+    return f"{value:.1f}".rstrip("0").rstrip(".")
+
+
+def _adjust_quantity(quantity: str, src_meta: Optional[Dict[str, Any]], dst_meta: Optional[Dict[str, Any]]) -> str:
+    """Keep the same volume when a mass quantity moves between ingredients of different density."""
+    amount, unit, rest = split_quantity(quantity)
+    if amount is None or unit not in _MASS_UNITS:
+        return quantity
+    src_density = (src_meta or {}).get("density_g_per_cup")
+    dst_density = (dst_meta or {}).get("density_g_per_cup")
+    if not src_density or not dst_density or src_density == dst_density:
+        return quantity
+    scaled = amount * float(dst_density) / float(src_density)
+    sep = "" if not rest or rest.startswith(",") else " "
+    return f"{_format_amount(scaled)} {unit}{sep}{rest}"
+
+
+def local_replace(recipe: Dict[str, Any], replacements: List[Tuple[str, str]]) -> Optional[Dict[str, Any]]:
+    """Apply explicit src -> dst swaps without the LLM.
+
+    A line named exactly src or one of its DB aliases is swapped whole
+    ("ground beef" for "beef"); a line that resolves to src under extra
+    descriptors has only the matched name replaced ("boneless chicken breasts").
+    Mass quantities are adjusted by density and mentions in steps rewritten.
+    Returns None when the LLM should handle the request: a swap is structurally
+    significant, src does not appear in the recipe, or src only modifies another
+    food in some line ("chicken broth" when replacing chicken). Nutrition is not
+    recomputed here.
+    """
+    new_recipe = deepcopy(recipe)
+    ingredients = new_recipe.get("ingredients") or []
+    for src, dst in replacements:
+        src_key, dst = _normalize_key(src), " ".join((dst or "").split())
+        if not src_key or not dst:
+            return None
+        if is_structural_swap(new_recipe, src_key, dst):
+            return None
+        src_canonical, src_meta = resolve_ingredient(src_key)
+        _, dst_meta = resolve_ingredient(dst)
+        step_names: Set[str] = {src_key}
+        if src_meta is not None:
+            step_names |= names_by_canonical().get(src_canonical, set())
+        src_forms = {form for n in step_names for form in plural_forms(n)}
+        src_matcher = PhraseMatcher({form: True for form in src_forms})
+        replaced = False
+        # other known ingredients whose names contain src ("almond milk" for "milk") stay as they are
+        keep: Set[str] = set()
+        for ing in ingredients:
+            name = str(ing.get("name") or "")
+            canonical, meta = resolve_ingredient(name)
+            if _normalize_key(name) in src_forms:
+                # src under its own name or a DB alias ("ground beef" for "beef"): swap the whole line
+                new_name = dst
+            elif src_matcher.search(name):
+                if src_meta is not None and meta is not None and canonical != src_canonical:
+                    keep.add(_normalize_key(name))
+                    continue
+                if src_meta is not None and meta is None:
+                    # src may only modify another food here ("chicken broth", "peanut butter")
+                    return None
+                new_name = src_matcher.replace(name, lambda start, end, _: dst)
+            else:
+                continue
+            step_names.add(name.lower())
+            ing["name"] = new_name
+            ing["quantity"] = _adjust_quantity(str(ing.get("quantity") or ""), meta, dst_meta)
+            replaced = True
+        if not replaced:
+            return None
+        phrases: Dict[str, bool] = {}
+        for n in step_names:
+            for form in plural_forms(n):
+                phrases[form] = True
+        for n in keep:
+            for form in plural_forms(n):
+                phrases[form] = False
+        step_matcher = PhraseMatcher(phrases)
+        new_recipe["steps"] = [
+            step_matcher.replace(text, lambda start, end, swap: dst if swap else text[start:end])
+            for text in (str(step) for step in new_recipe.get("steps") or [])
+        ]
+    return new_recipe
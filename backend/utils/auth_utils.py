@@ -2,10 +2,13 @@ import os
 import hmac
 import time
 import base64
+import asyncio
 import secrets
 import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from uuid import UUID
-from typing import Optional
+from typing import Any, Callable, Optional
 
 from dotenv import load_dotenv
 
@@ -13,8 +16,23 @@ load_dotenv()
 
 AUTH_SECRET = (os.getenv("AUTH_SECRET") or "dev-secret-change-me").encode()
 
+# Work factor for new hashes; stored hashes with a different count are rehashed on login
+PASSWORD_HASH_ITERATIONS = int(os.getenv("PASSWORD_HASH_ITERATIONS", "200000"))
+# PBKDF2 releases the GIL, so a small thread pool hashes in parallel off the event loop
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Hashes allowed to wait for a worker before new ones are rejected
+PASSWORD_HASH_QUEUE = int(os.getenv("PASSWORD_HASH_QUEUE", "32"))
 
-def hash_password(password: str) -> str:
+_HASH_POOL = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="pbkdf2")
+_HASH_LOCK = threading.Lock()
+_HASH_STATE = {"in_flight": 0}
+
+
+class HashPoolSaturated(RuntimeError):
+    """Raised when the password hashing pool is full; callers should answer 503."""
+
+
+def hash_password(password: str, iterations: Optional[int] = None) -> str:
     """Hash a password using PBKDF2-HMAC-SHA256 with a random salt.
 
     Returns a string containing the algorithm, iterations, salt and hash.
@@ -23,7 +41,7 @@ def hash_password(password: str) -> str:
     if not isinstance(password, str):
         raise TypeError("password must be a string")
     salt = secrets.token_bytes(16)
-    iterations = 200_000
+    iterations = iterations or PASSWORD_HASH_ITERATIONS
     dk = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, iterations)
     return f"pbkdf2_sha256${iterations}${salt.hex()}${dk.hex()}"
 
@@ -42,6 +60,40 @@ def verify_password(password: str, stored: str) -> bool:
         return False
 
 
+def needs_rehash(stored: str) -> bool:
+    """True when a stored hash was made with another algorithm or iteration count."""
+    try:
+        algo, iters_s, _, _ = stored.split("$")
+        return algo != "pbkdf2_sha256" or int(iters_s) != PASSWORD_HASH_ITERATIONS
+    except Exception:
+        return True
+
+
+def _release(_future) -> None:
+    with _HASH_LOCK:
+        _HASH_STATE["in_flight"] -= 1
+
+
+async def _in_hash_pool(fn: Callable[..., Any], *args: Any) -> Any:
+    with _HASH_LOCK:
+        if _HASH_STATE["in_flight"] >= PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE:
+            raise HashPoolSaturated("password hashing is saturated")
+        _HASH_STATE["in_flight"] += 1
+    future = _HASH_POOL.submit(fn, *args)
+    future.add_done_callback(_release)
+    return await asyncio.wrap_future(future)
+
+
+async def hash_password_async(password: str) -> str:
+    """hash_password on the bounded hashing pool; raises HashPoolSaturated when it is full."""
+    return await _in_hash_pool(hash_password, password)
+
+
+async def verify_password_async(password: str, stored: str) -> bool:
+    """verify_password on the bounded hashing pool; raises HashPoolSaturated when it is full."""
+    return await _in_hash_pool(verify_password, password, stored)
+
+
 def make_token(user_id: UUID) -> str:
     """Create a simple HMAC-signed token for the user.
 
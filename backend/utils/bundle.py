@@ -0,0 +1,126 @@
+"""Precompiled data bundle (read side).
+
+`python -m backend.build_bundle` compiles the ingredient DB (columnar store
+with its alias table), the recipe corpus with precomputed allergen/diet masks
+and the learned substitution table into one versioned file. Workers
+memory-map it at startup instead of parsing JSON: the ingredient section is
+used in place, the rest are small JSON sections.
+
+The bundle is opt-in: it is only used when DATA_BUNDLE_PATH points at one, so a
+stray data/bundle.bin never shadows edits to the JSON files. A bundle older
+than the JSON files it was built from is still served, with a warning.
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from .ingredient_store import IngredientStore
+from .logging_utils import get_logger
+
+logger = get_logger(__name__)
+
+MAGIC = b"SDBN"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sII")  # magic, format version, manifest JSON length
+ALIGN = 8
+
+# Last opened bundle; replaced (never mutated) when the file changes
+_BUNDLE: Dict[str, Any] = {"loaded": False, "key": None, "bundle": None}
+_BUNDLE_LOCK = threading.Lock()
+
+
+class DataBundle(NamedTuple):
+    version: str
+    path: Path
+    mtime: float
+    manifest: Dict[str, Any]
+    ingredients: IngredientStore
+    recipes: List[Tuple[Dict[str, Any], int]]
+    learned_substitutions: Dict[str, List[str]]
+
+
+def default_bundle_path() -> Path:
+    return Path(__file__).resolve().parent.parent.parent / "data" / "bundle.bin"
+
+
+def bundle_path() -> Optional[Path]:
+    """Configured bundle file (DATA_BUNDLE_PATH), or None to load the JSON sources."""
+    env = os.getenv("DATA_BUNDLE_PATH")
+    return Path(env) if env else None
+
+
+def _source_paths() -> List[Path]:
+    data = default_bundle_path().parent
+    return [data / "ingredients.json", data / "recipes.json"]
+
+
+def _warn_if_stale(bundle: DataBundle) -> None:
+    newer = [p.name for p in _source_paths() if p.exists() and p.stat().st_mtime > bundle.mtime]
+    if newer:
+        logger.warning(
+            "Data bundle %s is older than %s; edits there are not served until it is rebuilt "
+            "(python -m backend.build_bundle)",
+            bundle.path,
+            ", ".join(newer),
+        )
+
+
+def open_bundle(path: Path) -> DataBundle:
+    with open(path, "rb") as f:
+        mtime = os.fstat(f.fileno()).st_mtime
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(buf)
+    magic, fmt, manifest_len = HEADER.unpack_from(view, 0)
+    if magic != MAGIC or fmt != FORMAT_VERSION:
+        raise ValueError(f"{path} is not a data bundle (or has an unsupported format version)")
+    manifest = json.loads(bytes(view[HEADER.size:HEADER.size + manifest_len]).decode("utf-8"))
+    sections = {name: view[off:off + size] for name, (off, size) in manifest["sections"].items()}
+    recipes = json.loads(bytes(sections["recipes"]).decode("utf-8"))
+    learned = json.loads(bytes(sections["substitutions"]).decode("utf-8"))
+    return DataBundle(
+        version=manifest["version"],
+        path=path,
+        mtime=mtime,
+        manifest=manifest,
+        ingredients=IngredientStore(sections["ingredients"]),
+        recipes=[(r, int(m)) for r, m in recipes],
+        learned_substitutions=learned,
+    )
+
+
+def load_bundle() -> Optional[DataBundle]:
+    """(Re)open the configured bundle if it changed since the last call; None when not configured."""
+    path = bundle_path()
+    try:
+        key = (str(path), path.stat().st_mtime) if path else None
+    except FileNotFoundError:
+        logger.warning("Data bundle %s not found; using JSON sources", path)
+        key = None
+    with _BUNDLE_LOCK:
+        if _BUNDLE["loaded"] and _BUNDLE["key"] == key:
+            return _BUNDLE["bundle"]
+        bundle = None
+        if key is not None:
+            try:
+                bundle = open_bundle(path)
+                logger.info("Opened data bundle %s (version %s)", path, bundle.version)
+                _warn_if_stale(bundle)
+            except Exception as exc:
+                logger.warning("Failed to open data bundle %s: %s", path, exc)
+                bundle = _BUNDLE["bundle"]
+        _BUNDLE.update(loaded=True, key=key, bundle=bundle)
+        return bundle
+
+
+def current_bundle() -> Optional[DataBundle]:
+    """Bundle in use (opened on first call; the ingredient DB watcher picks up rebuilt files)."""
+    if _BUNDLE["loaded"]:
+        return _BUNDLE["bundle"]
+    return load_bundle()
@@ -0,0 +1,246 @@
+"""Constraint checks for recipes (dislikes, allergies and dietary restrictions).
+
+Each ingredient in data/ingredients.json carries allergen/diet class tags
+(dairy, gluten, nuts, meat, ...). Tags are compiled into integer bitmasks so a
+recipe's mask is the OR of its ingredients' masks, and checking a recipe
+against a user's constraints is a single bitwise AND. Dislikes that are not a
+class (e.g. "mushroom") fall back to a name scan.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+from functools import lru_cache
+from typing import Dict, Any, List, Iterable, Mapping, NamedTuple, Optional, Tuple
+
+from .nutrition import IngredientSnapshot, ingredient_db_version, load_ingredient_db, per_snapshot
+
+
+# Bit positions are persisted (saved_recipes.allergen_mask): only append new classes.
+ALLERGEN_CLASSES: Tuple[str, ...] = (
+    "dairy",
+    "egg",
+    "gluten",
+    "nuts",
+    "peanut",
+    "soy",
+    "fish",
+    "shellfish",
+    "sesame",
+    "meat",
+    "poultry",
+    "pork",
+)
+
+CLASS_BITS: Dict[str, int] = {name: 1 << i for i, name in enumerate(ALLERGEN_CLASSES)}
+
+_ANIMAL = CLASS_BITS["meat"] | CLASS_BITS["poultry"] | CLASS_BITS["pork"]
+_SEAFOOD = CLASS_BITS["fish"] | CLASS_BITS["shellfish"]
+
+DIET_MASKS: Dict[str, int] = {
+    "vegetarian": _ANIMAL | _SEAFOOD,
+    "pescatarian": _ANIMAL,
+    "vegan": _ANIMAL | _SEAFOOD | CLASS_BITS["dairy"] | CLASS_BITS["egg"],
+    "gluten-free": CLASS_BITS["gluten"],
+    "dairy-free": CLASS_BITS["dairy"],
+    "lactose-free": CLASS_BITS["dairy"],
+    "egg-free": CLASS_BITS["egg"],
+    "nut-free": CLASS_BITS["nuts"] | CLASS_BITS["peanut"],
+    "halal": CLASS_BITS["pork"],
+    "kosher": CLASS_BITS["pork"] | CLASS_BITS["shellfish"],
+}
+
+# Allergy/dislike terms that name a whole class rather than one ingredient
+TERM_MASKS: Dict[str, int] = {
+    **CLASS_BITS,
+    "lactose": CLASS_BITS["dairy"],
+    "eggs": CLASS_BITS["egg"],
+    "wheat": CLASS_BITS["gluten"],
+    "nut": CLASS_BITS["nuts"],
+    "tree nuts": CLASS_BITS["nuts"],
+    "tree nut": CLASS_BITS["nuts"],
+    "peanuts": CLASS_BITS["peanut"],
+    "seafood": _SEAFOOD,
+    "shellfish": CLASS_BITS["shellfish"],
+    "red meat": CLASS_BITS["meat"],
+}
+
+# Keyword fallback for ingredients that are not in the ingredient DB
+CLASS_KEYWORDS: Dict[str, List[str]] = {
+    "dairy": ["milk", "butter", "cheese", "cream", "yogurt", "ricotta", "mozzarella", "parmesan", "ghee"],
+    "egg": ["egg"],
+    "gluten": ["flour", "pasta", "noodle", "bread", "wheat", "barley", "rye", "couscous", "breadcrumb"],
+    "nuts": ["almond", "walnut", "cashew", "pecan", "hazelnut", "pistachio"],
+    "peanut": ["peanut"],
+    "soy": ["soy", "tofu", "tempeh", "edamame"],
+    "fish": ["fish", "salmon", "tuna", "cod", "anchovy", "tilapia"],
+    "shellfish": ["shrimp", "prawn", "crab", "lobster", "clam", "mussel", "scallop"],
+    "sesame": ["sesame", "tahini"],
+    "meat": ["beef", "pork", "chicken", "turkey", "lamb", "bacon", "ham", "sausage", "veal", "duck", "prosciutto"],
+    "poultry": ["chicken", "turkey", "duck"],
+    "pork": ["pork", "bacon", "ham", "prosciutto"],
+}
+_CLASS_PATTERNS: Dict[str, "re.Pattern[str]"] = {
+    cls: re.compile(r"\b(?:" + "|".join(map(re.escape, words)) + r")(?:e?s)?\b")
+    for cls, words in CLASS_KEYWORDS.items()
+}
+# Look-alikes: rewrite before matching so e.g. "almond milk" is nuts, not dairy
+_KEYWORD_REWRITES: Dict[str, str] = {
+    "oat milk": "oat",
+    "almond milk": "almond",
+    "soy milk": "soy",
+    "coconut milk": "coconut",
+    "coconut cream": "coconut",
+    "cashew cream": "cashew",
+    "peanut butter": "peanut",
+    "almond butter": "almond",
+    "cocoa butter": "cocoa",
+}
+PLANT_BASED = re.compile(r"\b(?:vegan|plant-based|dairy-free|gluten-free|meatless)\s+\S+")
+
+
+def normalize_diet(label: str) -> str:
+    """Normalize a dietary label ('Gluten free' -> 'gluten-free')."""
+    return "-".join((label or "").strip().lower().replace("_", " ").split())
+
+
+def tags_to_mask(tags: Iterable[str]) -> int:
+    mask = 0
+    for t in tags or []:
+        mask |= CLASS_BITS.get(str(t).strip().lower(), 0)
+    return mask
+
+
+def mask_to_classes(mask: int) -> List[str]:
+    return [name for name in ALLERGEN_CLASSES if mask & CLASS_BITS[name]]
+
+
+@per_snapshot
+def _canonical_masks(snap: IngredientSnapshot) -> Dict[str, int]:
+    """Compile canonical ingredient -> class bitmask from the ingredient DB."""
+    masks: Dict[str, int] = {}
+    for meta in snap.entries.values():
+        canonical = meta.get("_canonical")
+        if canonical and canonical not in masks:
+            masks[canonical] = tags_to_mask(meta.get("tags") or [])
+    return masks
+
+
+@per_snapshot
+def mask_version(snap: IngredientSnapshot) -> str:
+    """Digest of everything recipe masks are derived from (DB names and tags, keyword rules).
+
+    Unlike the snapshot version it is stable across workers and restarts, so it can be
+    persisted next to a mask (saved_recipes.mask_version) to tell when the mask is stale.
+    """
+    masks = _canonical_masks()
+    digest = hashlib.sha256()
+    digest.update(json.dumps([ALLERGEN_CLASSES, CLASS_KEYWORDS, _KEYWORD_REWRITES, PLANT_BASED.pattern]).encode())
+    for key in sorted(snap.entries):
+        digest.update(f"\n{key}\t{masks.get(snap.entries[key].get('_canonical', key), 0)}".encode())
+    return digest.hexdigest()[:16]
+
+
+def strip_lookalikes(text: str) -> str:
+    """Rewrite look-alikes ("almond milk" -> "almond", "vegan butter" / "gluten-free pasta" -> "")."""
+    text = text.lower()
+    for phrase, repl in _KEYWORD_REWRITES.items():
+        if phrase in text:
+            text = text.replace(phrase, repl)
+    return PLANT_BASED.sub(" ", text)
+
+
+def _entry_mask(entries: Mapping[str, Mapping[str, Any]], key: str) -> int:
+    meta = entries.get(key)
+    if meta is not None:
+        return tags_to_mask(meta.get("tags") or [])
+    return _keyword_mask(key)
+
+
+def _keyword_mask(name: str) -> int:
+    text = strip_lookalikes(name)
+    mask = 0
+    for cls, pattern in _CLASS_PATTERNS.items():
+        if pattern.search(text):
+            mask |= CLASS_BITS[cls]
+    return mask
+
+
+def ingredient_mask(name: str) -> int:
+    """Return the class bitmask for one ingredient name."""
+    return _ingredient_mask(name, ingredient_db_version())
+
+
+@lru_cache(maxsize=4096)
+def _ingredient_mask(name: str, version: int) -> int:
+    key = (name or "").strip().lower()
+    if not key:
+        return 0
+    # Only trust exact/alias hits: the contains fallback of resolve_ingredient
+    # would tag "peanut butter" as dairy.
+    meta = load_ingredient_db().get(key)
+    if meta is not None:
+        return _canonical_masks().get(meta.get("_canonical", key), 0)
+    return _keyword_mask(key)
+
+
+def _ingredient_names(recipe: Dict[str, Any]) -> List[str]:
+    names = []
+    for ing in (recipe or {}).get("ingredients") or []:
+        if isinstance(ing, dict):
+            names.append(str(ing.get("name") or ing.get("ingredient") or "").lower())
+        else:
+            names.append(str(ing).lower())
+    return names
+
+
+def recipe_mask(recipe: Dict[str, Any], entries: Optional[Mapping[str, Mapping[str, Any]]] = None) -> int:
+    """OR of the class masks of all ingredients in a recipe.
+
+    entries defaults to the current ingredient DB; pass another one (e.g. when
+    building a data bundle) to compute masks against it, uncached.
+    """
+    mask = 0
+    for name in _ingredient_names(recipe):
+        if entries is None:
+            mask |= ingredient_mask(name)
+        elif name.strip():
+            mask |= _entry_mask(entries, name.strip())
+    return mask
+
+
+class Constraints(NamedTuple):
+    """Compiled constraints: a class bitmask plus dislikes that are plain ingredient names."""
+
+    mask: int
+    terms: Tuple[str, ...]
+
+
+def compile_constraints(dislikes: Iterable[str] = (), dietary: Iterable[str] = ()) -> Constraints:
+    mask = 0
+    terms: List[str] = []
+    for label in dietary or []:
+        mask |= DIET_MASKS.get(normalize_diet(label), 0)
+    for d in dislikes or []:
+        term = (d or "").strip().lower()
+        if not term:
+            continue
+        if term in TERM_MASKS:
+            mask |= TERM_MASKS[term]
+        elif term not in terms:
+            terms.append(term)
+    return Constraints(mask, tuple(terms))
+
+
+def allows(constraints: Constraints, recipe: Dict[str, Any], mask: Any = None) -> bool:
+    """Return True if the recipe (with optional precomputed mask) satisfies the constraints."""
+    if mask is None:
+        mask = recipe_mask(recipe)
+    if mask & constraints.mask:
+        return False
+    if constraints.terms:
+        names = _ingredient_names(recipe)
+        return not any(t in n for n in names for t in constraints.terms)
+    return True
@@ -1,10 +1,15 @@
-"""Grocery list utilities: store per-recipe items, aggregate across recipes, and apply overrides."""
+"""Grocery list utilities: store per-recipe items, aggregate across recipes, and apply overrides.
+
+Stored lists also keep a materialized aggregate that merge_recipe /
+remove_recipe / apply_override update incrementally, so a mutation costs the
+size of the change rather than the size of the list.
+"""
 
 from __future__ import annotations
 
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Iterable, Optional, Set, Tuple
 
-from .nutrition import resolve_ingredient, parse_quantity_to_grams
+from .nutrition import current_snapshot, resolve_ingredient, parse_quantity_to_grams
 
 
 def _maybe_strip(s: str) -> str:
@@ -37,6 +42,66 @@ def _normalize_recipes(recipes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     return normalized
 
 
+def _recipe_entries(recipe: Dict[str, Any]) -> List[Tuple[str, Dict[str, Any]]]:
+    """(ingredient key, entry) for every item of one normalized recipe."""
+    rname = recipe.get("name") or "recipe"
+    out = []
+    for ing in recipe.get("items") or []:
+        raw_name = _maybe_strip(ing.get("name") or "")
+        qty_text = _compose_quantity(ing.get("quantity"), ing.get("unit"))
+        norm, meta = resolve_ingredient(raw_name)
+        out.append((norm, {
+            "recipe": rname,
+            "name": raw_name,
+            "quantity": qty_text,
+            "aisle": (ing.get("aisle") or (meta.get("aisle") if meta else None)) or "Other",
+            "grams": parse_quantity_to_grams(qty_text, norm, meta),
+        }))
+    return out
+
+
+def _render_row(norm: str, entries: List[Dict[str, Any]], override: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Aggregated grocery row for one ingredient key (None when an override removes it)."""
+    if override and override.get("remove"):
+        return None
+    grams = 0.0
+    unknown = False
+    for e in entries:
+        if e["grams"] is not None:
+            grams += e["grams"]
+        else:
+            unknown = True
+    quantity_str = None
+    unit = None
+    if override and (override.get("quantity") or override.get("unit")):
+        quantity_str = (override.get("quantity") or "").strip()
+        unit = (override.get("unit") or "").strip() or None
+        aisle = override.get("aisle") or entries[0]["aisle"]
+    else:
+        aisle = entries[0]["aisle"]
+        if grams > 0:
+            quantity_str = f"{round(grams)}"
+            unit = "g"
+        elif entries:
+            quantity_str = entries[0]["quantity"] or ""
+            unit = ""
+    return {
+        "name": entries[0]["name"] or norm,
+        "quantity": quantity_str,
+        "unit": unit,
+        "aisle": aisle,
+        "recipes": sorted({e["recipe"] for e in entries}),
+        "unknown": unknown,
+        "key": norm,
+    }
+
+
+def _sorted_rows(rows: Iterable[Optional[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    items_out = [row for row in rows if row is not None]
+    items_out.sort(key=lambda x: (x["aisle"], x["name"]))
+    return items_out
+
+
 def aggregate_grocery(
     recipes: List[Dict[str, Any]],
     overrides: Optional[Dict[str, Dict[str, Any]]] = None,
@@ -46,95 +111,212 @@ def aggregate_grocery(
     pantry_set = {(_maybe_strip(p).lower()) for p in (pantry or []) if _maybe_strip(p)}
     overrides = overrides or {}
 
-    agg: Dict[str, Dict[str, Any]] = {}
+    groups: Dict[str, List[Dict[str, Any]]] = {}
     for recipe in _normalize_recipes(recipes):
-        rname = recipe.get("name") or "recipe"
-        for ing in recipe.get("items") or []:
-            raw_name = _maybe_strip(ing.get("name") or "")
-            qty_text = _compose_quantity(ing.get("quantity"), ing.get("unit"))
-            norm, meta = resolve_ingredient(raw_name)
-            if norm in pantry_set or raw_name.lower() in pantry_set:
+        for norm, entry in _recipe_entries(recipe):
+            if norm in pantry_set or entry["name"].lower() in pantry_set:
                 continue
+            groups.setdefault(norm, []).append(entry)
+    return {"items": _sorted_rows(_render_row(norm, entries, overrides.get(norm)) for norm, entries in groups.items())}
 
-            grams = parse_quantity_to_grams(qty_text, norm, meta)
-            item = agg.setdefault(norm, {
-                "name": raw_name or norm,
-                "grams": 0.0,
-                "aisle": (ing.get("aisle") or (meta.get("aisle") if meta else None)) or "Other",
-                "recipes": set(),
-                "unknown": False,
-                "raw_entries": [],
-            })
-            item["recipes"].add(rname)
-            item["raw_entries"].append({"quantity": qty_text, "name": raw_name})
-            if grams is not None:
-                item["grams"] += grams
-            else:
-                item["unknown"] = True
 
-    items_out = []
-    for norm, data in agg.items():
-        override = overrides.get(norm)
-        if override and override.get("remove"):
+# Stored lists keep a materialized aggregate next to list_data:
+#   {"stamp": <ingredient DB mtime>, "items": {key: {"entries": [...], "row": {...} | None}}}
+# Each entry is one recipe line with its parsed grams, so adding or removing a recipe
+# only touches the keys that recipe uses; rows are re-rendered per touched key.
+
+
+def _db_stamp() -> Optional[float]:
+    # grams and aisles depend on the ingredient DB; a different file invalidates the aggregate
+    return current_snapshot().mtime
+
+
+def build_aggregate(list_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Compute the materialized aggregate for stored list data from scratch."""
+    overrides = list_data.get("overrides") or {}
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    for recipe in _normalize_recipes(list_data.get("recipes") or []):
+        for norm, entry in _recipe_entries(recipe):
+            groups.setdefault(norm, []).append(entry)
+    return {
+        "stamp": _db_stamp(),
+        "items": {
+            norm: {"entries": entries, "row": _render_row(norm, entries, overrides.get(norm))}
+            for norm, entries in groups.items()
+        },
+    }
+
+
+class GroceryPatch:
+    """What a sequence of mutations changed, so callers can persist only that.
+
+    recipe_ops: ("remove", index) / ("append", recipe) applied in order to the stored recipes list.
+    overrides / items: new value per touched override / aggregate key (None = deleted).
+    rebuilt: the aggregate was recomputed wholesale and must be written in full.
+    """
+
+    def __init__(self) -> None:
+        self.recipe_ops: List[Tuple[str, Any]] = []
+        self.overrides: Dict[str, Optional[Dict[str, Any]]] = {}
+        self.items: Dict[str, Optional[Dict[str, Any]]] = {}
+        self.rebuilt = False
+
+    def __bool__(self) -> bool:
+        return bool(self.recipe_ops or self.overrides or self.items or self.rebuilt)
+
+
+def _has_current_aggregate(list_data: Dict[str, Any]) -> bool:
+    agg = list_data.get("aggregate")
+    return isinstance(agg, dict) and isinstance(agg.get("items"), dict) and agg.get("stamp") == _db_stamp()
+
+
+def ensure_aggregate(list_data: Dict[str, Any], patch: Optional[GroceryPatch] = None) -> bool:
+    """Make sure list_data carries a current aggregate; returns True when it had to be rebuilt."""
+    if _has_current_aggregate(list_data):
+        return False
+    list_data["aggregate"] = build_aggregate(list_data)
+    if patch is not None:
+        patch.rebuilt = True
+    return True
+
+
+def grocery_view(list_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Aggregated grocery view ({"items": [...]}) of stored list data."""
+    ensure_aggregate(list_data)
+    return {"items": _sorted_rows(item["row"] for item in list_data["aggregate"]["items"].values())}
+
+
+def _rerender(
+    agg: Dict[str, Any],
+    overrides: Dict[str, Dict[str, Any]],
+    keys: Iterable[str],
+    patch: Optional[GroceryPatch],
+) -> None:
+    items = agg["items"]
+    for norm in keys:
+        item = items.get(norm)
+        if item is None:
             continue
-        quantity_str = None
-        unit = None
-        if override and (override.get("quantity") or override.get("unit")):
-            quantity_str = (override.get("quantity") or "").strip()
-            unit = (override.get("unit") or "").strip() or None
-            aisle = override.get("aisle") or data["aisle"]
+        if not item["entries"]:
+            del items[norm]
+            item = None
         else:
-            aisle = data["aisle"]
-            if data["grams"] > 0:
-                quantity_str = f"{round(data['grams'])}"
-                unit = "g"
-            elif data["raw_entries"]:
-                quantity_str = data["raw_entries"][0]["quantity"] or ""
-                unit = ""
-        items_out.append({
-            "name": data["name"],
-            "quantity": quantity_str,
-            "unit": unit,
-            "aisle": aisle,
-            "recipes": sorted(list(data["recipes"])),
-            "unknown": bool(data["unknown"]),
-            "key": norm,
-        })
+            item["row"] = _render_row(norm, item["entries"], overrides.get(norm))
+        if patch is not None:
+            patch.items[norm] = item
 
-    items_out.sort(key=lambda x: (x["aisle"], x["name"]))
-    return {"items": items_out}
 
+def _drop_recipes(agg: Dict[str, Any], recipes: List[Dict[str, Any]]) -> Set[str]:
+    touched: Set[str] = set()
+    for recipe in _normalize_recipes(recipes):
+        rname = recipe.get("name") or "recipe"
+        keys = {resolve_ingredient(_maybe_strip(ing.get("name") or ""))[0] for ing in recipe["items"]}
+        for norm in keys:
+            item = agg["items"].get(norm)
+            if item is not None:
+                item["entries"] = [e for e in item["entries"] if e["recipe"] != rname]
+                touched.add(norm)
+    return touched
 
-def merge_recipe(list_data: Dict[str, Any], recipe: Dict[str, Any]) -> Dict[str, Any]:
-    """Upsert a recipe into stored grocery list data."""
-    base = {
-        "recipes": [r for r in (list_data.get("recipes") or []) if isinstance(r, dict)],
-        "overrides": list_data.get("overrides") or {},
-    }
-    recipes = [r for r in base["recipes"] if _maybe_strip(r.get("name")).lower() != _maybe_strip(recipe.get("name")).lower()]
-    recipes.append({"name": recipe.get("name"), "items": recipe.get("items") or []})
-    base["recipes"] = recipes
-    return base
 
+def _add_recipe(agg: Dict[str, Any], recipe: Dict[str, Any]) -> Set[str]:
+    touched: Set[str] = set()
+    for norm, entry in _recipe_entries(_normalize_recipes([recipe])[0]):
+        agg["items"].setdefault(norm, {"entries": [], "row": None})["entries"].append(entry)
+        touched.add(norm)
+    return touched
 
-def remove_recipe(list_data: Dict[str, Any], recipe_name: str) -> Dict[str, Any]:
-    base = {
-        "recipes": [r for r in (list_data.get("recipes") or []) if isinstance(r, dict)],
-        "overrides": list_data.get("overrides") or {},
-    }
-    recipes = [r for r in base["recipes"] if _maybe_strip(r.get("name")).lower() != _maybe_strip(recipe_name).lower()]
-    base["recipes"] = recipes
-    return base
 
+def _split_recipes(
+    list_data: Dict[str, Any],
+    name: Optional[str],
+    patch: Optional[GroceryPatch],
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """(kept, removed) stored recipes, matching name case-insensitively."""
+    target = _maybe_strip(name).lower()
+    kept: List[Dict[str, Any]] = []
+    removed: List[Dict[str, Any]] = []
+    removed_at: List[int] = []
+    for i, r in enumerate(list_data.get("recipes") or []):
+        if isinstance(r, dict) and _maybe_strip(r.get("name")).lower() == target:
+            removed.append(r)
+            removed_at.append(i)
+        elif isinstance(r, dict):
+            kept.append(r)
+    if patch is not None:
+        if any(not isinstance(r, dict) for r in list_data.get("recipes") or []):
+            # malformed entries are dropped too; indexes no longer line up, rewrite the list
+            patch.recipe_ops.append(("replace", kept))
+        else:
+            # highest index first so earlier removals do not shift later ones
+            patch.recipe_ops.extend(("remove", i) for i in reversed(removed_at))
+    return kept, removed
+
+
+def apply_bulk(
+    list_data: Dict[str, Any],
+    upserts: Iterable[Dict[str, Any]] = (),
+    removals: Iterable[str] = (),
+    overrides: Iterable[Tuple[str, Dict[str, Any]]] = (),
+    patch: Optional[GroceryPatch] = None,
+) -> Dict[str, Any]:
+    """Apply recipe removals, then upserts, then item overrides to stored list data.
 
-def apply_override(list_data: Dict[str, Any], item_key: str, override: Dict[str, Any]) -> Dict[str, Any]:
+    Touched aggregate keys are re-rendered once at the end; a missing or stale
+    aggregate is built once for the final list instead.
+    """
+    fresh = _has_current_aggregate(list_data)
     base = {
         "recipes": list_data.get("recipes") or [],
         "overrides": list_data.get("overrides") or {},
+        "aggregate": list_data.get("aggregate"),
     }
-    clean = {k: v for k, v in override.items() if k in ("quantity", "unit", "aisle", "remove") and v is not None}
-    if clean:
-        base["overrides"][item_key] = clean
-    elif item_key in base["overrides"]:
-        del base["overrides"][item_key]
+    touched: Set[str] = set()
+    for name in removals:
+        base["recipes"], removed = _split_recipes(base, name, patch)
+        if fresh:
+            touched |= _drop_recipes(base["aggregate"], removed)
+    for recipe in upserts:
+        kept, removed = _split_recipes(base, recipe.get("name"), patch)
+        stored = {"name": recipe.get("name"), "items": recipe.get("items") or []}
+        if patch is not None:
+            patch.recipe_ops.append(("append", stored))
+        base["recipes"] = kept + [stored]
+        if fresh:
+            touched |= _drop_recipes(base["aggregate"], removed) | _add_recipe(base["aggregate"], stored)
+    for item_key, override in overrides:
+        clean = {k: v for k, v in override.items() if k in ("quantity", "unit", "aisle", "remove") and v is not None}
+        if clean:
+            base["overrides"][item_key] = clean
+        elif item_key in base["overrides"]:
+            del base["overrides"][item_key]
+        else:
+            continue
+        if patch is not None:
+            patch.overrides[item_key] = clean or None
+        touched.add(item_key)
+    if fresh:
+        _rerender(base["aggregate"], base["overrides"], touched, patch)
+    else:
+        base["aggregate"] = build_aggregate(base)
+        if patch is not None:
+            patch.rebuilt = True
     return base
+
+
+def merge_recipe(list_data: Dict[str, Any], recipe: Dict[str, Any], patch: Optional[GroceryPatch] = None) -> Dict[str, Any]:
+    """Upsert a recipe into stored grocery list data, updating the aggregate for its items only."""
+    return apply_bulk(list_data, upserts=[recipe], patch=patch)
+
+
+def remove_recipe(list_data: Dict[str, Any], recipe_name: str, patch: Optional[GroceryPatch] = None) -> Dict[str, Any]:
+    return apply_bulk(list_data, removals=[recipe_name], patch=patch)
+
+
+def apply_override(
+    list_data: Dict[str, Any],
+    item_key: str,
+    override: Dict[str, Any],
+    patch: Optional[GroceryPatch] = None,
+) -> Dict[str, Any]:
+    return apply_bulk(list_data, overrides=[(item_key, override)], patch=patch)
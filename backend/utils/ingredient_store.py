@@ -0,0 +1,388 @@
+"""Compact, array-backed ingredient metadata store.
+
+Large nutrient databases (e.g. a 300k-row USDA import) do not fit the
+dict-of-dicts layout of data/ingredients.json: every entry costs several
+Python objects. Here each canonical ingredient gets an interned integer id;
+macros, density and count weights live in typed columns, aisles and tags are
+small lookup tables, and aliases are a separate name -> id table with an on-disk hash index,
+plus a per-id offset table listing each ingredient's aliases (id -> names).
+
+The same layout is used in memory and on disk. A prebuilt file can be
+memory-mapped (IngredientStore.open) so several workers share the pages.
+Lookups return IngredientMeta views, read-only mappings with the same keys
+as the JSON metadata, so resolve_ingredient and compute_recipe_nutrition
+work against the store unchanged.
+
+Build a binary store:
+    python -m backend.utils.ingredient_store data/ingredients.json data/ingredients.bin
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import mmap
+import struct
+import sys
+from array import array
+from zlib import crc32
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+MAGIC = b"SDIS"
+FORMAT_VERSION = 2
+MACRO_COLUMNS: Tuple[str, ...] = ("calories", "protein", "carbs", "fat", "fiber")
+# Metadata fields held in columns; anything else is kept per id in the header "extras"
+_COLUMN_FIELDS = {"per_100g", "density_g_per_cup", "count_g", "aisle", "aliases", "tags"}
+# Below this many names the alias table is also kept as a dict for O(1) lookups
+_DICT_INDEX_LIMIT = 50_000
+_HEADER = struct.Struct("<4sII")  # magic, format version, header JSON length
+_ALIGN = 8
+
+_NAN = float("nan")
+
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _pad(size: int) -> int:
+    return (-size) % _ALIGN
+
+
+class _Strings(Sequence[str]):
+    """Read-only string table: utf-8 blob + uint32 offsets."""
+
+    def __init__(self, offsets: memoryview, blob: memoryview):
+        self._offsets = offsets
+        self._blob = blob
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def raw(self, i: int) -> bytes:
+        return bytes(self._blob[self._offsets[i]:self._offsets[i + 1]])
+
+    def __getitem__(self, i):  # type: ignore[override]
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        return sys.intern(self.raw(i).decode("utf-8"))
+
+
+class IngredientMeta(Mapping[str, Any]):
+    """Read-only view of one ingredient's metadata in an IngredientStore."""
+
+    __slots__ = ("_store", "_id")
+
+    def __init__(self, store: "IngredientStore", ingredient_id: int):
+        self._store = store
+        self._id = ingredient_id
+
+    @property
+    def id(self) -> int:
+        return self._id
+
+    def _fields(self) -> List[str]:
+        s, i = self._store, self._id
+        fields = ["_canonical", "per_100g"]
+        if not math.isnan(s.density[i]):
+            fields.append("density_g_per_cup")
+        if not math.isnan(s.count_g[i]):
+            fields.append("count_g")
+        if s.aisle_ids[i]:
+            fields.append("aisle")
+        fields += ["aliases", "tags"]
+        fields += [k for k in s.extras.get(i, {}) if k not in fields]
+        return fields
+
+    def __getitem__(self, key: str) -> Any:
+        s, i = self._store, self._id
+        if key == "_canonical":
+            return s.names[i]
+        if key == "per_100g":
+            base = i * len(MACRO_COLUMNS)
+            return {k: s.macros[base + j] for j, k in enumerate(MACRO_COLUMNS) if not math.isnan(s.macros[base + j])}
+        if key == "density_g_per_cup" and not math.isnan(s.density[i]):
+            return s.density[i]
+        if key == "count_g" and not math.isnan(s.count_g[i]):
+            return s.count_g[i]
+        if key == "aisle" and s.aisle_ids[i]:
+            return s.aisles[s.aisle_ids[i]]
+        if key == "tags":
+            mask = s.tag_masks[i]
+            return tuple(t for b, t in enumerate(s.tag_names) if mask >> b & 1)
+        if key == "aliases":
+            return s.aliases_of(i)
+        extra = s.extras.get(i)
+        if extra is not None and key in extra:
+            return extra[key]
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._fields())
+
+    def __len__(self) -> int:
+        return len(self._fields())
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, IngredientMeta):
+            return other._store is self._store and other._id == self._id
+        return Mapping.__eq__(self, other)
+
+    def __hash__(self) -> int:
+        return hash((id(self._store), self._id))
+
+    def __repr__(self) -> str:
+        return f"IngredientMeta({self._store.names[self._id]!r})"
+
+
+class _Entries(Mapping[str, IngredientMeta]):
+    """name/alias -> IngredientMeta mapping over the store's key table."""
+
+    def __init__(self, store: "IngredientStore"):
+        self._store = store
+
+    def __getitem__(self, key: str) -> IngredientMeta:
+        i = self._store.lookup(key)
+        if i is None:
+            raise KeyError(key)
+        return IngredientMeta(self._store, i)
+
+    def get(self, key: str, default: Any = None) -> Any:  # type: ignore[override]
+        i = self._store.lookup(key)
+        return default if i is None else IngredientMeta(self._store, i)
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and self._store.lookup(key) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        keys = self._store.keys
+        # source order: each ingredient's name followed by its aliases
+        return (keys[k] for k in self._store.key_order)
+
+    def __len__(self) -> int:
+        return len(self._store.keys)
+
+
+class IngredientStore:
+    """Columnar ingredient metadata over a buffer (bytes or a read-only mmap)."""
+
+    def __init__(self, buf: Any):
+        view = memoryview(buf)
+        magic, fmt, header_len = _HEADER.unpack_from(view, 0)
+        if magic != MAGIC or fmt != FORMAT_VERSION:
+            raise ValueError("not an ingredient store (or unsupported format version)")
+        start = _HEADER.size
+        header = json.loads(bytes(view[start:start + header_len]).decode("utf-8"))
+        self._buf = buf
+        self.aisles: List[str] = [""] + header["aisles"]
+        self.tag_names: List[str] = header["tags"]
+        self.extras: Dict[int, Mapping[str, Any]] = {int(k): _freeze(v) for k, v in header["extras"].items()}
+        sections = {name: view[off:off + size] for name, (off, size) in header["sections"].items()}
+        self.macros = sections["macros"].cast("d")
+        self.density = sections["density"].cast("d")
+        self.count_g = sections["count_g"].cast("d")
+        self.tag_masks = sections["tag_masks"].cast("I")
+        self.aisle_ids = sections["aisle_ids"].cast("H")
+        self.names = _Strings(sections["name_offsets"].cast("I"), sections["name_blob"])
+        self.keys = _Strings(sections["key_offsets"].cast("I"), sections["key_blob"])
+        self.key_ids = sections["key_ids"].cast("I")
+        self.key_order = sections["key_order"].cast("I")
+        self.key_slots = sections["key_slots"].cast("I")
+        # aliases of id i: keys[alias_keys[alias_offsets[i]:alias_offsets[i + 1]]]
+        self.alias_offsets = sections["alias_offsets"].cast("I")
+        self.alias_keys = sections["alias_keys"].cast("I")
+        self._index: Optional[Dict[str, int]] = None
+        if len(self.keys) <= _DICT_INDEX_LIMIT:
+            self._index = {self.keys[k]: self.key_ids[k] for k in range(len(self.keys))}
+        self.entries: Mapping[str, IngredientMeta] = _Entries(self)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @classmethod
+    def open(cls, path: Path) -> "IngredientStore":
+        """Memory-map a store written by write_store (pages are shared between processes)."""
+        with open(path, "rb") as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    @classmethod
+    def from_raw(cls, raw: Mapping[str, Any]) -> "IngredientStore":
+        """Build an in-memory store from ingredients.json-shaped data."""
+        return cls(build_store_bytes(raw))
+
+    def lookup(self, key: str) -> Optional[int]:
+        """Return the ingredient id for a normalized name or alias."""
+        if self._index is not None:
+            return self._index.get(key)
+        # open-addressing table in the file: slot -> key index + 1 (0 = empty)
+        target = key.encode("utf-8")
+        slots = self.key_slots
+        mask = len(slots) - 1
+        pos = crc32(target) & mask
+        while True:
+            k = slots[pos]
+            if not k:
+                return None
+            if self.keys.raw(k - 1) == target:
+                return self.key_ids[k - 1]
+            pos = (pos + 1) & mask
+
+    def aliases_of(self, ingredient_id: int) -> Tuple[str, ...]:
+        start, end = self.alias_offsets[ingredient_id], self.alias_offsets[ingredient_id + 1]
+        return tuple(self.keys[k] for k in self.alias_keys[start:end])
+
+
+def _as_float(value: Any) -> float:
+    try:
+        return float(value) if value not in (None, "") else _NAN
+    except (TypeError, ValueError):
+        return _NAN
+
+
+def _hash_slots(keys: List[str]) -> array:
+    """Open-addressing table (load factor <= 0.5): slot -> key index + 1, 0 when empty."""
+    size = 1
+    while size < 2 * len(keys):
+        size *= 2
+    slots = array("I", bytes(4 * size))
+    mask = size - 1
+    for k, key in enumerate(keys):
+        pos = crc32(key.encode("utf-8")) & mask
+        while slots[pos]:
+            pos = (pos + 1) & mask
+        slots[pos] = k + 1
+    return slots
+
+
+def build_store_bytes(raw: Mapping[str, Any]) -> bytes:
+    """Serialize ingredients.json-shaped data into the store's binary layout."""
+    names: List[str] = []
+    ids: Dict[str, int] = {}
+    keys: Dict[str, int] = {}
+    macros, density, count_g = array("d"), array("d"), array("d")
+    tag_masks, aisle_ids = array("I"), array("H")
+    aisles: Dict[str, int] = {}
+    tags: Dict[str, int] = {}
+    extras: Dict[str, Dict[str, Any]] = {}
+
+    for base_name, meta in raw.items():
+        if not isinstance(meta, Mapping):
+            continue
+        key = base_name.strip().lower()
+        if key in ids:
+            continue
+        i = ids[key] = len(names)
+        names.append(key)
+        keys[key] = i
+        per_100 = meta.get("per_100g") or {}
+        macros.extend(_as_float(per_100[k]) if k in per_100 else _NAN for k in MACRO_COLUMNS)
+        density.append(_as_float(meta.get("density_g_per_cup")))
+        count_g.append(_as_float(meta.get("count_g")))
+        aisle = meta.get("aisle")
+        aisle_ids.append(aisles.setdefault(aisle, len(aisles) + 1) if aisle else 0)
+        mask = 0
+        for t in meta.get("tags") or []:
+            if len(tags) >= 32 and t not in tags:
+                raise ValueError("ingredient store supports at most 32 distinct tags")
+            mask |= 1 << tags.setdefault(str(t), len(tags))
+        tag_masks.append(mask)
+        extra = {k: v for k, v in meta.items() if k not in _COLUMN_FIELDS}
+        if extra:
+            extras[str(i)] = extra
+        for alias in meta.get("aliases") or []:
+            if alias:
+                keys.setdefault(str(alias).strip().lower(), i)
+
+    insertion = {k: n for n, k in enumerate(keys)}
+    sorted_keys = sorted(keys, key=lambda k: k.encode("utf-8"))
+    position = {k: j for j, k in enumerate(sorted_keys)}
+    # per-id alias lists in source order (aliases claimed by an earlier ingredient stay with it)
+    by_id: List[List[int]] = [[] for _ in names]
+    for k, i in keys.items():
+        if k != names[i]:
+            by_id[i].append(position[k])
+    alias_offsets, alias_keys = array("I", [0]), array("I")
+    for members in by_id:
+        alias_keys.extend(members)
+        alias_offsets.append(len(alias_keys))
+
+    def string_table(strings: List[str]) -> Tuple[bytes, bytes]:
+        offsets, blob = array("I", [0]), bytearray()
+        for s in strings:
+            blob += s.encode("utf-8")
+            offsets.append(len(blob))
+        return offsets.tobytes(), bytes(blob)
+
+    name_offsets, name_blob = string_table(names)
+    key_offsets, key_blob = string_table(sorted_keys)
+    blobs = [
+        ("macros", macros.tobytes()),
+        ("density", density.tobytes()),
+        ("count_g", count_g.tobytes()),
+        ("tag_masks", tag_masks.tobytes()),
+        ("aisle_ids", aisle_ids.tobytes()),
+        ("name_offsets", name_offsets),
+        ("name_blob", name_blob),
+        ("key_offsets", key_offsets),
+        ("key_blob", key_blob),
+        ("key_ids", array("I", (keys[k] for k in sorted_keys)).tobytes()),
+        ("key_order", array("I", sorted(range(len(sorted_keys)), key=lambda j: insertion[sorted_keys[j]])).tobytes()),
+        ("key_slots", _hash_slots(sorted_keys).tobytes()),
+        ("alias_offsets", alias_offsets.tobytes()),
+        ("alias_keys", alias_keys.tobytes()),
+    ]
+    tables = {
+        "aisles": sorted(aisles, key=aisles.get),
+        "tags": sorted(tags, key=tags.get),
+        "extras": extras,
+    }
+
+    # Section offsets depend on the header length; lay out until it is stable
+    offset_guess = 0
+    while True:
+        sections: Dict[str, Tuple[int, int]] = {}
+        pos = offset_guess
+        for name, data in blobs:
+            sections[name] = (pos, len(data))
+            pos += len(data) + _pad(len(data))
+        header = json.dumps(dict(tables, sections=sections), separators=(",", ":")).encode("utf-8")
+        data_start = _HEADER.size + len(header)
+        data_start += _pad(data_start)
+        if data_start == offset_guess:
+            break
+        offset_guess = data_start
+
+    out = bytearray(_HEADER.pack(MAGIC, FORMAT_VERSION, len(header)))
+    out += header
+    out += b"\0" * _pad(len(out))
+    for _, data in blobs:
+        out += data
+        out += b"\0" * _pad(len(data))
+    return bytes(out)
+
+
+def write_store(raw: Mapping[str, Any], path: Path) -> None:
+    """Write a binary store for raw (ingredients.json-shaped) metadata to path."""
+    Path(path).write_bytes(build_store_bytes(raw))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = sys.argv[1:] if argv is None else argv
+    if len(args) != 2:
+        raise SystemExit("usage: python -m backend.utils.ingredient_store <ingredients.json> <out.bin>")
+    raw = json.loads(Path(args[0]).read_text(encoding="utf-8"))
+    write_store(raw, Path(args[1]))
+    store = IngredientStore.open(Path(args[1]))
+    print(f"wrote {args[1]}: {len(store)} ingredients, {len(store.keys)} names")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""Multi-pattern phrase matcher (Aho-Corasick) with word-boundary checks.
+
+Compiles a set of phrases once and finds all of them in a single linear pass
+over the text, independent of how many phrases were compiled. Matching is
+case-insensitive; a match only counts when it is not part of a larger word
+("egg" does not match inside "eggplant").
+
+Usage:
+    m = PhraseMatcher({"milk": "oat milk", "eggs": "flax egg"})
+    m.replace("Whisk milk and eggs", lambda start, end, payload: payload)
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+Match = Tuple[int, int, Any]
+
+
+def _is_word_char(c: str) -> bool:
+    return c.isalnum() or c in "_-"
+
+
+def _lower(text: str) -> str:
+    low = text.lower()
+    if len(low) == len(text):
+        return low
+    # a few characters change length when lowered; keep offsets aligned with the original
+    return "".join(c.lower() if len(c.lower()) == 1 else c for c in text)
+
+
+class PhraseMatcher:
+    """Aho-Corasick automaton over lowercased phrases, each carrying a payload."""
+
+    def __init__(self, phrases: Dict[str, Any]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[Tuple[int, Any], ...]] = [()]
+        own: List[List[Tuple[int, Any]]] = [[]]
+        for phrase, payload in phrases.items():
+            phrase = " ".join(_lower(phrase).split())
+            if not phrase:
+                continue
+            node = 0
+            for ch in phrase:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                    own.append([])
+                node = nxt
+            own[node] = [(len(phrase), payload)]
+        self._build(own)
+
+    def _build(self, own: List[List[Tuple[int, Any]]]) -> None:
+        queue = deque()
+        for child in self._goto[0].values():
+            self._out[child] = tuple(own[child])
+            queue.append(child)
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[child] = self._goto[f].get(ch, 0)
+                self._out[child] = tuple(own[child]) + self._out[self._fail[child]]
+                queue.append(child)
+
+    def __bool__(self) -> bool:
+        return len(self._goto) > 1
+
+    def find_all(self, text: str) -> List[Match]:
+        """Return every word-bounded match (possibly overlapping) as (start, end, payload)."""
+        if not text or not self:
+            return []
+        low = _lower(text)
+        n = len(low)
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        matches: List[Match] = []
+        for i, ch in enumerate(low):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if not out[node]:
+                continue
+            end = i + 1
+            if end < n and _is_word_char(low[end]):
+                continue
+            for length, payload in out[node]:
+                start = end - length
+                if start > 0 and _is_word_char(low[start - 1]):
+                    continue
+                matches.append((start, end, payload))
+        return matches
+
+    def finditer(self, text: str) -> List[Match]:
+        """Return non-overlapping matches, preferring the leftmost and then the longest."""
+        return select_longest(self.find_all(text))
+
+    def search(self, text: str) -> bool:
+        return bool(self.find_all(text))
+
+    def replace(self, text: str, repl: Callable[[int, int, Any], str]) -> str:
+        """Rewrite every selected match with repl(start, end, payload) in one pass."""
+        matches = self.finditer(text)
+        if not matches:
+            return text
+        parts: List[str] = []
+        pos = 0
+        for start, end, payload in matches:
+            parts.append(text[pos:start])
+            parts.append(repl(start, end, payload))
+            pos = end
+        parts.append(text[pos:])
+        return "".join(parts)
+
+
+def select_longest(matches: Iterable[Match]) -> List[Match]:
+    """Pick non-overlapping matches: leftmost first, longest on ties."""
+    chosen: List[Match] = []
+    pos = 0
+    for start, end, payload in sorted(matches, key=lambda m: (m[0], -(m[1] - m[0]))):
+        if start >= pos:
+            chosen.append((start, end, payload))
+            pos = end
+    return chosen
+
+
+def plural_forms(phrase: str) -> List[str]:
+    """Return phrase with simple English plural/singular variants ("tomato" -> "tomatoes")."""
+    phrase = " ".join(phrase.lower().split())
+    if not phrase:
+        return []
+    forms = [phrase]
+    if phrase.endswith("y") and len(phrase) > 2 and phrase[-2] not in "aeiou":
+        forms.append(phrase[:-1] + "ies")
+    elif phrase.endswith(("s", "x", "z", "ch", "sh")):
+        forms.append(phrase + "es")
+    elif phrase.endswith("o"):
+        forms.extend([phrase + "es", phrase + "s"])
+    else:
+        forms.append(phrase + "s")
+    if phrase.endswith("ies") and len(phrase) > 4:
+        forms.append(phrase[:-3] + "y")
+    elif phrase.endswith(("oes", "ches", "shes", "xes")):
+        forms.append(phrase[:-2])
+    elif phrase.endswith("s") and not phrase.endswith("ss") and len(phrase) > 3:
+        forms.append(phrase[:-1])
+    return forms
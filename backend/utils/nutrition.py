@@ -7,12 +7,18 @@ nutrition for a recipe. Designed to be robust to partially specified quantities.
 from __future__ import annotations
 
 import json
+import os
 import re
+import threading
+import time
 from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Tuple, Optional, Any, List
+from typing import Dict, Tuple, Optional, Any, Callable, List, Mapping, NamedTuple, Set, TypeVar
 
 from .logging_utils import get_logger
+from .bundle import bundle_path, load_bundle
+from .ingredient_store import IngredientStore
+from .quantity import parse_quantity_to_grams, split_quantity  # noqa: F401 (re-exported)
 
 logger = get_logger(__name__)
 
@@ -23,242 +29,361 @@ def _ingredients_path() -> Path:
     return Path(__file__).resolve().parent.parent.parent / "data" / "ingredients.json"
 
 
-@lru_cache(maxsize=1)
-def load_ingredient_db() -> Dict[str, Dict[str, Any]]:
-    """Load ingredient metadata and normalize keys/aliases."""
-    path = _ingredients_path()
+def _store_path() -> Optional[Path]:
+    """Prebuilt binary store to memory-map instead of parsing ingredients.json (optional)."""
+    path = os.getenv("INGREDIENT_STORE_PATH")
+    return Path(path) if path else None
+
+
+class IngredientSnapshot(NamedTuple):
+    """Immutable, versioned view of the ingredient DB (name/alias -> metadata)."""
+
+    version: int
+    mtime: Optional[float]
+    store: IngredientStore
+
+    @property
+    def entries(self) -> Mapping[str, Mapping[str, Any]]:
+        return self.store.entries
+
+
+_EMPTY_SNAPSHOT = IngredientSnapshot(0, None, IngredientStore.from_raw({}))
+# Replaced wholesale on reload; readers grab the reference once and keep a consistent view
+_SNAPSHOT: IngredientSnapshot = _EMPTY_SNAPSHOT
+_SNAPSHOT_LOCK = threading.Lock()
+
+T = TypeVar("T")
+
+
+def _read_ingredients(path: Path) -> Optional[Dict[str, Any]]:
     if not path.exists():
         logger.warning("ingredients.json not found; nutrition will be unavailable")
-        return {}
+        return None
     try:
-        raw = json.loads(path.read_text(encoding="utf-8"))
+        return json.loads(path.read_text(encoding="utf-8"))
     except Exception as exc:  # pragma: no cover - runtime safety
         logger.warning("Failed to read ingredients.json: %s", exc)
-        return {}
+        return None
 
-    db: Dict[str, Dict[str, Any]] = {}
-    for base_name, meta in raw.items():
-        if not isinstance(meta, dict):
-            continue
-        key = base_name.strip().lower()
-        meta["_canonical"] = key
-        db[key] = meta
-        for alias in meta.get("aliases") or []:
-            if not alias:
-                continue
-            a_key = str(alias).strip().lower()
-            db[a_key] = meta
-    return db
 
+def _source() -> Tuple[Path, str]:
+    """Where the ingredient DB comes from: a binary store, the data bundle or ingredients.json."""
+    store = _store_path()
+    if store is not None:
+        return store, "store"
+    bundle = bundle_path()
+    if bundle is not None:
+        return bundle, "bundle"
+    return _ingredients_path(), "json"
 
-def resolve_ingredient(name: str) -> Tuple[str, Optional[Dict[str, Any]]]:
-    """Return (canonical_name, metadata) if known, else (normalized_name, None)."""
-    key = (name or "").strip().lower()
-    db = load_ingredient_db()
-    meta = db.get(key)
-    if meta:
-        return meta.get("_canonical", key), meta
-    # best-effort: match contains
-    for k, m in db.items():
-        if k in key:
-            return m.get("_canonical", k), m
-    return key, None
-
-
-# ---------- Quantity parsing ---------- #
-
-_UNIT_MAP = {
-    "g": "g",
-    "gram": "g",
-    "grams": "g",
-    "kg": "kg",
-    "kilogram": "kg",
-    "kilograms": "kg",
-    "mg": "mg",
-    "milligram": "mg",
-    "milligrams": "mg",
-    "ml": "ml",
-    "milliliter": "ml",
-    "milliliters": "ml",
-    "l": "l",
-    "liter": "l",
-    "liters": "l",
-    "cup": "cup",
-    "cups": "cup",
-    "tbsp": "tbsp",
-    "tablespoon": "tbsp",
-    "tablespoons": "tbsp",
-    "tbsps": "tbsp",
-    "tsp": "tsp",
-    "teaspoon": "tsp",
-    "teaspoons": "tsp",
-    "tsps": "tsp",
-    "oz": "oz",
-    "ounce": "oz",
-    "ounces": "oz",
-    "lb": "lb",
-    "lbs": "lb",
-    "pound": "lb",
-    "pounds": "lb",
-    "clove": "clove",
-    "cloves": "clove",
-    "can": "can",
-    "cans": "can",
-    "slice": "slice",
-    "slices": "slice",
-    "piece": "piece",
-    "pieces": "piece",
-}
-
-
-def _parse_number(token: str) -> Optional[float]:
-    """Parse numbers like '1', '1.5', '1/2', '1 1/2'."""
-    token = token.strip()
-    if not token:
-        return None
-    # mixed number "1 1/2"
-    if " " in token:
-        parts = token.split()
-        total = 0.0
-        for p in parts:
-            try:
-                total += float(p)
-                continue
-            except ValueError:
-                pass
-            if "/" in p:
-                try:
-                    num, den = p.split("/", 1)
-                    total += float(num) / float(den)
-                except Exception:
-                    return None
-        return total if total > 0 else None
-    # fraction "1/2"
-    if "/" in token:
+
+def _load_store(path: Path, kind: str) -> Optional[IngredientStore]:
+    """Use the bundle's ingredient section, open a binary store (memory-mapped) or compile ingredients.json."""
+    if kind == "bundle":
+        bundle = load_bundle()
+        return bundle.ingredients if bundle is not None else None
+    if kind == "store":
         try:
-            num, den = token.split("/", 1)
-            return float(num) / float(den)
-        except Exception:
+            return IngredientStore.open(path)
+        except Exception as exc:  # pragma: no cover - runtime safety
+            logger.warning("Failed to open ingredient store %s: %s", path, exc)
             return None
+    raw = _read_ingredients(path)
+    return IngredientStore.from_raw(raw) if raw is not None else None
+
+
+def _file_mtime(path: Path) -> Optional[float]:
     try:
-        return float(token)
-    except ValueError:
+        return path.stat().st_mtime
+    except FileNotFoundError:
         return None
 
 
-def parse_quantity_to_grams(quantity: str, name: str, meta: Optional[Dict[str, Any]]) -> Optional[float]:
-    """Convert a freeform quantity string to grams using densities when available."""
-    if not quantity:
-        return None
-    qty = quantity.lower().strip()
-    # quick path: detect simple numbers with units
-    match = re.match(r"([0-9./\s]+)\s*([a-zA-Z]+)?", qty)
-    amount = _parse_number(match.group(1)) if match else None
-    unit_token = (match.group(2).lower() if match and match.group(2) else "").strip()
-    unit = _UNIT_MAP.get(unit_token, unit_token or "")
-
-    if amount is None:
-        return None
+def reload_ingredient_db(force: bool = False) -> bool:
+    """Rebuild the snapshot if the source file changed (or force) and swap it in.
+
+    The new snapshot is built completely before the swap; a file that fails to
+    load keeps the current snapshot. Returns True when a new version was installed.
+    """
+    global _SNAPSHOT
+    path, kind = _source()
+    with _SNAPSHOT_LOCK:
+        current = _SNAPSHOT
+        mtime = _file_mtime(path)
+        if current.version and not force and mtime == current.mtime:
+            return False
+        store = _load_store(path, kind)
+        if store is None and current.version:
+            return False
+        _SNAPSHOT = IngredientSnapshot(current.version + 1, mtime, store or _EMPTY_SNAPSHOT.store)
+    logger.info("Loaded ingredient DB v%d (%d ingredients) from %s", _SNAPSHOT.version, len(_SNAPSHOT.store), path.name)
+    return True
+
+
+def current_snapshot() -> IngredientSnapshot:
+    snap = _SNAPSHOT
+    if not snap.version:
+        reload_ingredient_db()
+        snap = _SNAPSHOT
+    return snap
+
+
+def load_ingredient_db() -> Mapping[str, Mapping[str, Any]]:
+    """Ingredient metadata keyed by normalized name and alias (current snapshot)."""
+    return current_snapshot().entries
+
+
+def ingredient_db_version() -> int:
+    """Version of the current snapshot; caches derived from the DB key on it."""
+    return current_snapshot().version
+
+
+def per_snapshot(build: Callable[[IngredientSnapshot], T]) -> Callable[[], T]:
+    """Memoize build(snapshot) for the current snapshot; rebuilt after a reload."""
+    held: List[Any] = [None]
+
+    def get() -> T:
+        snap = current_snapshot()
+        entry = held[0]
+        if entry is None or entry[0] != snap.version:
+            entry = (snap.version, build(snap))
+            held[0] = entry
+        return entry[1]
+
+    get.__doc__ = build.__doc__
+    return get
+
+
+def watch_ingredient_db(interval: float) -> threading.Thread:
+    """Poll ingredients.json every interval seconds and reload it off the request path."""
+
+    def run() -> None:
+        while True:
+            time.sleep(interval)
+            try:
+                reload_ingredient_db()
+            except Exception as exc:  # pragma: no cover - keep the watcher alive
+                logger.warning("Ingredient DB reload failed: %s", exc)
+
+    thread = threading.Thread(target=run, name="ingredient-db-watcher", daemon=True)
+    thread.start()
+    return thread
+
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:['-][a-z0-9]+)*")
+_TERMINAL = "\0"
+_RESOLVE_CACHE_SIZE = 8192
+# Preparation notes: "garlic cloves, minced", "butter (softened)", "1 (14 oz) can tomatoes"
+_PAREN_RE = re.compile(r"\([^)]*\)")
+_NOTE_RE = re.compile(r"[,;(]")
+# Words that may surround a partial match without changing which ingredient it is
+# (singular forms, as produced by _tokens). Any other extra word ("peanut" in
+# "peanut butter", "broth" in "beef broth") makes the name unknown.
+_DESCRIPTORS = frozenset("""
+    a an the of and about extra fresh frozen dried raw cooked chopped diced minced sliced grated shredded
+    crushed cubed halved quartered peeled seeded trimmed rinsed drained beaten sifted packed softened melted
+    room temperature cold warm hot large medium small whole unsalted salted lean boneless skinless organic
+    ripe plain finely roughly thinly lightly firmly low-fat fat-free reduced-fat skim cup tablespoon tbsp
+    teaspoon tsp g gram kg oz ounce lb pound ml l liter litre pinch handful dash
+""".split())
+# Form/portion words allowed on either side: "garlic clove", "3 cloves garlic", "can tomatoes"
+_FORM_WORDS = frozenset("clove slice stick piece fillet sprig leaf cube wedge strip stalk floret can jar bunch".split())
+
+
+def singularize(token: str) -> str:
+    """Cheap English singular form for one token ("tomatoes" -> "tomato")."""
+    if len(token) <= 3 or token.endswith(("ss", "us", "is")):
+        return token
+    if token.endswith("ies"):
+        return token[:-3] + "y"
+    if token.endswith(("oes", "ches", "shes", "xes", "zes")):
+        return token[:-2]
+    if token.endswith("s"):
+        return token[:-1]
+    return token
+
+
+def _tokens(text: str) -> List[str]:
+    return [singularize(t) for t in _TOKEN_RE.findall(text.lower())]
+
+
+class IngredientResolver:
+    """Precompiled name -> ingredient resolver.
+
+    Lookup order: exact/alias hash, singularized hash, then the longest
+    token sequence found in a trie of known names (rightmost on ties). A partial
+    match must contain the head noun, i.e. the last word before any preparation
+    note ("garlic cloves, minced" -> "garlic clove"), and every other word must be
+    a plain descriptor or portion word. Otherwise the name is unknown: "peanut
+    butter", "coconut milk" and "chicken broth" are different ingredients from
+    "butter", "milk" and "chicken". Whole tokens only, so "buttermilk" does not
+    resolve to "milk". Results are kept in an LRU keyed on the normalized name.
+    """
+
+    def __init__(self, db: Mapping[str, Mapping[str, Any]], cache_size: int = _RESOLVE_CACHE_SIZE):
+        self._exact = db
+        self._singular: Dict[str, Mapping[str, Any]] = {}
+        self._trie: Dict[str, Any] = {}
+        for key, meta in db.items():
+            tokens = _tokens(key)
+            if not tokens:
+                continue
+            self._singular.setdefault(" ".join(tokens), meta)
+            node = self._trie
+            for t in tokens:
+                node = node.setdefault(t, {})
+            node.setdefault(_TERMINAL, meta)
+        self.resolve = lru_cache(maxsize=cache_size)(self._resolve)
+
+    def _longest_match(self, tokens: List[str]) -> Optional[Dict[str, Any]]:
+        best: Optional[Dict[str, Any]] = None
+        best_span = (0, 0)
+        for start in range(len(tokens)):
+            node = self._trie
+            for i in range(start, len(tokens)):
+                node = node.get(tokens[i])
+                if node is None:
+                    break
+                if _TERMINAL in node and i + 1 - start >= best_span[1] - best_span[0]:
+                    best, best_span = node[_TERMINAL], (start, i + 1)
+        if best is None:
+            return None
+        start, end = best_span
+        head = len(tokens) - 1
+        while head > end - 1 and (tokens[head] in _DESCRIPTORS or tokens[head] in _FORM_WORDS):
+            head -= 1
+        # the match has to be the head noun phrase, not a modifier of some other food
+        if head != end - 1:
+            return None
+        if not all(t in _DESCRIPTORS or t in _FORM_WORDS or t[0].isdigit() for t in tokens[:start]):
+            return None
+        return best
+
+    def _resolve(self, key: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+        meta = self._exact.get(key)
+        if meta is None:
+            tokens = _tokens(_NOTE_RE.split(_PAREN_RE.sub(" ", key), 1)[0])
+            meta = self._singular.get(" ".join(tokens)) or self._longest_match(tokens)
+        if meta is None:
+            return key, None
+        return meta.get("_canonical", key), meta
+
+
+@per_snapshot
+def get_resolver(snap: IngredientSnapshot) -> IngredientResolver:
+    return IngredientResolver(snap.entries)
+
+
+@per_snapshot
+def names_by_canonical(snap: IngredientSnapshot) -> Dict[str, Set[str]]:
+    """canonical ingredient -> every surface name the DB knows for it."""
+    names: Dict[str, Set[str]] = {}
+    for key, meta in snap.entries.items():
+        names.setdefault(meta.get("_canonical", key), set()).add(key)
+    return names
 
-    # mass units
-    if unit in ("g", ""):
-        if unit == "" and meta and meta.get("count_g"):
-            return amount * float(meta["count_g"])
-        return amount
-    if unit == "mg":
-        return amount / 1000.0
-    if unit == "kg":
-        return amount * 1000.0
-    if unit == "oz":
-        return amount * 28.3495
-    if unit == "lb":
-        return amount * 453.592
-
-    # count-based items (eggs, cloves)
-    if unit in ("clove", "slice", "piece", "can") or "whole" in qty:
-        if meta and meta.get("count_g"):
-            return amount * float(meta["count_g"])
-        return None
 
-    # volume → grams via density
-    density = None
-    if meta and meta.get("density_g_per_cup"):
-        density = float(meta["density_g_per_cup"])
-    elif meta and meta.get("count_g"):
-        density = float(meta["count_g"])  # last-resort approximation
-    else:
-        density = 240.0  # approximate water density per cup
-
-    if unit == "cup":
-        return amount * density
-    if unit == "tbsp":
-        return amount * (density / 16.0)
-    if unit == "tsp":
-        return amount * (density / 48.0)
-    if unit == "ml":
-        return amount * (density / 240.0)
-    if unit == "l":
-        return amount * (density / 0.24)
-
-    return None
+def resolve_ingredient(name: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+    """Return (canonical_name, metadata) if known, else (normalized_name, None)."""
+    key = " ".join((name or "").lower().split())
+    return get_resolver().resolve(key)
 
 
 # ---------- Nutrition computation ---------- #
 
-def compute_recipe_nutrition(recipe: Dict[str, Any]) -> Tuple[Dict[str, str], List[str]]:
-    """Return (nutrition_per_serving, unknown_items)."""
-    ingredients = recipe.get("ingredients") or []
+MACRO_KEYS: Tuple[str, ...] = ("calories", "protein", "carbs", "fat", "fiber")
+_MACRO_UNITS = {"calories": "kcal", "protein": "g", "carbs": "g", "fat": "g", "fiber": "g"}
+
+
+def recipe_servings(recipe: Dict[str, Any]) -> int:
     servings = recipe.get("servings") or 1
     try:
-        servings = max(1, int(servings))
+        return max(1, int(servings))
     except Exception:
-        servings = 1
+        return 1
 
-    totals = {"calories": 0.0, "protein": 0.0, "carbs": 0.0, "fat": 0.0, "fiber": 0.0}
-    unknown: List[str] = []
 
-    for ing in ingredients:
-        if isinstance(ing, dict):
-            raw_name = str(ing.get("name") or ing.get("ingredient") or "")
-            qty = str(ing.get("quantity") or "")
-        else:
-            raw_name = str(ing)
-            qty = ""
-        norm_name, meta = resolve_ingredient(raw_name)
-        grams = parse_quantity_to_grams(qty, norm_name, meta)
-        if not meta or grams is None:
-            unknown.append(raw_name)
-            continue
-        per_100 = meta.get("per_100g") or {}
-        factor = grams / 100.0
-        for k in totals.keys():
-            try:
-                totals[k] += float(per_100.get(k, 0)) * factor
-            except Exception:
-                continue
+def ingredient_line(ing: Any) -> Tuple[str, str]:
+    """Return (raw_name, quantity) for an ingredient entry (dict or plain string)."""
+    if isinstance(ing, dict):
+        return str(ing.get("name") or ing.get("ingredient") or ""), str(ing.get("quantity") or "")
+    return str(ing), ""
 
-    per_serving = {k: (v / servings) for k, v in totals.items()}
 
-    def fmt(val: float, unit: str) -> str:
-        return f"{round(val)} {unit}"
+def format_nutrition(per_serving: Dict[str, float]) -> Dict[str, str]:
+    return {k: f"{round(per_serving[k])} {_MACRO_UNITS[k]}" for k in MACRO_KEYS}
 
-    nutrition_out = {
-        "calories": fmt(per_serving["calories"], "kcal"),
-        "protein": fmt(per_serving["protein"], "g"),
-        "carbs": fmt(per_serving["carbs"], "g"),
-        "fat": fmt(per_serving["fat"], "g"),
-        "fiber": fmt(per_serving["fiber"], "g"),
-    }
-    return nutrition_out, unknown
+
+def canonical_ingredients(recipe: Dict[str, Any]) -> List[str]:
+    """Sorted, de-duplicated canonical names of a recipe's ingredients (unknown ones normalized)."""
+    names = set()
+    for ing in (recipe or {}).get("ingredients") or []:
+        raw_name = ingredient_line(ing)[0]
+        if raw_name.strip():
+            names.add(resolve_ingredient(raw_name)[0])
+    return sorted(names)
+
+
+def line_fingerprint(ing: Any) -> Tuple[str, str]:
+    """Normalized (name, quantity) identifying an ingredient line for caching."""
+    raw_name, qty = ingredient_line(ing)
+    return " ".join(raw_name.lower().split()), " ".join(qty.lower().split())
+
+
+def line_nutrition(name: str, quantity: str) -> Optional[Tuple[float, ...]]:
+    """Macro totals (MACRO_KEYS order) for one ingredient line, or None if unknown.
+
+    Shared process-wide: the same "2 cloves garlic" line recurs across recipes.
+    """
+    return _line_nutrition(name, quantity, ingredient_db_version())
+
+
+@lru_cache(maxsize=65536)
+def _line_nutrition(name: str, quantity: str, version: int) -> Optional[Tuple[float, ...]]:
+    norm_name, meta = resolve_ingredient(name)
+    grams = parse_quantity_to_grams(quantity, norm_name, meta)
+    if not meta or grams is None:
+        return None
+    per_100 = meta.get("per_100g") or {}
+    factor = grams / 100.0
+    values = []
+    for k in MACRO_KEYS:
+        try:
+            values.append(float(per_100.get(k, 0)) * factor)
+        except Exception:
+            values.append(0.0)
+    return tuple(values)
+
+
+def compute_recipe_nutrition(recipe: Dict[str, Any]) -> Tuple[Dict[str, str], List[str]]:
+    """Return (nutrition_per_serving, unknown_items)."""
+    servings = recipe_servings(recipe)
+    totals = [0.0] * len(MACRO_KEYS)
+    unknown: List[str] = []
+
+    for ing in recipe.get("ingredients") or []:
+        values = line_nutrition(*line_fingerprint(ing))
+        if values is None:
+            unknown.append(ingredient_line(ing)[0])
+            continue
+        for i, v in enumerate(values):
+            totals[i] += v
+
+    return format_nutrition({k: v / servings for k, v in zip(MACRO_KEYS, totals)}), unknown
 
 
 def annotate_recipe_nutrition(recipe: Dict[str, Any]) -> Dict[str, Any]:
-    """Return recipe with nutrition computed/augmented."""
+    """Return recipe with nutrition computed/augmented.
+
+    Only lines not seen before (under this ingredient DB) are looked up; the rest
+    come from the process-wide per-line cache (line_nutrition).
+    """
     if not recipe:
         return recipe
     nutrition, unknown = compute_recipe_nutrition(recipe)
     out = dict(recipe)
     out["nutrition"] = nutrition
+    out.pop("nutrition_unknown_items", None)
     if unknown:
         out["nutrition_unknown_items"] = unknown
     return out
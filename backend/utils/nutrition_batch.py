@@ -0,0 +1,138 @@
+"""Batch nutrition engine for many recipes at once.
+
+Macros live in a dense NumPy matrix (canonical ingredient id x nutrient,
+per 100 g). A batch of recipes becomes COO-style (recipe, ingredient, grams)
+triples; every line's contribution is computed in one vectorized step and
+added to its recipe's totals. The arithmetic is the same as
+compute_recipe_nutrition (per_100 * grams / 100, summed in line order), so
+both paths give identical results. Backs POST /nutrition/batch (e.g.
+previewing nutrition for a meal plan).
+
+Parsing ingredient lines is the Python-bound part; very large jobs can be
+split across a process pool (NUTRITION_BATCH_PROCESSES). Without NumPy the
+engine falls back to compute_recipe_nutrition per recipe.
+"""
+
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+
+try:  # optional dependency
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover - numpy not installed
+    np = None  # type: ignore
+
+from .ingredient_store import MACRO_COLUMNS, IngredientStore
+from .nutrition import (
+    MACRO_KEYS,
+    compute_recipe_nutrition,
+    IngredientSnapshot,
+    format_nutrition,
+    ingredient_line,
+    parse_quantity_to_grams,
+    per_snapshot,
+    recipe_servings,
+    resolve_ingredient,
+)
+
+NutritionResult = Tuple[Dict[str, str], List[str]]
+
+# Jobs at least this large are split across processes when a pool is configured
+_POOL_THRESHOLD = 5_000
+
+
+class MacroMatrix:
+    """Dense per-100 g macro matrix indexed by canonical ingredient id."""
+
+    def __init__(self, store: IngredientStore):
+        self.ids: Dict[str, int] = {store.names[i]: i for i in range(len(store))}
+        columns = [MACRO_COLUMNS.index(k) for k in MACRO_KEYS]
+        per_100 = np.frombuffer(store.macros, dtype=np.float64).reshape(len(store), len(MACRO_COLUMNS))
+        # missing macros count as 0, as in compute_recipe_nutrition
+        self.matrix = np.nan_to_num(per_100[:, columns])
+
+
+@per_snapshot
+def get_macro_matrix(snap: IngredientSnapshot) -> MacroMatrix:
+    return MacroMatrix(snap.store)
+
+
+def _compute_chunk(recipes: List[Dict[str, Any]]) -> List[NutritionResult]:
+    if np is None:
+        return [compute_recipe_nutrition(r) for r in recipes]
+    macros = get_macro_matrix()
+    rows: List[int] = []
+    cols: List[int] = []
+    positions: List[int] = []
+    grams_list: List[float] = []
+    unknown: List[List[str]] = []
+    # the same (name, quantity) lines recur across recipes; parse each once per batch
+    parsed: Dict[Tuple[str, str], Tuple[Optional[int], Optional[float]]] = {}
+    for r_idx, recipe in enumerate(recipes):
+        missing: List[str] = []
+        position = 0
+        for ing in recipe.get("ingredients") or []:
+            line = ingredient_line(ing)
+            hit = parsed.get(line)
+            if hit is None:
+                norm_name, meta = resolve_ingredient(line[0])
+                grams = parse_quantity_to_grams(line[1], norm_name, meta)
+                hit = parsed[line] = (macros.ids.get(meta.get("_canonical")) if meta else None, grams)
+            col, grams = hit
+            raw_name = line[0]
+            if col is None or grams is None:
+                missing.append(raw_name)
+                continue
+            rows.append(r_idx)
+            cols.append(col)
+            positions.append(position)
+            position += 1
+            grams_list.append(grams)
+        unknown.append(missing)
+
+    # per-line contributions exactly as line_nutrition computes them: per_100 * (grams / 100)
+    n = len(recipes)
+    row_arr = np.asarray(rows, dtype=np.int64)
+    pos_arr = np.asarray(positions, dtype=np.int64)
+    factor = np.asarray(grams_list, dtype=np.float64) / 100.0
+    contrib = macros.matrix[np.asarray(cols, dtype=np.int64)] * factor[:, None]
+    totals = np.zeros((n, len(MACRO_KEYS)), dtype=np.float64)
+    # float addition is not associative: add the k-th known line of every recipe in step k,
+    # so each recipe is summed in line order like compute_recipe_nutrition
+    order = np.argsort(pos_arr, kind="stable")
+    bounds = np.flatnonzero(np.diff(pos_arr[order])) + 1
+    for at in np.split(order, bounds) if len(order) else []:
+        totals[row_arr[at]] += contrib[at]
+    servings = np.array([recipe_servings(r) for r in recipes], dtype=np.float64)
+    per_serving = totals / servings[:, None]
+
+    return [
+        (format_nutrition(dict(zip(MACRO_KEYS, per_serving[i].tolist()))), unknown[i])
+        for i in range(n)
+    ]
+
+
+def _pool_size(processes: Optional[int]) -> int:
+    if processes is not None:
+        return max(0, processes)
+    try:
+        return max(0, int(os.getenv("NUTRITION_BATCH_PROCESSES", "0")))
+    except ValueError:
+        return 0
+
+
+def compute_batch_nutrition(recipes: List[Dict[str, Any]], processes: Optional[int] = None) -> List[NutritionResult]:
+    """Return [(nutrition_per_serving, unknown_items)] for each recipe, in order."""
+    recipes = list(recipes or [])
+    workers = _pool_size(processes)
+    if workers < 2 or len(recipes) < _POOL_THRESHOLD:
+        return _compute_chunk(recipes)
+    size = -(-len(recipes) // workers)
+    chunks = [recipes[i:i + size] for i in range(0, len(recipes), size)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results: List[NutritionResult] = []
+        for part in pool.map(_compute_chunk, chunks):
+            results.extend(part)
+    return results
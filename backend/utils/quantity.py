@@ -0,0 +1,281 @@
+"""Quantity string parser ("1 1/2 cups, sifted", "2-3 tbsp", "1 can (400 g)").
+
+Quantity strings are tokenized in one pass with a single compiled scanner
+into a structured ParsedQuantity (amount, unit, modifiers, ...). Parsing is
+memoized on the raw string, so quantities repeated across recipes and
+grocery lists parse once; converting to grams for a particular ingredient
+is a cheap arithmetic step on the parsed form.
+"""
+
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from typing import Dict, Any, List, NamedTuple, Optional, Tuple
+
+
+_UNIT_MAP = {
+    "g": "g",
+    "gram": "g",
+    "grams": "g",
+    "kg": "kg",
+    "kilogram": "kg",
+    "kilograms": "kg",
+    "mg": "mg",
+    "milligram": "mg",
+    "milligrams": "mg",
+    "ml": "ml",
+    "milliliter": "ml",
+    "milliliters": "ml",
+    "millilitre": "ml",
+    "millilitres": "ml",
+    "l": "l",
+    "liter": "l",
+    "liters": "l",
+    "litre": "l",
+    "litres": "l",
+    "cup": "cup",
+    "cups": "cup",
+    "tbsp": "tbsp",
+    "tbs": "tbsp",
+    "tablespoon": "tbsp",
+    "tablespoons": "tbsp",
+    "tbsps": "tbsp",
+    "tsp": "tsp",
+    "teaspoon": "tsp",
+    "teaspoons": "tsp",
+    "tsps": "tsp",
+    "oz": "oz",
+    "ounce": "oz",
+    "ounces": "oz",
+    "lb": "lb",
+    "lbs": "lb",
+    "pound": "lb",
+    "pounds": "lb",
+    "pinch": "pinch",
+    "pinches": "pinch",
+    "dash": "dash",
+    "dashes": "dash",
+    "clove": "clove",
+    "cloves": "clove",
+    "can": "can",
+    "cans": "can",
+    "slice": "slice",
+    "slices": "slice",
+    "piece": "piece",
+    "pieces": "piece",
+}
+
+_UNICODE_FRACTIONS = {
+    "½": 1 / 2, "⅓": 1 / 3, "⅔": 2 / 3, "¼": 1 / 4, "¾": 3 / 4, "⅕": 1 / 5, "⅖": 2 / 5,
+    "⅗": 3 / 5, "⅘": 4 / 5, "⅙": 1 / 6, "⅚": 5 / 6, "⅛": 1 / 8, "⅜": 3 / 8, "⅝": 5 / 8, "⅞": 7 / 8,
+}
+
+# Words before the unit that qualify the amount rather than name the ingredient
+_QUALIFIERS = {
+    "about", "approx", "approximately", "around", "roughly", "heaping", "heaped", "scant",
+    "generous", "level", "rounded", "small", "medium", "large", "extra-large", "whole",
+}
+_ARTICLES = {"a", "an", "one"}
+
+_MASS_G = {"g": 1.0, "mg": 0.001, "kg": 1000.0, "oz": 28.3495, "lb": 453.592}
+# volume units as a fraction of one cup
+_VOLUME_CUPS = {
+    "cup": 1.0, "tbsp": 1 / 16, "tsp": 1 / 48, "ml": 1 / 240, "l": 1 / 0.24,
+    "floz": 1 / 8, "pinch": 1 / 768, "dash": 1 / 384,
+}
+_COUNT_UNITS = {"clove", "slice", "piece", "can"}
+
+_SCANNER = re.compile(
+    r"(?P<num>\d+(?:\.\d+)?(?:\s*[/⁄]\s*\d+)?)"
+    r"|(?P<frac>[" + "".join(_UNICODE_FRACTIONS) + r"])"
+    r"|(?P<range>[-–—]|\bto\b|\bor\b)"
+    r"|(?P<paren>\([^)]*\)?)"
+    r"|(?P<word>[a-z][a-z-]*\.?)"
+    r"|(?P<ws>\s+)"
+    r"|(?P<other>.)"
+)
+
+
+# Most LLM quantities are "<number> <unit>[, note]"; these skip the tokenizer
+_SIMPLE = re.compile(r"(\d+(?:\.\d+)?)\s*([a-z]+)\.?(\s*,.*)?")
+
+
+class ParsedQuantity(NamedTuple):
+    """Structured quantity.
+
+    amount: numeric amount (midpoint for ranges), None when absent.
+    unit: normalized unit ("cup", "g", ...) or "" when none.
+    modifiers: qualifiers such as "range", "heaping", "whole", "to taste".
+    weight_g: explicit weight from a parenthetical ("1 can (400 g)").
+    rest: text after the unit, e.g. ", melted" or "onion, diced".
+    """
+
+    amount: Optional[float]
+    unit: str
+    modifiers: Tuple[str, ...]
+    weight_g: Optional[float]
+    rest: str
+
+
+_EMPTY = ParsedQuantity(None, "", (), None, "")
+
+
+def _number(token: str) -> Optional[float]:
+    if "/" in token or "⁄" in token:
+        num, den = re.split(r"\s*[/⁄]\s*", token, maxsplit=1)
+        return float(num) / float(den) if float(den) else None
+    return float(token)
+
+
+def _paren_weight(text: str) -> Tuple[Optional[float], bool]:
+    """Return (grams, per_item) for a parenthetical like "(400 g)" or "(14 oz each)"."""
+    inner = parse_quantity(text.strip("()"))
+    factor = _MASS_G.get(inner.unit)
+    if inner.amount is None or factor is None:
+        return None, False
+    return inner.amount * factor, "each" in inner.rest
+
+
+def _rest_modifiers(rest: str) -> Tuple[str, ...]:
+    return ("to taste",) if "to taste" in rest or rest.endswith("as needed") else ()
+
+
+@lru_cache(maxsize=16384)
+def parse_quantity(raw: str) -> ParsedQuantity:
+    """Parse a freeform quantity string into a ParsedQuantity (memoized on the raw string)."""
+    text = (raw or "").lower().strip()
+    if not text:
+        return _EMPTY
+    simple = _SIMPLE.fullmatch(text)
+    if simple and simple.group(2) in _UNIT_MAP:
+        rest = (simple.group(3) or "").strip()
+        return ParsedQuantity(float(simple.group(1)), _UNIT_MAP[simple.group(2)], _rest_modifiers(rest), None, rest)
+    amount: Optional[float] = None
+    low: Optional[float] = None
+    unit = ""
+    modifiers: List[str] = []
+    weight_g: Optional[float] = None
+    per_item = False
+    rest_at = len(text)
+    pending_range = False
+
+    for m in _SCANNER.finditer(text):
+        kind = m.lastgroup
+        token = m.group()
+        if kind == "ws":
+            continue
+        if kind in ("num", "frac"):
+            value = _number(token) if kind == "num" else _UNICODE_FRACTIONS[token]
+            if value is None or unit:
+                rest_at = m.start()
+                break
+            if pending_range and low is not None:
+                # "1-1/2" is a mixed number, "2-3" a range
+                amount = low + value if value < low else (low + value) / 2.0
+                if value >= low:
+                    modifiers.append("range")
+                pending_range = False
+                low = None
+            elif amount is not None and (kind == "frac" or "/" in token or "⁄" in token):
+                amount += value  # "1 1/2", "1½"
+            elif amount is None:
+                amount = value
+            else:
+                rest_at = m.start()
+                break
+            continue
+        if kind == "range" and amount is not None and not unit and not pending_range:
+            pending_range, low = True, amount
+            continue
+        if kind == "paren":
+            grams, each = _paren_weight(token)
+            if grams is not None:
+                weight_g, per_item = grams, each
+                continue
+            rest_at = m.start()
+            break
+        if kind == "word":
+            word = token.rstrip(".")
+            if pending_range:
+                # "2 to taste" / dangling "-": not a range after all
+                pending_range, low = False, None
+            if word in _ARTICLES and amount is None:
+                amount = 1.0
+                continue
+            if word in _QUALIFIERS and not unit:
+                modifiers.append(word)
+                continue
+            if word == "fl" and not unit and text[m.end():].lstrip().startswith("oz"):
+                unit = "floz"
+                continue
+            if unit == "floz" and word == "oz":
+                continue
+            if word == "of" and unit:
+                continue
+            mapped = _UNIT_MAP.get(word)
+            if mapped and not unit and amount is not None:
+                unit = mapped
+                continue
+            if mapped in ("pinch", "dash") and not unit:
+                amount, unit = 1.0, mapped  # "pinch of salt"
+                continue
+        rest_at = m.start()
+        break
+
+    rest = text[rest_at:].strip()
+    modifiers.extend(_rest_modifiers(rest))
+    if weight_g is not None and per_item:
+        modifiers.append("each")
+    return ParsedQuantity(amount, unit, tuple(modifiers), weight_g, rest)
+
+
+def quantity_to_grams(parsed: ParsedQuantity, meta: Optional[Dict[str, Any]]) -> Optional[float]:
+    """Convert a parsed quantity to grams for one ingredient, using densities when available."""
+    amount, unit = parsed.amount, parsed.unit
+    count_g = float(meta["count_g"]) if meta and meta.get("count_g") else None
+    if parsed.weight_g is not None:
+        # "1 can (400 g)" / "2 (14 oz) cans": weight per item; "1 cup (120 g)": total
+        if unit in _COUNT_UNITS or not unit or "each" in parsed.modifiers:
+            return parsed.weight_g * (amount or 1.0)
+        return parsed.weight_g
+    if amount is None:
+        return None
+
+    if unit in _MASS_G:
+        return amount * _MASS_G[unit]
+    if not unit:
+        if count_g is not None:
+            return amount * count_g
+        # a bare number reads as grams; "3 sprigs thyme" is an unknown count
+        return amount if not parsed.rest[:1].isalpha() else None
+
+    # count-based items (eggs, cloves)
+    if unit in _COUNT_UNITS or "whole" in parsed.modifiers:
+        return amount * count_g if count_g is not None else None
+
+    cups = _VOLUME_CUPS.get(unit)
+    if cups is None:
+        return None
+    if meta and meta.get("density_g_per_cup"):
+        density = float(meta["density_g_per_cup"])
+    elif count_g is not None:
+        density = count_g  # last-resort approximation
+    else:
+        density = 240.0  # approximate water density per cup
+    return amount * cups * density
+
+
+def parse_quantity_to_grams(quantity: str, name: str, meta: Optional[Dict[str, Any]]) -> Optional[float]:
+    """Convert a freeform quantity string to grams using densities when available."""
+    if not quantity:
+        return None
+    return quantity_to_grams(parse_quantity(quantity), meta)
+
+
+def split_quantity(quantity: str) -> Tuple[Optional[float], str, str]:
+    """Split '2 tbsp, melted' into (2.0, 'tbsp', ', melted'); unit is normalized, amount None if absent."""
+    parsed = parse_quantity(quantity)
+    if parsed.amount is None:
+        return None, "", (quantity or "").strip()
+    return parsed.amount, parsed.unit, parsed.rest
@@ -1,8 +1,16 @@
 """Recipe-related utilities."""
 
+import hashlib
+import json
 from typing import Dict, Any, List
 
 
+def recipe_hash(recipe: Dict[str, Any]) -> str:
+    """Content address of a recipe body: SHA-256 of its canonical JSON (sorted keys, no whitespace)."""
+    canonical = json.dumps(recipe, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
 def normalize_recipe(data: Dict[str, Any]) -> Dict[str, Any]:
     """Normalize a recipe-like dict into the API schema.
 
@@ -0,0 +1,220 @@
+"""Substitute recommender ranking ingredients by nutritional and density similarity.
+
+Every ingredient's per-100g macros, density and aisle are held in a NumPy
+feature matrix (standardized numeric columns + aisle one-hot, rows L2
+normalized), so "closest substitutes for X" is one matrix-vector product.
+Similar macros alone do not make a substitute (flour and sugar are close), so
+candidates are limited to ingredients with the same culinary role ("role" in
+ingredients.json: milk, fat, cheese, ...) or, without one, the same aisle, and
+must clear a high similarity threshold. When nothing qualifies there is no
+local answer and the LLM is asked instead.
+A top-k neighbour table is precomputed for small databases and filled lazily
+per queried row for large ones (e.g. a 300k-row USDA import). Allergen/diet
+exclusions use the class bitmasks from utils/constraints.py.
+
+NumPy is optional; without it the ranker is disabled and callers fall back to
+the LLM.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Any, Iterable, List, Optional, Sequence, Tuple
+
+try:  # optional dependency
+    import numpy as np  # type: ignore
+except Exception:  # pragma: no cover - numpy not installed
+    np = None  # type: ignore
+
+from .logging_utils import get_logger
+from .ingredient_store import MACRO_COLUMNS, IngredientStore
+from .nutrition import MACRO_KEYS, IngredientSnapshot, load_ingredient_db, per_snapshot
+from .constraints import tags_to_mask
+
+logger = get_logger(__name__)
+
+_AISLE_WEIGHT = 1.5
+# Below this size the full neighbour table is built eagerly; above it rows fill on demand
+_FULL_TABLE_LIMIT = 20_000
+_TABLE_K = 16
+_BLOCK = 2048
+_MIN_SIMILARITY = 0.8
+
+
+class SubstituteRanker:
+    """Nearest-neighbour search over ingredient feature vectors."""
+
+    def __init__(
+        self,
+        names: Sequence[str],
+        macros: "np.ndarray",
+        density: "np.ndarray",
+        aisles: Sequence[str],
+        masks: "np.ndarray",
+        roles: Optional[Sequence[Optional[str]]] = None,
+    ):
+        self.names = list(names)
+        self.ids = {n: i for i, n in enumerate(self.names)}
+        self.masks = np.asarray(masks, dtype=np.int64)
+        self.features = self._features(np.asarray(macros, dtype=np.float32), np.asarray(density, dtype=np.float32), aisles)
+        # substitutes only come from the same group: the role, else the aisle
+        roles = roles or [None] * len(self.names)
+        labels = [f"role:{r}" if r else f"aisle:{a}" for r, a in zip(roles, aisles)]
+        group_ids = {label: g for g, label in enumerate(sorted(set(labels)))}
+        self.groups = np.array([group_ids[label] for label in labels], dtype=np.int64)
+        self._members = {g: np.flatnonzero(self.groups == g) for g in group_ids.values()}
+        self._table: Dict[int, "np.ndarray"] = {}
+        if len(self.names) <= _FULL_TABLE_LIMIT:
+            self._build_table()
+
+    @staticmethod
+    def _features(macros: "np.ndarray", density: "np.ndarray", aisles: Sequence[str]) -> "np.ndarray":
+        numeric = np.column_stack([macros, density.reshape(-1, 1)]).astype(np.float32)
+        # missing densities (NaN) take the column mean so they do not dominate distances
+        known = ~np.isnan(numeric)
+        col_mean = np.where(known, numeric, 0).sum(axis=0) / np.maximum(known.sum(axis=0), 1)
+        numeric = np.where(np.isnan(numeric), col_mean, numeric)
+        std = numeric.std(axis=0)
+        std[std == 0] = 1.0
+        numeric = (numeric - numeric.mean(axis=0)) / std
+        aisle_names = sorted(set(aisles))
+        aisle_ids = np.array([aisle_names.index(a) for a in aisles], dtype=np.int64)
+        onehot = np.zeros((len(aisles), len(aisle_names)), dtype=np.float32)
+        onehot[np.arange(len(aisles)), aisle_ids] = _AISLE_WEIGHT
+        feats = np.hstack([numeric, onehot])
+        norms = np.linalg.norm(feats, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return np.ascontiguousarray(feats / norms, dtype=np.float32)
+
+    def _top(self, sims: "np.ndarray", k: int) -> "np.ndarray":
+        k = min(k, sims.shape[-1])
+        if k <= 0:
+            return np.empty(0, dtype=np.int64)
+        idx = np.argpartition(-sims, k - 1)[:k]
+        return idx[np.argsort(-sims[idx])]
+
+    def _build_table(self) -> None:
+        for members in self._members.values():
+            feats = self.features[members]
+            k = min(_TABLE_K + 1, len(members))
+            for start in range(0, len(members), _BLOCK):
+                block = feats[start:start + _BLOCK] @ feats.T
+                part = np.argpartition(-block, k - 1, axis=1)[:, :k]
+                rows = np.arange(block.shape[0])[:, None]
+                order = np.argsort(-block[rows, part], axis=1)
+                for offset, row in enumerate(part[rows, order]):
+                    self._table[int(members[start + offset])] = members[row]
+
+    def _neighbours(self, i: int) -> "np.ndarray":
+        row = self._table.get(i)
+        if row is None:
+            members = self._members[int(self.groups[i])]
+            row = members[self._top(self.features[members] @ self.features[i], _TABLE_K + 1)]
+            self._table[i] = row
+        return row
+
+    def closest(
+        self,
+        name: str,
+        k: int = 5,
+        exclude: Iterable[str] = (),
+        avoid_mask: int = 0,
+        min_similarity: float = _MIN_SIMILARITY,
+    ) -> List[Tuple[str, float]]:
+        """Return up to k (name, similarity) pairs closest to name, skipping excluded names/classes."""
+        i = self.ids.get(name)
+        if i is None:
+            return []
+        skip = {self.ids[e] for e in exclude if e in self.ids}
+        skip.add(i)
+
+        def pick(candidates: "np.ndarray", sims: Optional["np.ndarray"]) -> List[Tuple[str, float]]:
+            out = []
+            for j in candidates:
+                j = int(j)
+                if j in skip or (avoid_mask and int(self.masks[j]) & avoid_mask):
+                    continue
+                sim = float(sims[j]) if sims is not None else float(self.features[j] @ self.features[i])
+                if sim < min_similarity:
+                    break
+                out.append((self.names[j], sim))
+                if len(out) >= k:
+                    break
+            return out
+
+        result = pick(self._neighbours(i), None)
+        members = self._members[int(self.groups[i])]
+        if len(result) >= k or len(self._neighbours(i)) >= len(members):
+            return result
+        # exclusions ate into the precomputed neighbours: one vectorized scan of the group with masking
+        sims = np.full(len(self.names), -np.inf, dtype=np.float32)
+        sims[members] = self.features[members] @ self.features[i]
+        if avoid_mask:
+            sims = np.where((self.masks & avoid_mask) != 0, -np.inf, sims)
+        return pick(self._top(sims, k + len(skip)), sims)
+
+
+def ranker_from_records(records: Iterable[Dict[str, Any]]) -> Optional[SubstituteRanker]:
+    """Build a ranker from {name, per_100g, density_g_per_cup, aisle, role, tags} records."""
+    if np is None:
+        return None
+    names, macros, density, aisles, masks, roles = [], [], [], [], [], []
+    for r in records:
+        per_100 = r.get("per_100g") or {}
+        names.append(r["name"])
+        macros.append([float(per_100.get(k, 0) or 0) for k in MACRO_KEYS])
+        d = r.get("density_g_per_cup")
+        density.append(float(d) if d else np.nan)
+        aisles.append(r.get("aisle") or "Other")
+        roles.append(r.get("role"))
+        masks.append(tags_to_mask(r.get("tags") or []))
+    if not names:
+        return None
+    return SubstituteRanker(names, np.array(macros), np.array(density), aisles, np.array(masks), roles)
+
+
+def ranker_from_store(store: IngredientStore) -> Optional[SubstituteRanker]:
+    """Build a ranker straight from the store's columns (one row per canonical ingredient)."""
+    if np is None or not len(store):
+        return None
+    n = len(store)
+    macros = np.nan_to_num(np.frombuffer(store.macros, dtype=np.float64).reshape(n, len(MACRO_COLUMNS)), nan=0.0)
+    density = np.frombuffer(store.density, dtype=np.float64)
+    aisle_table = [a or "Other" for a in store.aisles]
+    aisles = [aisle_table[a] for a in store.aisle_ids]
+    # store tag bits are the store's own tag table; translate them to constraint class bits
+    tag_masks = np.frombuffer(store.tag_masks, dtype=np.uint32).astype(np.int64)
+    masks = np.zeros(n, dtype=np.int64)
+    for bit, tag in enumerate(store.tag_names):
+        masks |= np.where((tag_masks >> bit) & 1, tags_to_mask([tag]), 0)
+    roles: List[Optional[str]] = [None] * n
+    for i, extra in store.extras.items():
+        roles[i] = extra.get("role")
+    return SubstituteRanker(list(store.names), macros, density, aisles, masks, roles)
+
+
+@per_snapshot
+def get_ranker(snap: IngredientSnapshot) -> Optional[SubstituteRanker]:
+    """Ranker over the local ingredient DB (one row per canonical ingredient)."""
+    ranker = ranker_from_store(snap.store)
+    if ranker is None and np is None:
+        logger.info("numpy not installed; similarity-ranked substitutes disabled")
+    return ranker
+
+
+def closest_substitutes(
+    ingredient: str,
+    k: int = 5,
+    exclude: Iterable[str] = (),
+    avoid_mask: int = 0,
+) -> List[str]:
+    """Return up to k known ingredients most similar to ingredient (canonical names)."""
+    ranker = get_ranker()
+    if ranker is None:
+        return []
+    key = (ingredient or "").strip().lower()
+    meta = load_ingredient_db().get(key)
+    if meta is None:
+        return []
+    db = load_ingredient_db()
+    excluded = [db[e.strip().lower()].get("_canonical") for e in exclude if e and e.strip().lower() in db]
+    return [n for n, _ in ranker.closest(meta.get("_canonical", key), k, excluded, avoid_mask)]
@@ -0,0 +1,27 @@
+"""Dislike substitution (substitution_engine.apply_substitutions)."""
+
+from backend import substitution_engine as se
+
+
+def test_substitutes_are_resolved_only_for_dislikes_in_the_recipe(monkeypatch):
+    asked = []
+
+    def fake_suggest(ingredients, avoid_mask=0):
+        ingredients = list(ingredients)
+        asked.extend(ingredients)
+        return {i: ["oat milk"] for i in ingredients}
+
+    monkeypatch.setattr(se, "suggest_substitutes_many", fake_suggest)
+    recipe = {
+        "name": "Pancakes",
+        "ingredients": [{"name": "milk", "quantity": "1 cup"}, {"name": "flour", "quantity": "1 cup"}],
+        "steps": ["Whisk the milk into the flour."],
+    }
+    out = se.apply_substitutions(recipe, {"milk", "cilantro", "mushrooms", "olives"})
+    assert asked == ["milk"]
+    assert out["ingredients"][0]["name"] == "oat milk"
+    assert out["steps"] == ["Whisk the oat milk into the flour."]
+
+    asked.clear()
+    assert se.apply_substitutions(recipe, {"cilantro", "anchovies"}) == recipe
+    assert asked == []
@@ -0,0 +1,16 @@
+"""Data bundle selection (utils/bundle.py)."""
+
+from pathlib import Path
+
+from backend.utils import bundle
+
+
+def test_bundle_is_opt_in(monkeypatch, tmp_path):
+    default = tmp_path / "bundle.bin"
+    default.write_bytes(b"")
+    monkeypatch.setattr(bundle, "default_bundle_path", lambda: default)
+    monkeypatch.delenv("DATA_BUNDLE_PATH", raising=False)
+    assert bundle.bundle_path() is None
+
+    monkeypatch.setenv("DATA_BUNDLE_PATH", str(default))
+    assert bundle.bundle_path() == Path(default)
@@ -0,0 +1,20 @@
+"""Allergen/diet masks (utils/constraints.py)."""
+
+from backend.utils import nutrition
+from backend.utils.constraints import mask_version
+from backend.utils.ingredient_store import IngredientStore
+
+
+def _use_db(monkeypatch, raw, version):
+    snap = nutrition.IngredientSnapshot(version, None, IngredientStore.from_raw(raw))
+    monkeypatch.setattr(nutrition, "_SNAPSHOT", snap)
+
+
+def test_mask_version_tracks_tags_not_reloads(monkeypatch):
+    pasta = {"per_100g": {}, "aliases": ["spaghetti"], "tags": ["gluten"]}
+    _use_db(monkeypatch, {"pasta": pasta}, 1000)
+    first = mask_version()
+    _use_db(monkeypatch, {"pasta": dict(pasta)}, 1001)
+    assert mask_version() == first
+    _use_db(monkeypatch, {"pasta": dict(pasta, tags=[])}, 1002)
+    assert mask_version() != first
@@ -0,0 +1,25 @@
+"""Columnar ingredient store (utils/ingredient_store.py)."""
+
+import json
+from pathlib import Path
+
+from backend.utils.ingredient_store import IngredientStore
+
+RAW = json.loads((Path(__file__).resolve().parent.parent / "data" / "ingredients.json").read_text(encoding="utf-8"))
+
+
+def test_aliases_come_from_the_per_id_table_in_source_order():
+    store = IngredientStore.from_raw(RAW)
+    for i, name in enumerate(store.names):
+        assert list(store.aliases_of(i)) == [a.lower() for a in RAW[name].get("aliases") or []]
+        assert store.entries[name]["aliases"] == store.aliases_of(i)
+
+
+def test_alias_claimed_by_an_earlier_ingredient_stays_with_it():
+    store = IngredientStore.from_raw({
+        "milk": {"per_100g": {}, "aliases": ["whole milk"]},
+        "cream": {"per_100g": {}, "aliases": ["whole milk", "heavy cream"]},
+    })
+    assert store.entries["whole milk"]["_canonical"] == "milk"
+    assert store.aliases_of(store.lookup("milk")) == ("whole milk",)
+    assert store.aliases_of(store.lookup("cream")) == ("heavy cream",)
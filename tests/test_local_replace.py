@@ -0,0 +1,48 @@
+"""Deterministic ingredient swaps (substitution_engine.local_replace)."""
+
+import pytest
+
+from backend.substitution_engine import local_replace
+
+
+def _recipe(ingredients, steps):
+    return {
+        "name": "Test",
+        "ingredients": [{"name": n, "quantity": q} for n, q in ingredients],
+        "steps": steps,
+    }
+
+
+@pytest.mark.parametrize(
+    "ingredients, steps, src, dst",
+    [
+        ([("chicken broth", "2 cups"), ("chicken breast", "200 g")], ["Simmer the chicken in the chicken broth."], "chicken", "tofu"),
+        ([("peanut butter", "2 tbsp")], ["Spread the peanut butter."], "butter", "olive oil"),
+        ([("coconut milk", "1 cup")], ["Pour in the coconut milk."], "milk", "oat milk"),
+    ],
+)
+def test_src_as_modifier_of_another_food_goes_to_llm(ingredients, steps, src, dst):
+    assert local_replace(_recipe(ingredients, steps), [(src, dst)]) is None
+
+
+def test_alias_hit_swaps_whole_line():
+    out = local_replace(_recipe([("ground beef", "500 g")], ["Brown the beef."]), [("beef", "lentils")])
+    assert [i["name"] for i in out["ingredients"]] == ["lentils"]
+    assert out["steps"] == ["Brown the lentils."]
+
+
+def test_descriptor_form_replaces_matched_name_only():
+    out = local_replace(
+        _recipe([("boneless skinless chicken breasts", "2")], ["Slice the chicken."]), [("chicken", "tofu")]
+    )
+    assert out["ingredients"][0]["name"] == "boneless skinless tofu"
+    assert out["steps"] == ["Slice the tofu."]
+
+
+def test_other_known_ingredients_containing_src_are_kept():
+    out = local_replace(
+        _recipe([("milk", "1 cup"), ("almond milk", "1 cup")], ["Whisk the milk into the almond milk."]),
+        [("milk", "oat milk")],
+    )
+    assert [i["name"] for i in out["ingredients"]] == ["oat milk", "almond milk"]
+    assert out["steps"] == ["Whisk the oat milk into the almond milk."]
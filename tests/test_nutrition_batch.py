@@ -0,0 +1,37 @@
+"""Batch nutrition (utils/nutrition_batch.py) against the single-recipe path."""
+
+import random
+
+import pytest
+
+from backend import recipe_retrieval as rr
+from backend.utils.nutrition import compute_recipe_nutrition, load_ingredient_db
+from backend.utils.nutrition_batch import compute_batch_nutrition
+
+pytest.importorskip("numpy")
+
+QUANTITIES = ["1 cup", "2 tbsp", "1 tsp", "250 g", "500g", "3", "1.5 cups", "2 cloves", "100 g", "to taste"]
+
+
+def _random_recipes(count, seed=7):
+    rng = random.Random(seed)
+    names = sorted(load_ingredient_db()) + ["mystery root", "chicken broth"]
+    return [
+        {
+            "servings": rng.choice([1, 2, 3, 4, 6, 7]),
+            "ingredients": [
+                {"name": rng.choice(names), "quantity": rng.choice(QUANTITIES)} for _ in range(rng.randint(0, 14))
+            ],
+        }
+        for _ in range(count)
+    ]
+
+
+def test_rounding_boundary_matches_single_path():
+    recipe = {"servings": 4, "ingredients": [{"name": "spinach", "quantity": "500g"}]}
+    assert compute_batch_nutrition([recipe]) == [compute_recipe_nutrition(recipe)]
+
+
+def test_batch_matches_single_path_over_corpus():
+    recipes = rr.browse_recipes() + _random_recipes(2000)
+    assert compute_batch_nutrition(recipes) == [compute_recipe_nutrition(r) for r in recipes]
@@ -0,0 +1,18 @@
+"""Local recipe tiers consulted before the LLM."""
+
+from backend import recipe_retrieval as rr
+
+
+def test_corpus_tier_requires_the_whole_title():
+    assert rr.resolve_local_recipe("cake") == (None, None)
+    assert rr.resolve_local_recipe("pan") == (None, None)
+
+
+def test_corpus_tier_ignores_case_and_spacing():
+    recipe, source = rr.resolve_local_recipe("  Pancakes ")
+    assert source == rr.SOURCE_CORPUS
+    assert recipe["name"] == "pancakes"
+
+
+def test_browse_lookup_still_matches_contained_names():
+    assert rr.get_recipe_by_name("cake")["name"] == "pancakes"
@@ -0,0 +1,42 @@
+"""Local constraint validation (recipe_validator.validate_recipe)."""
+
+import pytest
+
+from backend.recipe_validator import validate_recipe
+
+
+def _recipe(ingredients, steps=()):
+    return {"name": "Test", "ingredients": [{"name": n, "quantity": "1 cup"} for n in ingredients], "steps": list(steps)}
+
+
+@pytest.mark.parametrize(
+    "ingredients, steps",
+    [
+        (["gluten-free pasta"], ["Cook the pasta until al dente.", "Toss the gluten-free pasta with oil."]),
+        (["rice noodles"], ["Soak the rice noodles.", "Drain the noodles."]),
+        (["rice noodles, soaked"], ["Stir-fry the noodles."]),
+    ],
+)
+def test_gluten_free_lookalikes_are_allowed(ingredients, steps):
+    assert validate_recipe(_recipe(ingredients, steps), dietary=["gluten-free"]) == []
+
+
+@pytest.mark.parametrize(
+    "ingredients, steps, hit_ingredients, hit_steps",
+    [
+        (["spaghetti"], ["Boil the spaghetti."], ["spaghetti"], [0]),
+        (["rice noodles", "egg noodles"], ["Boil the noodles."], ["egg noodles"], [0]),
+        (["rice noodles", "flour"], ["Drain the noodles.", "Dust with flour."], ["flour"], [1]),
+    ],
+)
+def test_gluten_is_still_flagged(ingredients, steps, hit_ingredients, hit_steps):
+    violations = validate_recipe(_recipe(ingredients, steps), dietary=["gluten-free"])
+    assert violations == [
+        {"constraint": "gluten-free", "kind": "diet", "ingredients": hit_ingredients, "steps": hit_steps}
+    ]
+
+
+def test_plain_dislike_is_not_cleared_by_the_db():
+    violations = validate_recipe(_recipe(["rice"], ["Rinse the rice."]), dislikes=["rice"])
+    assert violations[0]["ingredients"] == ["rice"]
+    assert violations[0]["steps"] == [0]
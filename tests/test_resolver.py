@@ -0,0 +1,48 @@
+"""Ingredient name resolution against data/ingredients.json."""
+
+import pytest
+
+from backend.utils.nutrition import resolve_ingredient
+
+
+def _resolved(name):
+    canonical, meta = resolve_ingredient(name)
+    return canonical if meta is not None else None
+
+
+@pytest.mark.parametrize(
+    "name",
+    [
+        # a known ingredient as a modifier of some other food
+        "coconut milk",
+        "peanut butter",
+        "butter beans",
+        "chicken broth",
+        "beef broth",
+        "tomato sauce",
+        "egg whites",
+        "buttermilk",
+    ],
+)
+def test_modifier_only_matches_are_unknown(name):
+    assert _resolved(name) is None
+
+
+@pytest.mark.parametrize(
+    "name, canonical",
+    [
+        ("milk", "milk"),
+        ("whole milk", "milk"),
+        ("mushrooms", "mushroom"),
+        ("garlic cloves, minced", "garlic"),
+        ("3 cloves garlic", "garlic"),
+        ("unsalted butter, softened", "butter"),
+        ("large eggs", "egg"),
+        ("shredded mozzarella", "mozzarella cheese"),
+        ("red bell peppers", "bell pepper"),
+        ("boneless skinless chicken breasts", "chicken breast"),
+        ("1 (14 oz) can tomatoes", "tomato"),
+    ],
+)
+def test_descriptors_and_portions_still_resolve(name, canonical):
+    assert _resolved(name) == canonical
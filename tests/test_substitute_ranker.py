@@ -0,0 +1,58 @@
+"""Similarity-ranked substitutes (utils/substitute_ranker.py) on data/ingredients.json."""
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from backend.utils.constraints import CLASS_BITS  # noqa: E402
+from backend.utils.substitute_ranker import closest_substitutes, ranker_from_records  # noqa: E402
+
+
+@pytest.mark.parametrize("ingredient", ["all-purpose flour", "egg", "pasta", "oats", "cream"])
+def test_no_local_answer_without_a_real_substitute(ingredient):
+    # nothing in the DB plays the same role closely enough: left to the LLM
+    assert closest_substitutes(ingredient) == []
+
+
+@pytest.mark.parametrize(
+    "ingredient, allowed",
+    [
+        ("milk", {"oat milk", "almond milk", "soy milk"}),
+        ("butter", {"olive oil", "vegetable oil"}),
+        ("cheddar cheese", {"mozzarella cheese"}),
+        ("sugar", {"brown sugar"}),
+        ("chicken breast", {"ground beef"}),
+    ],
+)
+def test_substitutes_share_the_ingredient_role(ingredient, allowed):
+    subs = closest_substitutes(ingredient)
+    assert subs
+    assert set(subs) <= allowed
+
+
+def test_macro_lookalikes_from_other_roles_are_never_suggested():
+    assert "sugar" not in closest_substitutes("all-purpose flour")
+    assert not {"ricotta cheese", "mozzarella cheese"} & set(closest_substitutes("egg"))
+    assert not {"egg", "chicken breast"} & set(closest_substitutes("cheddar cheese"))
+    assert not {"spinach", "mushroom"} & set(closest_substitutes("pasta"))
+
+
+def test_allergen_exclusion():
+    subs = closest_substitutes("milk", avoid_mask=CLASS_BITS["nuts"])
+    assert subs and "almond milk" not in subs
+
+
+def test_aisle_groups_ingredients_without_a_role():
+    def record(name, aisle, calories, protein, fat):
+        per_100g = {"calories": calories, "protein": protein, "carbs": 10, "fat": fat, "fiber": 1}
+        return {"name": name, "per_100g": per_100g, "density_g_per_cup": 200, "aisle": aisle}
+
+    ranker = ranker_from_records([
+        record("a", "Produce", 100, 5, 2),
+        record("b", "Produce", 105, 5, 2),
+        record("c", "Baking", 100, 5, 2),
+        record("d", "Produce", 800, 1, 90),
+        record("e", "Baking", 300, 30, 20),
+    ])
+    names = [n for n, _ in ranker.closest("a")]
+    assert names == ["b"]